@@ -3,10 +3,23 @@
 import os
 import sys
 
+# Commands that don't render pages (mostly cron jobs) start faster with
+# myproject/settings_lean.py and without the system checks, which deploys and
+# runserver still run
+LEAN_COMMANDS = {
+    'archive_articles', 'backfill_article_body', 'check_listing_counts', 'export_articles', 'export_data',
+    'gc_media', 'import_articles', 'merge_duplicates', 'rebuild_period_counts', 'rollup_views',
+    'scrape_news', 'seed_categories',
+}
+
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    lean = command in LEAN_COMMANDS and not any(arg.startswith('--settings') for arg in sys.argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings_lean' if lean else 'myproject.settings')
+    if command in LEAN_COMMANDS and '--skip-checks' not in sys.argv:
+        sys.argv.append('--skip-checks')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -3,6 +3,10 @@ ASGI config for myproject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve with an ASGI server (e.g. ``uvicorn myproject.asgi:application``) so the
+breaking-news stream (news.views.breaking_news_stream) can hold Server-Sent
+Events connections open. Under WSGI it falls back to clients polling.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -14,3 +18,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_asgi_application()
+
+# Fill caches and connections in the background (news/warmup.py)
+from news.warmup import start  # noqa: E402
+
+start()
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.middleware.ProfilingMiddleware',
+    'news.middleware.CacheBusMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,8 +51,33 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'news.middleware.RateLimitMiddleware',
 ]
 
+# Token buckets per client IP (news/ratelimit.py): up to `burst` requests at
+# once, refilling to full over `period` seconds.
+RATE_LIMITS = {
+    'page': {'burst': 60, 'period': 60},       # public pages
+    'paging': {'burst': 20, 'period': 60},     # ?page=N on category / tag listings
+    'comment': {'burst': 5, 'period': 600},    # comment POSTs on articles
+    'crawler': {'burst': 300, 'period': 60},   # pages and paging for verified RATE_LIMIT_CRAWLERS
+}
+# Where the client address comes from; behind nginx use e.g. 'HTTP_X_REAL_IP',
+# or 'HTTP_X_FORWARDED_FOR' with the number of proxies in front of Django that
+# append to it (the client address is that many entries from the right)
+RATE_LIMIT_IP_HEADER = 'REMOTE_ADDR'
+RATE_LIMIT_TRUSTED_PROXIES = 1
+RATE_LIMIT_ALLOWED_IPS = ['127.0.0.1/32', '::1/128']
+# Search engine crawlers: user-agent substring -> the domains their reverse DNS
+# must be in (forward-confirmed). Verified ones use the 'crawler' bucket for
+# pages; anyone else sending these user agents is limited like everybody.
+RATE_LIMIT_CRAWLERS = {
+    'Googlebot': ['.googlebot.com', '.google.com'],
+    'bingbot': ['.search.msn.com'],
+    'Applebot': ['.applebot.apple.com'],
+    'YandexBot': ['.yandex.ru', '.yandex.net', '.yandex.com'],
+}
+
 ROOT_URLCONF = 'myproject.urls'
 
 TEMPLATES = [
@@ -64,6 +91,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'news.context_processors.site_configuration',
+                'news.context_processors.navigation',
             ],
         },
     },
@@ -79,9 +107,24 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than in-memory, so multi-process tests share the test database
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Old and trashed articles are moved to a cold table by `manage.py archive_articles`.
+# To keep that table in its own SQLite file, add this and run
+# `manage.py migrate --database archive`:
+# DATABASES['archive'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': BASE_DIR / 'archive.sqlite3',
+# }
+DATABASE_ROUTERS = ['news.routers.ArchiveRouter']
+
+# Days after publication / after being trashed before archive_articles moves an article
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_TRASH_AFTER_DAYS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -123,3 +166,30 @@ STATIC_URL = 'static/'
 import os
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Async home / article views (news/concurrent.py): threads for concurrent
+# queries (0 runs them one after another), and whether to stream the page
+# shell first when served through myproject/asgi.py
+ASYNC_VIEW_THREADS = 4
+STREAM_PAGE_SHELL = True
+
+# Warm templates, caches and the fetch pool's connections in a background
+# thread when the web process starts (news/warmup.py)
+WARM_UP_ON_START = True
+
+# Static pre-rendered pages (see news/prerender.py and `manage.py prerender_site`)
+PRERENDER_ROOT = os.path.join(BASE_DIR, 'prerendered')
+
+# View analytics (news/analytics.py): seconds between writes of the views
+# counted in memory (0: only at exit and before dashboard reads), and days
+# kept at hourly resolution before `manage.py rollup_views` folds them into
+# daily totals
+ANALYTICS_FLUSH_SECONDS = 10
+ANALYTICS_HOURLY_DAYS = 30
+
+# Dashboard exports (news/exports.py): rows fetched per database round trip,
+# where background exports are written (not served publicly: they hold
+# commenters' emails) and how many of those run at once per process
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_ROOT = os.path.join(BASE_DIR, 'exports')
+EXPORT_JOBS = 2
@@ -0,0 +1,26 @@
+"""
+Settings for management commands that never serve a page (cron jobs, imports,
+maintenance). manage.py uses them for the commands in LEAN_COMMANDS unless
+DJANGO_SETTINGS_MODULE is set.
+
+Same database, cache and app settings as myproject/settings.py, without the
+admin (and its jazzmin theme), sessions, messages, static files and
+templates, so a short cron run doesn't import and check all of that.
+`manage.py startup_profile` compares the two.
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS  # noqa: F405
+    if app not in (
+        'jazzmin',
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+    )
+]
+MIDDLEWARE = []
+TEMPLATES = []
+# No admin: reverse() of public pages (e.g. prerender.mark_stale) still works
+ROOT_URLCONF = 'news.urls'
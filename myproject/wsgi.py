@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
 
 application = get_wsgi_application()
+
+# Fill caches and connections in the background (news/warmup.py)
+from news.warmup import start  # noqa: E402
+
+start()
@@ -1,5 +1,37 @@
 from django.contrib import admin
-from .models import Category, Tag, Article, Comment, SiteConfiguration
+from .models import Category, Tag, Article, Comment, SiteConfiguration, ActivityLog
+from .autocomplete import hot_set
+from .paginators import EstimatedCountPaginator
+
+
+def is_changelist(request):
+    match = request.resolver_match
+    return match is not None and match.url_name.endswith('_changelist')
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    # Million-row tables: no COUNT(*) over the whole table on each page load
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class TagFilter(admin.SimpleListFilter):
+    # The default filter would list every tag; offer the most used ones
+    # (cached, see news/autocomplete.py) plus whatever is selected.
+    title = 'tag'
+    parameter_name = 'tag'
+
+    def lookups(self, request, model_admin):
+        choices = list(hot_set('tags'))
+        if self.value() and self.value().isdigit() and int(self.value()) not in {pk for pk, _ in choices}:
+            choices += list(Tag.objects.filter(pk=self.value()).values_list('id', 'name'))
+        return [(str(pk), name) for pk, name in choices]
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(tags__id=self.value())
+        return queryset
 
 @admin.register(SiteConfiguration)
 class SiteConfigurationAdmin(admin.ModelAdmin):
@@ -43,19 +75,53 @@ class TagAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(LargeTableAdmin):
     list_display = ('title', 'category', 'author', 'status', 'is_featured', 'published_at', 'views')
-    list_filter = ('status', 'category', 'is_featured', 'tags')
+    list_select_related = ('category', 'author')
+    # A date filter instead of date_hierarchy, whose year/month links are aggregate scans
+    list_filter = ('status', 'category', 'is_featured', ('published_at', admin.DateFieldListFilter), TagFilter)
     search_fields = ('title', 'content')
     prepopulated_fields = {'slug': ('title',)}
-    date_hierarchy = 'published_at'
+    # Backed by the (-published_at, -id) index on Article
+    ordering = ('-published_at', '-id')
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_changelist(request):
+            queryset = queryset.defer('content', 'body_html', 'excerpt', 'summary')
+        return queryset
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('name', 'article', 'is_approved', 'created_at')
+    list_select_related = ('article',)
     list_filter = ('is_approved', 'created_at')
+    ordering = ('-id',)
+    raw_id_fields = ('article',)
     actions = ['approve_comments']
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_changelist(request):
+            # Only the article title is shown
+            queryset = queryset.defer('body', 'article__content', 'article__body_html', 'article__excerpt', 'article__summary')
+        return queryset
+
     def approve_comments(self, request, queryset):
         queryset.update(is_approved=True)
     approve_comments.short_description = "Approve selected comments"
+
+@admin.register(ActivityLog)
+class ActivityLogAdmin(LargeTableAdmin):
+    list_display = ('timestamp', 'user', 'action', 'ip_address')
+    list_select_related = ('user',)
+    list_filter = (('timestamp', admin.DateFieldListFilter),)
+    # Ids grow with timestamp, so the primary key gives the same order for free
+    ordering = ('-id',)
+    raw_id_fields = ('user',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
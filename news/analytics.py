@@ -0,0 +1,274 @@
+"""
+Per-article view counts over time.
+
+article_detail calls record() for every view. Views are counted in memory per
+(article, UTC hour) and written as ViewSeries rows by a background thread
+every ANALYTICS_FLUSH_SECONDS, at exit, and before dashboard pages read them:
+one row per article per day holding 24 hourly buckets packed into a 96-byte
+blob. `manage.py rollup_views` later folds hourly rows older than
+ANALYTICS_HOURLY_DAYS into one row per article per month of 31 daily
+buckets, so storage grows by months, not by views.
+
+Counts not yet flushed are lost if the process is killed, and each process
+flushes its own counts, so the dashboard can lag other processes by up to one
+interval. Series outlive their article: archiving keeps the id (as
+ArchivedArticle.original_id), and restore() and merge_duplicates move the
+rows to the article that replaces it.
+"""
+import atexit
+import logging
+import struct
+import threading
+import time
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+from .models import Article, Category, ViewSeries
+
+logger = logging.getLogger(__name__)
+
+HOURLY, DAILY = ViewSeries.HOURLY, ViewSeries.DAILY
+SLOTS = {HOURLY: 24, DAILY: 31}
+FLUSH_INTERVAL = getattr(settings, 'ANALYTICS_FLUSH_SECONDS', 10)
+HOURLY_DAYS = getattr(settings, 'ANALYTICS_HOURLY_DAYS', 30)
+
+_pending = Counter()   # (article_id, UTC day, hour) -> views
+_lock = threading.Lock()
+_state = {'flusher': None}
+
+
+def pack(values):
+    return struct.pack(f'<{len(values)}I', *values)
+
+
+def unpack(blob, slots):
+    blob = bytes(blob or b'')
+    values = list(struct.unpack(f'<{len(blob) // 4}I', blob))
+    return values + [0] * (slots - len(values))
+
+
+# --- Recording ---
+
+def record(article_id, when=None):
+    when = (when or timezone.now()).astimezone(dt_timezone.utc)
+    with _lock:
+        _pending[article_id, when.date(), when.hour] += 1
+        if _state['flusher'] is None and FLUSH_INTERVAL:
+            _state['flusher'] = threading.Thread(target=_flush_periodically, name='news-analytics', daemon=True)
+            _state['flusher'].start()
+
+
+def flush():
+    """Write the views counted in memory. Returns how many were written."""
+    with _lock:
+        pending = _pending.copy()
+        _pending.clear()
+    if not pending:
+        return 0
+    try:
+        # Articles deleted since the views were counted are dropped
+        live = set(Article.objects.filter(id__in={key[0] for key in pending}).values_list('id', flat=True))
+        increments = {}
+        for (article_id, day, hour), n in pending.items():
+            if article_id in live:
+                increments.setdefault((article_id, day), Counter())[hour] += n
+        _add(HOURLY, increments)
+    except DatabaseError:
+        # e.g. another process created the same row first; retried next flush
+        logger.warning('Could not write view counts, keeping them for the next flush', exc_info=True)
+        with _lock:
+            _pending.update(pending)
+        return 0
+    return sum(pending.values())
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.warning('Could not write view counts', exc_info=True)
+        finally:
+            close_old_connections()
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.warning('Dropped unwritten view counts at exit', exc_info=True)
+
+atexit.register(_flush_at_exit)
+
+
+def _add(resolution, increments):
+    """Add {(article_id, start): {slot: views}} to the stored buckets."""
+    ids = {article_id for article_id, _ in increments}
+    starts = {start for _, start in increments}
+    with transaction.atomic():
+        rows = ViewSeries.objects.select_for_update().filter(resolution=resolution, article_id__in=ids, start__in=starts)
+        existing = {(row.article_id, row.start): row for row in rows}
+        created, updated = [], []
+        for key, slots in increments.items():
+            row = existing.get(key)
+            if row is None:
+                row = ViewSeries(article_id=key[0], resolution=resolution, start=key[1])
+                created.append(row)
+            else:
+                updated.append(row)
+            values = unpack(row.buckets, SLOTS[resolution])
+            for slot, n in slots.items():
+                values[slot] += n
+            row.buckets = pack(values)
+            row.total = sum(values)
+        ViewSeries.objects.bulk_create(created)
+        ViewSeries.objects.bulk_update(updated, ['buckets', 'total'], batch_size=500)
+
+
+def rollup(before=None, batch_size=1000):
+    """Fold hourly rows for days before `before` into daily rows. Returns rows folded."""
+    before = before or timezone.now().date() - timedelta(days=HOURLY_DAYS)
+    done = 0
+    while True:
+        batch = list(ViewSeries.objects.filter(resolution=HOURLY, start__lt=before)
+                     .values_list('id', 'article_id', 'start', 'total')[:batch_size])
+        if not batch:
+            return done
+        increments = {}
+        for _, article_id, day, total in batch:
+            increments.setdefault((article_id, day.replace(day=1)), Counter())[day.day - 1] += total
+        with transaction.atomic():
+            _add(DAILY, increments)
+            ViewSeries.objects.filter(id__in=[row[0] for row in batch]).delete()
+        done += len(batch)
+
+
+def move(from_id, to_id):
+    """Add one article's view history to another's, e.g. when merging duplicates."""
+    rows = ViewSeries.objects.filter(article_id=from_id)
+    increments = {HOURLY: {}, DAILY: {}}
+    for resolution, start, blob in rows.values_list('resolution', 'start', 'buckets'):
+        values = unpack(blob, SLOTS[resolution])
+        increments[resolution][to_id, start] = Counter({slot: n for slot, n in enumerate(values) if n})
+    with transaction.atomic():
+        for resolution, series in increments.items():
+            if series:
+                _add(resolution, series)
+        rows.delete()
+
+
+# --- Range queries ---
+
+def _rows(resolution, first, last, article=None, category=None):
+    rows = ViewSeries.objects.filter(resolution=resolution, start__gte=first, start__lte=last)
+    if article is not None:
+        rows = rows.filter(article=article)
+    if category is not None:
+        rows = rows.filter(article__category=category)
+    return rows
+
+
+def hourly(start, end, article=None, category=None):
+    """[(UTC hour, views)] for each hour from start up to end.
+
+    Hours already rolled up into daily rows read as 0; use daily() for those.
+    """
+    start = start.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    end = end.astimezone(dt_timezone.utc)
+    totals = Counter()
+    for day, blob in _rows(HOURLY, start.date(), end.date(), article, category).values_list('start', 'buckets'):
+        for hour, n in enumerate(unpack(blob, 24)):
+            if n:
+                totals[datetime.combine(day, dt_time(hour), tzinfo=dt_timezone.utc)] += n
+    series = []
+    while start < end:
+        series.append((start, totals[start]))
+        start += timedelta(hours=1)
+    return series
+
+
+def daily(first, last, article=None, category=None):
+    """[(day, views)] for each UTC day from first to last (inclusive)."""
+    totals = Counter()
+    for day, total in _rows(HOURLY, first, last, article, category).values_list('start', 'total'):
+        totals[day] += total
+    for month, blob in _rows(DAILY, first.replace(day=1), last, article, category).values_list('start', 'buckets'):
+        for i, n in enumerate(unpack(blob, 31)):
+            if n:
+                totals[month + timedelta(days=i)] += n
+    return [(first + timedelta(days=i), totals[first + timedelta(days=i)]) for i in range((last - first).days + 1)]
+
+
+def per_article_daily(first, last):
+    """{article_id: [views per day]} for every article with views from first to last.
+
+    Reads hourly rows only, so keep the range within ANALYTICS_HOURLY_DAYS.
+    """
+    days = (last - first).days + 1
+    series = {}
+    for article_id, day, total in _rows(HOURLY, first, last).values_list('article_id', 'start', 'total'):
+        series.setdefault(article_id, [0] * days)[(day - first).days] = total
+    return series
+
+
+def category_growth(now=None, limit=10):
+    """Views per category today so far vs. the same hours yesterday, most viewed first."""
+    now = (now or timezone.now()).astimezone(dt_timezone.utc)
+    today, yesterday = now.date(), now.date() - timedelta(days=1)
+    views = {today: Counter(), yesterday: Counter()}
+    rows = _rows(HOURLY, yesterday, today).values_list('start', 'article__category_id', 'buckets')
+    for day, category_id, blob in rows:
+        views[day][category_id] += sum(unpack(blob, 24)[:now.hour + 1])
+    names = dict(Category.objects.filter(id__in=set(views[today]) | set(views[yesterday])).values_list('id', 'name'))
+    growth = [
+        {
+            'category': names.get(category_id, '?'),
+            'today': views[today][category_id],
+            'yesterday': views[yesterday][category_id],
+            'change': (
+                round(100 * (views[today][category_id] - views[yesterday][category_id]) / views[yesterday][category_id])
+                if views[yesterday][category_id] else None
+            ),
+        }
+        for category_id in names
+    ]
+    return sorted(growth, key=lambda g: g['today'], reverse=True)[:limit]
+
+
+def top_articles(day=None, limit=10):
+    day = day or timezone.now().astimezone(dt_timezone.utc).date()
+    rows = ViewSeries.objects.filter(resolution=HOURLY, start=day).order_by('-total')
+    return list(rows.select_related('article').only('total', 'article', 'article__title', 'article__slug')[:limit])
+
+
+# --- Charts (inline SVG in the dashboard templates) ---
+
+def bars(series, width=600, height=120, gap=1):
+    """[{x, y, width, height, label, value}] for an SVG bar chart of [(label, value)]."""
+    if not series:
+        return []
+    peak = max(value for _, value in series) or 1
+    step = width / len(series)
+    return [
+        {
+            'x': round(i * step, 1),
+            'y': round(height - value * height / peak, 1),
+            'width': round(max(step - gap, 1), 1),
+            'height': round(value * height / peak, 1),
+            'label': label,
+            'value': value,
+        }
+        for i, (label, value) in enumerate(series)
+    ]
+
+
+def sparkline(values, width=100, height=20):
+    """SVG polyline points for a list of numbers."""
+    if len(values) < 2:
+        return ''
+    peak = max(values) or 1
+    step = width / (len(values) - 1)
+    return ' '.join(f'{i * step:.1f},{height - v * height / peak:.1f}' for i, v in enumerate(values))
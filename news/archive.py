@@ -0,0 +1,162 @@
+"""
+Hot/cold tiering for articles.
+
+Articles older than ARCHIVE_AFTER_DAYS, and trashed ones after
+ARCHIVE_TRASH_AFTER_DAYS, are copied into ArchivedArticle (optionally a
+separate database, see news/routers.py) and deleted from news_article, so
+the hot table and its indexes only hold what readers actually visit.
+article_detail falls back to the archive, so old URLs keep working, and the
+date archive keeps counting and listing archived articles. View history
+(ViewSeries) stays keyed by the original id and follows the article back on
+restore.
+
+Each batch is one short transaction when the archive shares the default
+database. With a separate archive database the batch is copied first and
+deleted second; articles edited in between stay hot and are copied again on
+the next run. Cold rows for an id are replaced, never duplicated.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Article, ArchivedArticle, Category, Comment, Tag, ViewSeries
+from .routers import archive_db
+from . import date_archive
+
+
+def candidates(days=None, trash_days=None):
+    """Hot articles due for the archive."""
+    now = timezone.now()
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    trash_days = settings.ARCHIVE_TRASH_AFTER_DAYS if trash_days is None else trash_days
+    return Article.objects.filter(
+        Q(published_at__lt=now - timedelta(days=days))
+        | Q(is_deleted=True, updated_at__lt=now - timedelta(days=trash_days))
+    )
+
+
+def snapshot(articles):
+    """ArchivedArticle rows for a batch of articles, with tags and comments copied in."""
+    ids = [a.id for a in articles]
+    tags, comments = {}, {}
+    through = Article.tags.through.objects.filter(article_id__in=ids)
+    for article_id, name, slug in through.values_list('article_id', 'tag__name', 'tag__slug'):
+        tags.setdefault(article_id, []).append({'name': name, 'slug': slug})
+    for c in Comment.objects.filter(article_id__in=ids).values('article_id', 'name', 'email', 'body', 'is_approved', 'created_at'):
+        comments.setdefault(c.pop('article_id'), []).append(dict(c, created_at=c['created_at'].isoformat()))
+
+    return [
+        ArchivedArticle(
+            original_id=a.id,
+            title=a.title,
+            slug=a.slug,
+            category_name=a.category.name,
+            category_slug=a.category.slug,
+            author_name=a.author.username if a.author else '',
+            tags=tags.get(a.id, []),
+            comments=comments.get(a.id, []),
+            image=a.image.name,
+            excerpt=a.excerpt,
+            content=a.content,
+            body_html=a.body_html,
+            word_count=a.word_count,
+            reading_time=a.reading_time,
+            summary=a.summary,
+            first_image=a.first_image,
+            status=a.status,
+            is_featured=a.is_featured,
+            views=a.views,
+            is_deleted=a.is_deleted,
+            created_at=a.created_at,
+            updated_at=a.updated_at,
+            published_at=a.published_at,
+        )
+        for a in articles
+    ]
+
+
+def archive_batch(ids):
+    """Move these articles to the archive. Returns how many were moved."""
+    if archive_db() == 'default':
+        # Copy and delete in one transaction, with the rows locked throughout
+        with transaction.atomic():
+            articles = _lock(ids)
+            _copy(snapshot(articles))
+            Article.objects.filter(id__in=[a.id for a in articles]).delete()
+            # The delete took them out of the date archive; they are listed from the archive now
+            date_archive.add(articles)
+        return len(articles)
+
+    # The archive database can't share the transaction: copy first, then
+    # delete only the articles that did not change in between
+    articles = list(Article.objects.filter(id__in=ids).select_related('category', 'author'))
+    stamps = {a.id: a.updated_at for a in articles}
+    copied = {row.original_id: row for row in snapshot(articles)}
+    _copy(copied.values())
+    with transaction.atomic():
+        unchanged = [a for a in _lock(stamps) if a.updated_at == stamps[a.id]]
+        # Comments, tags and view counts don't touch updated_at: copy them again
+        for row in snapshot(unchanged):
+            old = copied[row.original_id]
+            if (row.comments, row.tags, row.views) != (old.comments, old.tags, old.views):
+                ArchivedArticle.objects.filter(original_id=row.original_id).update(
+                    comments=row.comments, tags=row.tags, views=row.views,
+                )
+        Article.objects.filter(id__in=[a.id for a in unchanged]).delete()
+        date_archive.add(unchanged)
+    # Edited or deleted meanwhile: drop the copy; still-due articles go next run
+    ArchivedArticle.objects.filter(original_id__in=stamps.keys() - {a.id for a in unchanged}).delete()
+    return len(unchanged)
+
+
+def _lock(ids):
+    return list(Article.objects.select_for_update(of=('self',)).filter(id__in=ids).select_related('category', 'author'))
+
+
+def _copy(rows):
+    with transaction.atomic(using=archive_db()):
+        ArchivedArticle.objects.filter(original_id__in=[row.original_id for row in rows]).delete()
+        ArchivedArticle.objects.bulk_create(rows)
+
+
+def find_archived(slug):
+    return ArchivedArticle.objects.filter(slug=slug, is_deleted=False).order_by('-published_at').first()
+
+
+def restore(archived):
+    """Move an archived article back into the hot table. Returns the Article."""
+    with transaction.atomic():
+        category, _ = Category.objects.get_or_create(slug=archived.category_slug, defaults={'name': archived.category_name})
+        article = Article(
+            title=archived.title,
+            slug=archived.slug,
+            category=category,
+            author=User.objects.filter(username=archived.author_name).first() if archived.author_name else None,
+            image=archived.image.name,
+            excerpt=archived.excerpt,
+            content=archived.content,
+            status=archived.status,
+            is_featured=archived.is_featured,
+            views=archived.views,
+            is_deleted=archived.is_deleted,
+            published_at=archived.published_at,
+        )
+        article.save()
+        # auto_now / auto_now_add overwrote the dates
+        Article.objects.filter(pk=article.pk).update(created_at=archived.created_at, updated_at=archived.updated_at)
+        # The archived copy is still counted (news/date_archive.py); drop what the save added
+        date_archive.apply(date_archive.changes(date_archive.state(article), None))
+        article.tags.set([
+            Tag.objects.get_or_create(slug=t['slug'], defaults={'name': t['name']})[0]
+            for t in archived.tags
+        ])
+        comments = Comment.objects.bulk_create([Comment(article=article, **c) for c in archived.comments])
+        for comment, c in zip(comments, archived.comments):
+            comment.created_at = parse_datetime(c['created_at'])
+        Comment.objects.bulk_update(comments, ['created_at'])
+        ViewSeries.objects.filter(article_id=archived.original_id).update(article_id=article.id)
+    archived.delete()
+    return article
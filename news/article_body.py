@@ -0,0 +1,57 @@
+"""
+Fields derived from Article.content, computed once when the article is saved
+(or bulk-created) instead of on every page view.
+
+Content is plain text with blank lines between paragraphs, so the stored
+HTML is exactly what `{{ content|linebreaks }}` used to produce: escaped and
+wrapped in <p>/<br>.
+"""
+import re
+from django.template.defaultfilters import linebreaks_filter
+from django.utils.text import Truncator
+
+WORDS_PER_MINUTE = 200
+SUMMARY_LENGTH = 300
+
+DERIVED_FIELDS = ('body_html', 'word_count', 'reading_time', 'summary', 'first_image')
+
+IMAGE_URL_RE = re.compile(r'https?://\S+?\.(?:jpe?g|png|gif|webp)(?:\?\S*)?', re.IGNORECASE)
+
+
+def render_html(content):
+    return linebreaks_filter(content, autoescape=True)
+
+
+def count_words(content):
+    return len(content.split())
+
+
+def reading_time(words):
+    """Whole minutes, at least 1 for any non-empty article."""
+    if not words:
+        return 0
+    return max(1, round(words / WORDS_PER_MINUTE))
+
+
+def make_summary(content):
+    text = ' '.join(content.split())
+    return Truncator(text).chars(SUMMARY_LENGTH)
+
+
+def find_first_image(content, image=''):
+    """The uploaded image if there is one, else the first image URL in the text."""
+    if image:
+        return str(image)
+    match = IMAGE_URL_RE.search(content)
+    return match.group(0)[:500] if match else ''
+
+
+def apply(article):
+    """Fill in the derived fields on an (unsaved) Article instance."""
+    content = article.content or ''
+    article.body_html = render_html(content)
+    article.word_count = count_words(content)
+    article.reading_time = reading_time(article.word_count)
+    article.summary = make_summary(content)
+    article.first_image = find_first_image(content, article.image.name if article.image else '')
+    return article
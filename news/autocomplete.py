@@ -0,0 +1,82 @@
+"""
+Name lookups for the dashboard's tag and category pickers.
+
+Each process keeps a sorted (casefolded name, id, name) list per model and
+answers prefix queries with bisect, so a keystroke costs no query however big
+the tag table gets. The hot set (most used names, shown before anything is
+typed and ranked first among matches) lives in the shared Django cache.
+Signals in news/signals.py call invalidate() when tags or categories change;
+news/cachebus.py carries that to the other worker processes.
+"""
+import time
+from bisect import bisect_left
+from django.core.cache import cache
+from django.db.models import Count
+from . import cachebus
+from .models import Category, Tag
+
+LIMIT = 20
+HOT_SIZE = 50
+HOT_TIMEOUT = 60 * 60
+# Safety net only: other processes normally drop their index within cachebus.POLL_INTERVAL
+LOCAL_TTL = 30 * 60
+
+MODELS = {'tags': Tag, 'categories': Category}
+
+_indexes = {}   # kind -> (expires, sorted entries)
+
+
+def _index(kind):
+    now = time.monotonic()
+    cached = _indexes.get(kind)
+    if cached and cached[0] > now:
+        return cached[1]
+    rows = MODELS[kind].objects.values_list('id', 'name').iterator(chunk_size=5000)
+    entries = sorted((name.casefold(), pk, name) for pk, name in rows)
+    _indexes[kind] = (now + LOCAL_TTL, entries)
+    return entries
+
+
+def hot_set(kind):
+    """[(id, name)] of the most used tags / categories."""
+    key = f'news:autocomplete:hot:{kind}'
+    hot = cache.get(key)
+    if hot is None:
+        ranked = MODELS[kind].objects.annotate(uses=Count('articles')).order_by('-uses', 'name')
+        hot = list(ranked.values_list('id', 'name')[:HOT_SIZE])
+        cache.set(key, hot, HOT_TIMEOUT)
+    return hot
+
+
+def search(kind, term, page=1):
+    """Returns ([(id, name)], more) for names starting with term (case-insensitive)."""
+    term = term.strip().casefold()
+    if not term:
+        return hot_set(kind)[:LIMIT], False
+
+    entries = _index(kind)
+    matches = []
+    for i in range(bisect_left(entries, (term,)), len(entries)):
+        folded, pk, name = entries[i]
+        if not folded.startswith(term):
+            break
+        matches.append((pk, name))
+
+    # Popular names first, then alphabetical
+    hot_ids = {pk for pk, _ in hot_set(kind)}
+    matches.sort(key=lambda m: m[0] not in hot_ids)
+    start = (page - 1) * LIMIT
+    return matches[start:start + LIMIT], len(matches) > start + LIMIT
+
+
+def _evict(kind):
+    _indexes.pop(kind, None)
+    cache.delete(f'news:autocomplete:hot:{kind}')
+
+for _kind in MODELS:
+    cachebus.register(f'autocomplete:{_kind}', lambda kind=_kind: _evict(kind))
+
+
+def invalidate(kind=None):
+    for k in [kind] if kind else list(MODELS):
+        cachebus.publish(f'autocomplete:{k}')
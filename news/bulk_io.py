@@ -0,0 +1,67 @@
+"""
+Streaming JSONL / CSV helpers shared by the import_articles and
+export_articles management commands.
+"""
+import csv
+import hashlib
+import json
+from django.utils.text import slugify
+
+FIELDS = [
+    'title', 'slug', 'category', 'tags', 'author', 'image', 'excerpt', 'content',
+    'status', 'is_featured', 'views', 'is_deleted', 'created_at', 'published_at',
+]
+# CSV has no lists, so tags are joined into one column
+TAG_SEPARATOR = '|'
+
+# Article bodies easily exceed the csv module's default 128 KB field limit
+csv.field_size_limit(2 ** 31 - 1)
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(fp, fmt):
+    """Yield article dicts one at a time from an open file."""
+    if fmt == 'csv':
+        for row in csv.DictReader(fp):
+            row['tags'] = [t for t in (row.get('tags') or '').split(TAG_SEPARATOR) if t]
+            yield row
+    else:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RowWriter:
+    def __init__(self, fp, fmt):
+        self.fmt = fmt
+        self.fp = fp
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(fp, fieldnames=FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.fmt == 'csv':
+            self.csv.writerow(dict(row, tags=TAG_SEPARATOR.join(row['tags'])))
+        else:
+            self.fp.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+
+def to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def make_slug(name, taken):
+    """slugify() the name, falling back to a hash for names that slugify to '' (Nepali) or clash."""
+    slug = slugify(name)[:40]
+    if not slug or slug in taken:
+        digest = hashlib.blake2b(name.encode(), digest_size=5).hexdigest()
+        slug = f"{slug or 'n'}-{digest}"
+    taken.add(slug)
+    return slug
@@ -0,0 +1,77 @@
+"""
+Cross-process cache invalidation with no broker: a version table in the
+main database.
+
+publish(topic) bumps the topic's CacheVersion row and, once the transaction
+commits, runs this process's eviction handlers. Every process calls poll()
+at the start of each request (CacheBusMiddleware); it reads the version
+table at most once per POLL_INTERVAL and runs the handlers of topics whose
+version moved. So other workers serve stale entries for at most
+POLL_INTERVAL seconds after a change is committed.
+
+Handlers must evict every layer they own, including the Django cache: with
+the default LocMemCache that is per process too.
+"""
+import threading
+import time
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from .models_cachebus import CacheVersion
+
+POLL_INTERVAL = 2
+
+_handlers = {}      # topic -> [callables]
+_seen = {}          # topic -> last version seen by this process
+_state = {'next_poll': 0, 'primed': False}
+_lock = threading.Lock()
+
+
+def register(topic, handler):
+    """Call handler() in every process when topic is published."""
+    _handlers.setdefault(topic, []).append(handler)
+
+
+def evict(topic):
+    for handler in _handlers.get(topic, ()):
+        handler()
+
+
+def publish(topic):
+    if not CacheVersion.objects.filter(topic=topic).update(version=F('version') + 1):
+        CacheVersion.objects.bulk_create([CacheVersion(topic=topic)], ignore_conflicts=True)
+        CacheVersion.objects.filter(topic=topic).update(version=F('version') + 1)
+    # Not before commit: a rebuild inside the transaction would cache uncommitted data
+    transaction.on_commit(lambda: evict(topic))
+
+
+def version(topic):
+    return CacheVersion.objects.filter(topic=topic).values_list('version', flat=True).first() or 0
+
+
+def due():
+    return time.monotonic() >= _state['next_poll']
+
+
+def poll(force=False):
+    """Evict whatever other processes have published since the last poll."""
+    now = time.monotonic()
+    if not force and now < _state['next_poll']:
+        return
+    # One thread polls; the others carry on with what they have
+    if not _lock.acquire(blocking=False):
+        return
+    try:
+        _state['next_poll'] = now + POLL_INTERVAL
+        try:
+            versions = dict(CacheVersion.objects.values_list('topic', 'version'))
+        except DatabaseError:
+            return  # e.g. not migrated yet
+        if _state['primed']:
+            for topic, version in versions.items():
+                if _seen.get(topic) != version:
+                    evict(topic)
+        _seen.clear()
+        _seen.update(versions)
+        _state['primed'] = True
+    finally:
+        _lock.release()
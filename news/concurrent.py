@@ -0,0 +1,94 @@
+"""
+Helpers for the async public views (home, article_detail).
+
+fetch() runs independent ORM blocks of one request at the same time.
+Django's async ORM can't do that: it sends every query of a request to the
+same thread (sync_to_async(thread_sensitive=True)). Here each block goes to
+a small shared thread pool instead, and each pool thread has its own
+database connection, so the round trips to PostgreSQL/MySQL overlap.
+
+respond() renders the page, or under ASGI with STREAM_PAGE_SHELL streams it:
+the page shell (everything in base.html above the content block) goes out
+before the blocks are fetched, so the browser can start on CSS and fonts.
+The template is rendered in two parts (base.html's stream_part), each once.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template.loader import render_to_string
+
+POOL_SIZE = getattr(settings, 'ASYNC_VIEW_THREADS', 4)
+
+_pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='news-fetch') if POOL_SIZE else None
+
+
+def _run(fn):
+    # Each pool thread keeps its connection open between requests (at most
+    # POOL_SIZE extra connections per process), dropping it after an error.
+    if connection.errors_occurred and not connection.is_usable():
+        connection.close()
+    return fn()
+
+
+def concurrent():
+    # Other connections can't see an open request transaction. SQLite runs
+    # in-process with no network round trips to overlap, so threads only add
+    # overhead there (measured with benchmark_site).
+    return (
+        _pool is not None
+        and connection.vendor != 'sqlite'
+        and not connection.settings_dict.get('ATOMIC_REQUESTS')
+    )
+
+
+async def fetch(**blocks):
+    """await fetch(name=callable, ...) -> {name: result}. Callables are plain sync ORM code."""
+    if not concurrent():
+        return {name: await sync_to_async(fn)() for name, fn in blocks.items()}
+    loop = asyncio.get_running_loop()
+    # A context copy per block keeps the request's profiling stats visible in the pool thread
+    results = await asyncio.gather(*(
+        loop.run_in_executor(_pool, contextvars.copy_context().run, _run, fn)
+        for fn in blocks.values()
+    ))
+    return dict(zip(blocks, results))
+
+
+def can_stream(request):
+    from django.core.handlers.asgi import ASGIRequest
+    return (
+        getattr(settings, 'STREAM_PAGE_SHELL', False)
+        and isinstance(request, ASGIRequest)
+        and request.method == 'GET'
+        and not getattr(request, 'prerender', False)
+    )
+
+
+async def respond(request, template_name, context, csrf=False):
+    """Render template_name with the dict `context` awaits to. `context` is an awaitable.
+
+    Pass csrf=True for pages with a POST form: a streamed body renders after
+    the response headers are sent, too late for {% csrf_token %} to set the cookie.
+    """
+    if not can_stream(request):
+        return await sync_to_async(render)(request, template_name, await context)
+    if csrf:
+        get_token(request)
+
+    async def chunks():
+        # Start the queries first; the shell renders while they run
+        task = asyncio.ensure_future(context)
+        try:
+            yield await sync_to_async(render_to_string)(template_name, {'stream_part': 'shell'}, request=request)
+            data = dict(await task, stream_part='body')
+            yield await sync_to_async(render_to_string)(template_name, data, request=request)
+        finally:
+            task.cancel()
+
+    return StreamingHttpResponse(chunks(), content_type='text/html; charset=utf-8')
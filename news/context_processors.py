@@ -1,12 +1,25 @@
+from . import cachebus
 from .models import SiteConfiguration
+from .navigation import get_navigation
+
+# Per-process copy; dropped in every process when the configuration is saved
+_site_config = {}
+cachebus.register('site_config', _site_config.clear)
 
 def site_configuration(request):
+    if 'config' in _site_config:
+        return {'site_config': _site_config['config']}
     try:
         config = SiteConfiguration.objects.first()
         if not config:
             # Create default if missing
             config = SiteConfiguration.objects.create()
+        _site_config['config'] = config
     except:
         config = None
         
     return {'site_config': config}
+
+def navigation(request):
+    # Cached category menu for base.html, so views don't query it themselves
+    return {'nav_categories': get_navigation()}
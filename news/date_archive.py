@@ -0,0 +1,187 @@
+"""
+Year / month / day archive of published articles.
+
+PeriodCount holds how many published articles each category has per year,
+month and day. Signals in news/signals.py keep it current as articles are
+published, unpublished, trashed, moved or deleted; commands that bulk_create
+articles call add() themselves, and `manage.py rebuild_period_counts`
+recomputes everything from scratch. The archive pages read these rows with
+an index lookup instead of counting articles, and list articles with a
+published_at range scan on article_published_idx.
+
+Periods are in the current time zone (TIME_ZONE). Articles moved to the cold
+archive (news/archive.py) stay counted, and the listings read ArchivedArticle
+as well as news_article, so old years and months don't empty out as articles
+are archived. Archived articles of a category deleted since drop out.
+"""
+import calendar
+from collections import Counter
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Article, ArchivedArticle, Category, PeriodCount
+
+LEVELS = {4: PeriodCount.YEAR, 7: PeriodCount.MONTH, 10: PeriodCount.DAY}
+
+# Fields whose change can move an article in or out of a period
+TRACKED_FIELDS = {'category', 'category_id', 'status', 'is_deleted', 'published_at'}
+
+
+def periods(day):
+    """The year, month and day keys a date counts towards."""
+    return [f'{day.year:04d}', f'{day.year:04d}-{day.month:02d}', day.isoformat()]
+
+
+def local_date(value):
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def state(article):
+    """(category_id, local date) if the article counts as published, else None."""
+    if article is None or article.status != 'published' or article.is_deleted or article.published_at is None:
+        return None
+    return article.category_id, local_date(article.published_at)
+
+
+def changes(before, after):
+    """Counter of {(category_id, period): delta} for an article going from one state() to another."""
+    deltas = Counter()
+    if before == after:
+        return deltas
+    if before:
+        for period in periods(before[1]):
+            deltas[before[0], period] -= 1
+    if after:
+        for period in periods(after[1]):
+            deltas[after[0], period] += 1
+    return deltas
+
+
+def apply(deltas):
+    """Add a Counter from changes() to the stored counts."""
+    # One UPDATE per (category, delta) covers the year, month and day rows together
+    groups = {}
+    for (category_id, period), delta in deltas.items():
+        if delta:
+            groups.setdefault((category_id, delta), []).append(period)
+    if not groups:
+        return
+    with transaction.atomic():
+        for (category_id, delta), keys in groups.items():
+            if delta > 0:
+                PeriodCount.objects.bulk_create([
+                    PeriodCount(category_id=category_id, level=LEVELS[len(p)], period=p) for p in keys
+                ], ignore_conflicts=True)
+            rows = PeriodCount.objects.filter(category_id=category_id, period__in=keys)
+            rows.update(count=F('count') + delta)
+            if delta < 0:
+                rows.filter(count__lte=0).delete()
+
+
+def add(articles):
+    """Count articles that were saved without signals (bulk_create / bulk_update)."""
+    deltas = Counter()
+    for article in articles:
+        deltas.update(changes(None, state(article)))
+    apply(deltas)
+
+
+def totals(articles):
+    """Counter of {(category_id, period): published articles} for an Article queryset."""
+    found = Counter()
+    days = (
+        articles.filter(status='published', is_deleted=False)
+        .annotate(day=TruncDate('published_at'))
+        .values_list('category_id', 'day')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for category_id, day, n in days.iterator():
+        for period in periods(day):
+            found[category_id, period] += n
+    return found
+
+
+def archived_totals():
+    """Like totals(), for the published articles in the cold archive."""
+    categories = dict(Category.objects.values_list('slug', 'id'))
+    found = Counter()
+    days = (
+        ArchivedArticle.objects.filter(status='published', is_deleted=False)
+        .annotate(day=TruncDate('published_at'))
+        .values_list('category_slug', 'day')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for slug, day, n in days.iterator():
+        if slug in categories:
+            for period in periods(day):
+                found[categories[slug], period] += n
+    return found
+
+
+def rebuild():
+    """Recompute every count from news_article and the archive. Returns the number of rows written."""
+    found = totals(Article.objects.all()) + archived_totals()
+    with transaction.atomic():
+        PeriodCount.objects.all().delete()
+        PeriodCount.objects.bulk_create([
+            PeriodCount(category_id=category_id, level=LEVELS[len(period)], period=period, count=n)
+            for (category_id, period), n in found.items()
+        ], batch_size=1000)
+    return len(found)
+
+
+# --- Reading ---
+
+def counts(level, first, last, category=None):
+    """{period: count} for periods of this level between first and last (inclusive)."""
+    rows = PeriodCount.objects.filter(level=level, period__gte=first, period__lte=last, count__gt=0)
+    if category is not None:
+        rows = rows.filter(category=category)
+    totals = Counter()
+    # At most one row per category and period; summed here, not in SQL
+    for period, n in rows.values_list('period', 'count'):
+        totals[period] += n
+    return totals
+
+
+def years(category=None):
+    """[(year, count)], newest first."""
+    totals = counts(PeriodCount.YEAR, '0000', '9999', category)
+    return sorted(((int(p), n) for p, n in totals.items()), reverse=True)
+
+
+def months(year, category=None):
+    """[(month, count)] for the months of a year that have articles."""
+    totals = counts(PeriodCount.MONTH, f'{year:04d}-01', f'{year:04d}-12', category)
+    return sorted((int(p[5:]), n) for p, n in totals.items())
+
+
+def days(year, month, category=None):
+    """[(day, count)] for the days of a month that have articles."""
+    totals = counts(PeriodCount.DAY, f'{year:04d}-{month:02d}-01', f'{year:04d}-{month:02d}-31', category)
+    return sorted((int(p[8:]), n) for p, n in totals.items())
+
+
+def total(period, category=None):
+    return counts(LEVELS[len(period)], period, period, category)[period]
+
+
+def date_range(year, month=None, day=None):
+    """Aware [start, end) datetimes covering a year, month or day. Raises ValueError for bad dates."""
+    if day:
+        start = date(year, month, day)
+        end = start + timedelta(days=1)
+    elif month:
+        start = date(year, month, 1)
+        end = start + timedelta(days=calendar.monthrange(year, month)[1])
+    else:
+        start = date(year, 1, 1)
+        end = date(year + 1, 1, 1)
+    return (
+        timezone.make_aware(datetime.combine(start, datetime.min.time())),
+        timezone.make_aware(datetime.combine(end, datetime.min.time())),
+    )
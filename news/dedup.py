@@ -0,0 +1,145 @@
+"""
+Near-duplicate detection for articles using MinHash fingerprints.
+
+Titles contribute character 4-grams (so a one word edit upstream only changes
+a few shingles, and Nepali text works without a tokenizer) and the body
+contributes word 3-grams. The signature is split into LSH bands; each band is
+stored as an indexed integer on ArticleFingerprint so lookups only touch
+articles sharing at least one band instead of scanning the archive.
+"""
+import hashlib
+import string
+import struct
+from collections import defaultdict
+from django.db.models import Q
+from .models_dedup import ArticleFingerprint
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+# Roughly (1 / BANDS) ** (1 / ROWS): pairs above ~0.6 similarity share a band
+THRESHOLD = 0.7
+MAX_BODY_WORDS = 500
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big')
+
+
+# (a, b) pairs for the hash family h -> (a * h + b) mod p. Derived from blake2b
+# rather than random() so stored signatures stay comparable across processes.
+PERMUTATIONS = [(_hash64(f'a{i}') % (_PRIME - 1) + 1, _hash64(f'b{i}') % _PRIME) for i in range(NUM_PERM)]
+
+PUNCTUATION = string.punctuation + '।‘’“”'
+
+
+def _features(title, content):
+    features = set()
+    title = ' '.join(title.lower().split())
+    for i in range(max(len(title) - 3, 1)):
+        features.add('t:' + title[i:i + 4])
+
+    words = [w.strip(PUNCTUATION) for w in content.lower().split()[:MAX_BODY_WORDS]]
+    words = [w for w in words if w]
+    for i in range(max(len(words) - 2, 1) if words else 0):
+        features.add(' '.join(words[i:i + 3]))
+    return features
+
+
+def minhash(title, content=''):
+    """Return the MinHash signature (NUM_PERM 32-bit ints) of an article."""
+    hashes = [_hash64(f) for f in _features(title, content)] or [0]
+    return [
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def bands(signature):
+    return [
+        int.from_bytes(hashlib.blake2b(pack(signature[i * ROWS:(i + 1) * ROWS]), digest_size=4).digest(), 'big') >> 1
+        for i in range(BANDS)
+    ]
+
+
+def pack(signature):
+    return struct.pack(f'<{len(signature)}I', *signature)
+
+
+def unpack(blob):
+    return list(struct.unpack(f'<{NUM_PERM}I', bytes(blob)))
+
+
+def build_fingerprint(article):
+    """Return an unsaved ArticleFingerprint for the given article."""
+    signature = minhash(article.title, article.content)
+    fp = ArticleFingerprint(article=article, signature=pack(signature))
+    for i, band in enumerate(bands(signature)):
+        setattr(fp, f'band{i}', band)
+    return fp
+
+
+def index_article(article):
+    fp = build_fingerprint(article)
+    fields = ['signature'] + [f'band{i}' for i in range(BANDS)]
+    ArticleFingerprint.objects.update_or_create(
+        article=article, defaults={f: getattr(fp, f) for f in fields},
+    )
+
+
+def find_near_duplicates(title='', content='', threshold=THRESHOLD, exclude_id=None, signature=None):
+    """
+    Return [(article_id, similarity), ...] for indexed articles whose
+    estimated similarity is at least threshold, most similar first.
+    """
+    if signature is None:
+        signature = minhash(title, content)
+    q = Q()
+    for i, band in enumerate(bands(signature)):
+        q |= Q(**{f'band{i}': band})
+
+    candidates = ArticleFingerprint.objects.filter(q)
+    if exclude_id is not None:
+        candidates = candidates.exclude(article_id=exclude_id)
+
+    matches = []
+    for article_id, blob in candidates.values_list('article_id', 'signature'):
+        score = similarity(signature, unpack(blob))
+        if score >= threshold:
+            matches.append((article_id, score))
+    return sorted(matches, key=lambda m: (-m[1], m[0]))
+
+
+class MemoryIndex:
+    """Signatures kept in memory instead of ArticleFingerprint rows, for dry runs."""
+
+    def __init__(self):
+        self.signatures = {}
+        self.buckets = defaultdict(list)
+
+    def add(self, article_id, signature):
+        self.signatures[article_id] = signature
+        for key in enumerate(bands(signature)):
+            self.buckets[key].append(article_id)
+
+    def items(self):
+        """(article_id, signature) pairs in id order."""
+        return sorted(self.signatures.items())
+
+    def find_near_duplicates(self, signature, threshold=THRESHOLD):
+        """Same as find_near_duplicates(signature=...), over this index."""
+        candidates = {a for key in enumerate(bands(signature)) for a in self.buckets.get(key, ())}
+        matches = []
+        for article_id in candidates:
+            score = similarity(signature, self.signatures[article_id])
+            if score >= threshold:
+                matches.append((article_id, score))
+        return sorted(matches, key=lambda m: (-m[1], m[0]))
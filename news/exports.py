@@ -0,0 +1,430 @@
+"""
+CSV / XLSX exports of articles, comments and the activity log.
+
+The dashboard export views stream rows straight from a
+values_list().iterator(chunk_size=EXPORT_CHUNK_SIZE) query through a
+StreamingHttpResponse, so memory use doesn't grow with the number of rows
+(with PostgreSQL and SQLite; MySQL drivers buffer the whole result). XLSX is
+written with zipfile as it goes: one sheet of inline strings, starting a new
+sheet every 1,048,576 rows, Excel's limit.
+
+Responses carry an ETag built from the row count and the newest change, so
+re-downloading an unchanged export is a 304. Changes to other tables (e.g.
+renaming a category) don't change it.
+
+start_job() writes an export to EXPORT_ROOT in a background thread instead;
+`manage.py export_data` does the same from the command line.
+"""
+import csv
+import hashlib
+import io
+import logging
+import os
+import re
+import secrets
+import threading
+import zipfile
+from datetime import date, datetime, time, timedelta
+from xml.sax.saxutils import escape
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+from .bulk_io import to_bool
+from .models import Article, Comment
+from .models_activity import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+EXPORT_ROOT = getattr(settings, 'EXPORT_ROOT', os.path.join(settings.BASE_DIR, 'exports'))
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+# Bytes collected before a chunk goes out to the client / file
+FLUSH_BYTES = 64 * 1024
+
+
+def day_start(value):
+    return timezone.make_aware(datetime.combine(date.fromisoformat(value), time.min))
+
+
+def day_end(value):
+    return day_start(value) + timedelta(days=1)
+
+
+class Dataset:
+    def __init__(self, queryset, columns, default, filters, version):
+        self.queryset = queryset
+        # column name -> values_list() lookup
+        self.columns = columns
+        self.default = default
+        # filter name -> (lookup, parse function)
+        self.filters = filters
+        # Aggregates that change whenever the exported rows do (for the ETag)
+        self.version = version
+
+
+DATASETS = {
+    'articles': Dataset(
+        lambda: Article.objects.all(),
+        columns={
+            'id': 'id', 'title': 'title', 'slug': 'slug', 'category': 'category__name',
+            'author': 'author__username', 'status': 'status', 'is_featured': 'is_featured',
+            'views': 'views', 'is_deleted': 'is_deleted', 'word_count': 'word_count',
+            'excerpt': 'excerpt', 'content': 'content', 'created_at': 'created_at',
+            'updated_at': 'updated_at', 'published_at': 'published_at',
+        },
+        default=['id', 'title', 'category', 'author', 'status', 'views', 'created_at', 'published_at'],
+        filters={
+            'status': ('status', str),
+            'category': ('category__slug', str),
+            'author': ('author__username', str),
+            'deleted': ('is_deleted', to_bool),
+            'featured': ('is_featured', to_bool),
+            'q': ('title__icontains', str),
+            'since': ('created_at__gte', day_start),
+            'until': ('created_at__lt', day_end),
+        },
+        # views are bumped with update(), which leaves updated_at alone
+        version={'rows': Count('id'), 'last': Max('updated_at'), 'views': Sum('views')},
+    ),
+    'comments': Dataset(
+        lambda: Comment.objects.all(),
+        columns={
+            'id': 'id', 'article_id': 'article_id', 'article': 'article__title', 'name': 'name',
+            'email': 'email', 'body': 'body', 'is_approved': 'is_approved', 'created_at': 'created_at',
+        },
+        default=['id', 'article', 'name', 'email', 'body', 'is_approved', 'created_at'],
+        filters={
+            'article': ('article_id', int),
+            'approved': ('is_approved', to_bool),
+            'email': ('email__iexact', str),
+            'q': ('body__icontains', str),
+            'since': ('created_at__gte', day_start),
+            'until': ('created_at__lt', day_end),
+        },
+        version={'rows': Count('id'), 'last': Max('id'), 'approved': Count('id', filter=Q(is_approved=True))},
+    ),
+    'activity': Dataset(
+        lambda: ActivityLog.objects.all(),
+        columns={
+            'id': 'id', 'user_id': 'user_id', 'user': 'user__username', 'action': 'action',
+            'details': 'details', 'ip_address': 'ip_address', 'timestamp': 'timestamp',
+        },
+        default=['id', 'user', 'action', 'details', 'ip_address', 'timestamp'],
+        filters={
+            'user_id': ('user_id', int),
+            'action': ('action__icontains', str),
+            'since': ('timestamp__gte', day_start),
+            'until': ('timestamp__lt', day_end),
+        },
+        version={'rows': Count('id'), 'last': Max('id')},
+    ),
+}
+
+
+class Export:
+    """A dataset with the columns and filters picked from request-style parameters."""
+
+    def __init__(self, kind, fmt, params):
+        """params: a QueryDict. Raises ValueError for anything unknown or malformed."""
+        if kind not in DATASETS:
+            raise ValueError(f'unknown export {kind!r}; choose from {", ".join(DATASETS)}')
+        if fmt not in FORMATS:
+            raise ValueError(f'unknown format {fmt!r}; choose from {", ".join(FORMATS)}')
+        self.kind, self.fmt = kind, fmt
+        self.dataset = DATASETS[kind]
+
+        # ?columns=a,b and ?columns=a&columns=b (checkboxes) both work
+        columns = [c for value in params.getlist('columns') for c in value.split(',') if c.strip()]
+        self.columns = [c.strip() for c in columns] or list(self.dataset.default)
+        unknown = [c for c in self.columns if c not in self.dataset.columns]
+        if unknown:
+            raise ValueError(f'unknown column {unknown[0]!r}; choose from {", ".join(self.dataset.columns)}')
+
+        self.filters, self.params = {}, {}
+        for name in sorted(params):
+            value = params.getlist(name)[-1].strip()
+            if name == 'columns' or not value:
+                continue
+            self.params[name] = value
+            if name not in self.dataset.filters:
+                raise ValueError(f'unknown filter {name!r}; choose from {", ".join(self.dataset.filters)}')
+            lookup, parse = self.dataset.filters[name]
+            try:
+                self.filters[lookup] = parse(value)
+            except ValueError:
+                raise ValueError(f'bad value for {name}: {value!r}')
+
+    def queryset(self):
+        return self.dataset.queryset().filter(**self.filters)
+
+    def rows(self, chunk_size=CHUNK_SIZE):
+        lookups = [self.dataset.columns[c] for c in self.columns]
+        return self.queryset().order_by('id').values_list(*lookups).iterator(chunk_size=chunk_size)
+
+    def etag(self):
+        """A hash of the parameters and the current state of the selected rows."""
+        state = self.queryset().order_by().aggregate(**self.dataset.version)
+        key = repr((self.kind, self.fmt, self.columns, self.params, sorted(state.items())))
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def filename(self):
+        # The random part keeps two jobs started in the same second apart
+        return f'{self.kind}-{timezone.localtime():%Y%m%d-%H%M%S}-{secrets.token_hex(3)}.{self.fmt}'
+
+    def chunks(self, chunk_size=CHUNK_SIZE):
+        """Yield the file as bytes, FLUSH_BYTES or so at a time."""
+        writer = csv_chunks if self.fmt == 'csv' else xlsx_chunks
+        return writer(self.columns, self.rows(chunk_size))
+
+
+def cell(value):
+    # Dates and datetimes as ISO 8601 text, like export_articles
+    return value.isoformat() if isinstance(value, date) else value
+
+
+# --- CSV ---
+
+# Spreadsheets run cells starting with these as formulas; comments come from the public
+FORMULA_START = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    value = cell(value)
+    if isinstance(value, str) and value.startswith(FORMULA_START):
+        return "'" + value
+    return value
+
+
+def csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The BOM makes Excel read the file as UTF-8 (Nepali titles)
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([csv_cell(value) for value in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# --- XLSX ---
+
+SHEET_ROWS = 1048576
+# Excel's limit per cell
+CELL_CHARS = 32767
+# Characters XML 1.0 doesn't allow
+INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+SHEET_START = (
+    XML_HEADER + '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_END = '</sheetData></worksheet>'
+
+
+class _Sink:
+    """Write-only file for ZipFile that keeps what was written until it's taken."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts, self.size = [], 0
+        return data
+
+
+def xlsx_cell(value):
+    value = cell(value)
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = INVALID_XML.sub('', str(value))[:CELL_CHARS]
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def xlsx_row(values):
+    return '<row>' + ''.join(xlsx_cell(value) for value in values) + '</row>'
+
+
+def xlsx_chunks(columns, rows):
+    sink = _Sink()
+    # ZipFile can't seek in the sink, so it writes sizes after each entry
+    book = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    header = xlsx_row(columns).encode()
+    sheets, sheet, used = 0, None, SHEET_ROWS
+    for row in rows:
+        if used == SHEET_ROWS:
+            if sheet is not None:
+                sheet.write(SHEET_END.encode())
+                sheet.close()
+            sheets += 1
+            sheet = book.open(f'xl/worksheets/sheet{sheets}.xml', 'w', force_zip64=True)
+            sheet.write(SHEET_START.encode() + header)
+            used = 1
+        sheet.write(xlsx_row(row).encode())
+        used += 1
+        if sink.size >= FLUSH_BYTES:
+            yield sink.take()
+    if sheet is None:
+        # No rows: one sheet with the header
+        sheets = 1
+        sheet = book.open('xl/worksheets/sheet1.xml', 'w')
+        sheet.write(SHEET_START.encode() + header)
+    sheet.write(SHEET_END.encode())
+    sheet.close()
+    for name, content in workbook_parts(sheets).items():
+        book.writestr(name, content)
+    book.close()
+    yield sink.take()
+
+
+def workbook_parts(sheets):
+    numbers = range(1, sheets + 1)
+    return {
+        '[Content_Types].xml': (
+            XML_HEADER + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(
+                f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for n in numbers
+            )
+            + '</Types>'
+        ),
+        '_rels/.rels': (
+            XML_HEADER + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="xl/workbook.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'
+        ),
+        'xl/workbook.xml': (
+            XML_HEADER + '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + ''.join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in numbers)
+            + '</sheets></workbook>'
+        ),
+        'xl/_rels/workbook.xml.rels': (
+            XML_HEADER + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join(
+                f'<Relationship Id="rId{n}" Target="worksheets/sheet{n}.xml" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+                for n in numbers
+            )
+            + '</Relationships>'
+        ),
+    }
+
+
+# --- Serving ---
+
+def _take(iterator, n):
+    return [part for _, part in zip(range(n), iterator)]
+
+
+async def _async_chunks(iterator, batch=16):
+    # Under ASGI, StreamingHttpResponse reads a sync iterator into a list
+    # before sending anything; this hands it over a few chunks at a time.
+    iterator = iter(iterator)
+    while True:
+        parts = await sync_to_async(_take)(iterator, batch)
+        if not parts:
+            return
+        for part in parts:
+            yield part
+
+
+def streaming_content(request, chunks):
+    from django.core.handlers.asgi import ASGIRequest
+    return _async_chunks(chunks) if isinstance(request, ASGIRequest) else chunks
+
+
+# --- Background jobs ---
+
+_jobs = threading.BoundedSemaphore(getattr(settings, 'EXPORT_JOBS', 2))
+# Written under this suffix and renamed when complete
+PARTIAL = '.part'
+
+
+def write(export, path, chunk_size=CHUNK_SIZE):
+    """Write an export to a file. Returns the number of bytes written."""
+    partial = path + PARTIAL
+    size = 0
+    with open(partial, 'wb') as fp:
+        for chunk in export.chunks(chunk_size):
+            fp.write(chunk)
+            size += len(chunk)
+    os.replace(partial, path)
+    return size
+
+
+def _run(export, path):
+    try:
+        with _jobs:
+            write(export, path)
+    except Exception:
+        logger.exception('Export to %s failed', path)
+    finally:
+        connection.close()
+
+
+def start_job(export):
+    """Write the export to EXPORT_ROOT in a background thread. Returns the file name.
+
+    At most EXPORT_JOBS run at once; the rest wait. A job cut short by a
+    restart leaves its .part file behind.
+    """
+    os.makedirs(EXPORT_ROOT, exist_ok=True)
+    name = export.filename()
+    threading.Thread(
+        target=_run, args=(export, os.path.join(EXPORT_ROOT, name)), name='news-export', daemon=True,
+    ).start()
+    return name
+
+
+def files():
+    """[{name, size, modified, done}] for the files in EXPORT_ROOT, newest first."""
+    if not os.path.isdir(EXPORT_ROOT):
+        return []
+    found = []
+    for entry in os.scandir(EXPORT_ROOT):
+        if entry.is_file():
+            stat = entry.stat()
+            found.append({
+                'name': entry.name,
+                'size': stat.st_size,
+                'modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.get_current_timezone()),
+                'done': not entry.name.endswith(PARTIAL),
+            })
+    return sorted(found, key=lambda f: f['modified'], reverse=True)
+
+
+def file_path(name):
+    """Path of a finished export file, or None."""
+    if name != os.path.basename(name) or name.endswith(PARTIAL) or name.startswith('.'):
+        return None
+    path = os.path.join(EXPORT_ROOT, name)
+    return path if os.path.isfile(path) else None
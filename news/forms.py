@@ -1,4 +1,5 @@
 from django import forms
+from django.urls import reverse
 from .models import Comment, Article, Category, Tag
 from .models_config import SiteConfiguration
 
@@ -12,14 +13,55 @@ class CommentForm(forms.ModelForm):
             'body': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Write your comment...'}),
         }
 
+class AutocompleteMixin:
+    """
+    Renders only the selected options; the rest are fetched from an
+    autocomplete endpoint as the user types (Select2 from Django admin's
+    static files). Validation is unchanged: the model choice fields only
+    look up the submitted ids.
+    """
+    def __init__(self, url_name, attrs=None):
+        self.url_name = url_name
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse(self.url_name)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if str(v).isdigit()]
+        choices = []
+        if selected and hasattr(self.choices, 'queryset'):
+            choices = [(obj.pk, str(obj)) for obj in self.choices.queryset.filter(pk__in=selected)]
+        if not self.allow_multiple_selected:
+            choices.insert(0, ('', '---------'))
+        self.choices = choices
+        return super().optgroups(name, value, attrs)
+
+    @property
+    def media(self):
+        return forms.Media(
+            js=('admin/js/vendor/jquery/jquery.min.js',
+                'admin/js/vendor/select2/select2.full.min.js',
+                'news/js/autocomplete.js'),
+            css={'screen': ('admin/css/vendor/select2/select2.min.css',)},
+        )
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
+
 class ArticleForm(forms.ModelForm):
     class Meta:
         model = Article
         fields = ['title', 'category', 'tags', 'image', 'excerpt', 'content', 'status', 'is_featured']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
-            'category': forms.Select(attrs={'class': 'form-control'}),
-            'tags': forms.SelectMultiple(attrs={'class': 'form-control'}),
+            'category': AutocompleteSelect('dashboard_autocomplete_categories', attrs={'class': 'form-control'}),
+            'tags': AutocompleteSelectMultiple('dashboard_autocomplete_tags', attrs={'class': 'form-control'}),
             'video_url': forms.URLInput(attrs={'class': 'form-control'}),
             'excerpt': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'content': forms.Textarea(attrs={'class': 'form-control', 'rows': 10}),
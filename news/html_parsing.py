@@ -0,0 +1,122 @@
+"""
+HTML parsing helpers for the OnlineKhabar scraper.
+
+The fastest installed backend is used (selectolax, then lxml, then the
+stdlib 'html.parser'), and only the region we care about is parsed: the
+news post wrappers on a front page, or the content wrapper on a detail page.
+BeautifulSoup is only imported when one of the other backends is used; it
+takes longer to import than selectolax takes to parse a page.
+"""
+from importlib.util import find_spec
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        # Older selectolax releases only ship the Modest backend
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+HAS_LXML = find_spec('lxml') is not None
+
+
+# Containers used by OnlineKhabar (approximate, they change from time to time)
+LISTING_CLASSES = ['ok-news-post', 'item']
+DETAIL_CLASS = 'ok18-single-post-content-wrap'
+
+
+def available_backends():
+    backends = []
+    if HTMLParser is not None:
+        backends.append('selectolax')
+    if HAS_LXML:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def default_backend():
+    return available_backends()[0]
+
+
+def _class_matcher(names):
+    # The strainer sees the raw attribute string ("ok-news-post col-4"), so
+    # match on individual class tokens instead of the whole value.
+    def match(value):
+        if not value:
+            return False
+        tokens = value.split() if isinstance(value, str) else value
+        return any(token in names for token in tokens)
+    return match
+
+
+def _image_url(attrs):
+    # Lazy loaded images keep the real url in data-src
+    return attrs.get('data-src') or attrs.get('src') or None
+
+
+def parse_listing(html, backend=None):
+    """
+    Return a list of {'title', 'link', 'image'} dicts for the news posts on a
+    front page. Falls back to generic 'item' wrappers if no 'ok-news-post'
+    is found.
+    """
+    backend = backend or default_backend()
+    if backend == 'selectolax':
+        return _parse_listing_selectolax(html)
+
+    from bs4 import BeautifulSoup, SoupStrainer
+    strainer = SoupStrainer('div', class_=_class_matcher(LISTING_CLASSES))
+    soup = BeautifulSoup(html, backend, parse_only=strainer)
+    nodes = soup.find_all('div', class_=LISTING_CLASSES[0]) or soup.find_all('div', class_=LISTING_CLASSES[1])
+
+    posts = []
+    for node in nodes:
+        a_tag = node.find('a', href=True)
+        if not a_tag:
+            continue
+        title_tag = node.find(['h2', 'h3', 'h4'])
+        img_tag = node.find('img')
+        posts.append({
+            'title': (title_tag or a_tag).get_text(strip=True),
+            'link': a_tag['href'],
+            'image': _image_url(img_tag.attrs) if img_tag else None,
+        })
+    return posts
+
+
+def _parse_listing_selectolax(html):
+    tree = HTMLParser(html)
+    nodes = tree.css('div.ok-news-post') or tree.css('div.item')
+
+    posts = []
+    for node in nodes:
+        a_tag = node.css_first('a[href]')
+        if not a_tag:
+            continue
+        title_tag = node.css_first('h2, h3, h4')
+        img_tag = node.css_first('img')
+        posts.append({
+            'title': (title_tag or a_tag).text(strip=True),
+            'link': a_tag.attributes.get('href'),
+            'image': _image_url(img_tag.attributes) if img_tag else None,
+        })
+    return posts
+
+
+def parse_detail(html, backend=None):
+    """Return the paragraph texts of an article detail page ([] if not found)."""
+    backend = backend or default_backend()
+    if backend == 'selectolax':
+        main_content = HTMLParser(html).css_first(f'div.{DETAIL_CLASS}')
+        if not main_content:
+            return []
+        return [p.text() for p in main_content.css('p')]
+
+    from bs4 import BeautifulSoup, SoupStrainer
+    strainer = SoupStrainer('div', class_=_class_matcher([DETAIL_CLASS]))
+    main_content = BeautifulSoup(html, backend, parse_only=strainer).find('div', class_=DETAIL_CLASS)
+    if not main_content:
+        return []
+    return [p.get_text() for p in main_content.find_all('p')]
@@ -0,0 +1,147 @@
+"""
+Category and tag listings without COUNT(*) or, for the first pages, the
+ordered scan.
+
+Category.article_count and Tag.article_count hold the number of published
+articles. Signals in news/signals.py adjust them as articles are published,
+unpublished, trashed, moved, retagged or deleted. Every change that can add,
+drop or reorder a listing entry also bumps listing_version. The ids of the
+first CACHED_PAGES pages are cached under a key that includes that version.
+The view loads the category or tag row anyway, so it always asks for the
+current list, on every worker, without any invalidation messages.
+
+Bulk imports bypass the signals and call repair() instead, as does
+`manage.py check_listing_counts`.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from .models import Article, Category, Tag
+
+PAGE_SIZE = 10
+CACHED_PAGES = 3
+CACHE_TIMEOUT = 60 * 60
+
+PUBLISHED = Q(status='published', is_deleted=False)
+
+
+def is_listed(article):
+    return article is not None and article.status == 'published' and not article.is_deleted
+
+
+def bump(model, ids, delta=0):
+    """Add delta to the article counts of these categories / tags and bump their listing version."""
+    ids = [pk for pk in ids if pk]
+    if not ids:
+        return
+    changes = {'listing_version': F('listing_version') + 1}
+    if delta:
+        # Clamped, so drift can't make a save fail; check_listing_counts fixes the count
+        changes['article_count'] = Greatest(F('article_count') + delta, 0)
+    model.objects.filter(id__in=ids).update(**changes)
+
+
+def tag_ids(article):
+    return linked_ids(article, reverse=False)
+
+
+def article_saved(before, after):
+    """Update counts and versions for an article saved from state `before` (None if new).
+
+    Returns True if a category count changed.
+    """
+    was, now = is_listed(before), is_listed(after)
+    if not was and not now:
+        return False
+    if was and now:
+        moved = before.category_id != after.category_id
+        if not moved and before.published_at == after.published_at:
+            return False
+        if moved:
+            bump(Category, [before.category_id], -1)
+            bump(Category, [after.category_id], +1)
+        else:
+            # Re-sorted: published_at was edited
+            bump(Category, [after.category_id])
+        bump(Tag, tag_ids(after))
+        return moved
+    delta = 1 if now else -1
+    bump(Category, [after.category_id if now else before.category_id], delta)
+    # New articles have no tags yet; the m2m signals count them when they're added
+    if before is not None:
+        bump(Tag, tag_ids(after), delta)
+    return True
+
+
+def article_deleted(article, tag_ids):
+    """Returns True if a category count changed."""
+    if not is_listed(article):
+        return False
+    bump(Category, [article.category_id], -1)
+    bump(Tag, tag_ids, -1)
+    return True
+
+
+def tags_changed(article, ids, delta):
+    """Tags added to (delta=1) or removed from (-1) an article."""
+    if is_listed(article):
+        bump(Tag, ids, delta)
+
+
+def linked_ids(instance, reverse, pk_set=None):
+    """Tag ids of an article (or article ids of a tag, if reverse) that are actually linked.
+
+    remove() reports the ids it was given, linked or not, so removals are
+    checked against the through table before they happen.
+    """
+    through = Article.tags.through.objects
+    if reverse:
+        rows = through.filter(tag_id=instance.pk).values_list('article_id', flat=True)
+        return list(rows.filter(article_id__in=pk_set) if pk_set is not None else rows)
+    rows = through.filter(article_id=instance.pk).values_list('tag_id', flat=True)
+    return list(rows.filter(tag_id__in=pk_set) if pk_set is not None else rows)
+
+
+def articles_changed(tag, article_ids, delta):
+    """Articles added to (delta=1) or removed from (-1) a tag."""
+    listed = Article.objects.filter(PUBLISHED, id__in=article_ids).count()
+    bump(Tag, [tag.pk], delta * listed)
+
+
+# --- Reading ---
+
+def _key(owner):
+    return f'news:listing:{owner._meta.model_name}:{owner.pk}:{owner.listing_version}'
+
+
+def first_ids(owner, queryset):
+    """Ids of the first CACHED_PAGES pages of a listing, newest first."""
+    key = _key(owner)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(queryset.order_by('-published_at', '-id').values_list('id', flat=True)[:PAGE_SIZE * CACHED_PAGES])
+        cache.set(key, ids, CACHE_TIMEOUT)
+    return ids
+
+
+# --- Consistency ---
+
+def drift():
+    """[(model, id, stored, actual)] for every category / tag whose count is wrong."""
+    found = []
+    for model, lookup in ((Category, 'category'), (Tag, 'tags')):
+        counts = (
+            Article.objects.filter(PUBLISHED, **{lookup: OuterRef('pk')})
+            .order_by().values(lookup).annotate(n=Count('id')).values('n')
+        )
+        rows = model.objects.annotate(actual=Coalesce(Subquery(counts), 0)).exclude(article_count=F('actual'))
+        found += [(model, pk, stored, actual) for pk, stored, actual in rows.values_list('id', 'article_count', 'actual').iterator()]
+    return found
+
+
+def repair():
+    """Fix every drifted count (and drop the cached ids with it). Returns what was fixed."""
+    found = drift()
+    for model, pk, _, actual in found:
+        model.objects.filter(pk=pk).update(article_count=actual, listing_version=F('listing_version') + 1)
+    return found
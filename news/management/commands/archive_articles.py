@@ -0,0 +1,52 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from news.archive import archive_batch, candidates, restore
+from news.models import Article, ArchivedArticle
+
+
+class Command(BaseCommand):
+    help = 'Move old and trashed articles to the cold archive table in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive articles published more than this many days ago '
+                                                     '(default: settings.ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--trash-days', type=int, help='Archive trashed articles after this many days '
+                                                           '(default: settings.ARCHIVE_TRASH_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Seconds to sleep between batches so other writers get the lock')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+        parser.add_argument('--restore', nargs='+', metavar='SLUG', help='Move these archived articles back instead')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            for slug in options['restore']:
+                # Trashed articles too, unlike find_archived()
+                archived = ArchivedArticle.objects.filter(slug=slug).order_by('-published_at').first()
+                if archived is None:
+                    raise CommandError(f'No archived article with slug {slug!r}')
+                if Article.objects.filter(slug=slug).exists():
+                    raise CommandError(f'Slug {slug!r} is taken by a live article')
+                restore(archived)
+                self.stdout.write(f'Restored {slug}')
+            return
+
+        queryset = candidates(options['days'], options['trash_days'])
+        if options['dry_run']:
+            self.stdout.write(f'{queryset.count()} articles would be archived.')
+            return
+
+        # Keyset pagination over ids; each batch is its own short transaction
+        moved = 0
+        last_id = 0
+        start = time.monotonic()
+        while True:
+            ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            last_id = ids[-1]
+            moved += archive_batch(ids)
+            self.stdout.write(f'{moved} articles archived...')
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} articles in {time.monotonic() - start:.1f}s.'))
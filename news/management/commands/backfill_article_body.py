@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from news.models import Article
+from news import article_body
+
+
+class Command(BaseCommand):
+    help = 'Compute the stored body HTML, word count, reading time, summary and first image for existing articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every article, not only those without body_html')
+
+    def handle(self, *args, **options):
+        articles = Article.objects.only('id', 'content', 'image')
+        if not options['all']:
+            articles = articles.filter(body_html='').exclude(content='')
+
+        # Keyset pagination: the filter above shrinks as we go, so no OFFSET
+        done = 0
+        last_id = 0
+        while True:
+            batch = list(articles.filter(id__gt=last_id).order_by('id')[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            for article in batch:
+                article_body.apply(article)
+            # bulk_update skips save() and signals; only derived fields change
+            with transaction.atomic():
+                Article.objects.bulk_update(batch, article_body.DERIVED_FIELDS)
+            done += len(batch)
+            self.stdout.write(f'{done} articles...')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {done} articles.'))
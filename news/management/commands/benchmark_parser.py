@@ -0,0 +1,46 @@
+import time
+import tracemalloc
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from news.html_parsing import available_backends, parse_listing, parse_detail
+
+class Command(BaseCommand):
+    help = 'Benchmark the scraper HTML parsing backends on saved OnlineKhabar pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Saved .html files or directories containing them')
+        parser.add_argument('--detail', action='store_true', help='Treat pages as article detail pages')
+        parser.add_argument('--repeat', type=int, default=5, help='Times each page is parsed per backend')
+        parser.add_argument('--backend', choices=available_backends(), help='Only run this backend')
+
+    def handle(self, *args, **options):
+        # Load pages up front so disk reads are not part of the timings
+        pages = []
+        for path in map(Path, options['paths']):
+            files = sorted(path.glob('*.htm*')) if path.is_dir() else [path]
+            pages.extend(f.read_bytes() for f in files)
+        if not pages:
+            raise CommandError('No HTML pages found.')
+
+        parse = parse_detail if options['detail'] else parse_listing
+        backends = [options['backend']] if options['backend'] else available_backends()
+        total = len(pages) * options['repeat']
+
+        self.stdout.write(f'Parsing {len(pages)} pages x {options["repeat"]} with {", ".join(backends)}')
+        for backend in backends:
+            tracemalloc.start()
+            start = time.perf_counter()
+            items = 0
+            for _ in range(options['repeat']):
+                for html in pages:
+                    items += len(parse(html, backend=backend))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            # Peak is the Python heap; C allocations inside lxml/selectolax are not traced
+            self.stdout.write(self.style.SUCCESS(
+                f'{backend:12} {total / elapsed:8.1f} pages/s  '
+                f'peak {peak / 1024 / 1024:6.2f} MB  '
+                f'{items // options["repeat"]} items/run'
+            ))
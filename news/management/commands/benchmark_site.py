@@ -0,0 +1,249 @@
+import json
+import time
+import tracemalloc
+import urllib.request
+import uuid
+from urllib.parse import urlencode
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from news import exports, urls as news_urls
+from news.models import Article, Category, PeriodCount, Tag
+from news.profiling import percentile
+
+# GET on these changes data, so they are never benchmarked
+UNSAFE = {'dashboard_restore_article'}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every URL in news/urls.py and write JSON results that can be compared between commits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help='Test client requests per URL')
+        parser.add_argument('--only', nargs='*', help='URL names to run (default: all)')
+        parser.add_argument('--admin', action='store_true', help='Also benchmark the news admin changelists')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--compare', help='Previous JSON results to diff against')
+        parser.add_argument('--base-url', help='Also load test a running server, e.g. http://localhost:8000')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--http-requests', type=int, default=200, help='HTTP requests per URL')
+
+    def handle(self, *args, **options):
+        for option in ('requests', 'http_requests', 'concurrency'):
+            if options[option] < 1:
+                raise CommandError(f'--{option.replace("_", "-")} must be at least 1')
+
+        targets = self.build_targets(options['only'])
+        results = {
+            'meta': {
+                'timestamp': time.time(),
+                'articles': Article.objects.count(),
+                'requests_per_url': options['requests'],
+            },
+            'client': {},
+            'http': {},
+        }
+
+        # Dashboard and admin pages are fetched as a throwaway user, removed again afterwards
+        staff = User(username=f'benchmark-{uuid.uuid4().hex[:12]}', is_staff=True, is_superuser=options['admin'])
+        staff.set_unusable_password()
+        staff.save()
+        try:
+            self.run(targets, results, staff, options)
+        finally:
+            staff.delete()
+
+    def run(self, targets, results, staff, options):
+        public, staff_client = Client(), Client()
+        staff_client.force_login(staff)
+        if options['admin']:
+            targets += self.build_admin_targets()
+
+        self.stdout.write(f'{"URL":44} {"status":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>7} {"peak KB":>8}')
+        for name, path in targets:
+            client = staff_client if name.startswith(('dashboard', 'admin')) else public
+            result = self.run_client(client, path, options['requests'])
+            results['client'][name] = result
+            self.stdout.write(
+                f'{name:44} {result["status"]:>6} {result["p50_ms"]:8.1f} {result["p95_ms"]:8.1f} '
+                f'{result["p99_ms"]:8.1f} {result["queries"]:7} {result["peak_kb"]:8.0f}'
+            )
+
+        if options['base_url']:
+            self.stdout.write(f'\nHTTP load test against {options["base_url"]} (concurrency {options["concurrency"]})')
+            for name, path in targets:
+                # Dashboard and admin pages need a session, so only public pages go over HTTP
+                if name.startswith(('dashboard', 'admin')):
+                    continue
+                result = self.run_http(options['base_url'] + path, options['http_requests'], options['concurrency'])
+                results['http'][name] = result
+                self.stdout.write(
+                    f'{name:44} {result["rps"]:8.1f} req/s  p50 {result["p50_ms"]:.1f}  '
+                    f'p95 {result["p95_ms"]:.1f}  p99 {result["p99_ms"]:.1f}  errors {result["errors"]}'
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(results, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+        if options['compare']:
+            with open(options['compare']) as fp:
+                self.compare(json.load(fp), results)
+
+    def build_targets(self, only):
+        article = Article.objects.filter(status='published', is_deleted=False).first()
+        deleted = Article.objects.filter(is_deleted=True).first()
+        category = Category.objects.filter(articles__status='published').first() or Category.objects.first()
+        tag = Tag.objects.filter(articles__status='published').first() or Tag.objects.first()
+
+        # Newest day in the date archive, for its year / month / day URLs
+        period = (
+            PeriodCount.objects.filter(level=PeriodCount.DAY, count__gt=0)
+            .order_by('-period').values_list('period', flat=True).first()
+        )
+        day = date.fromisoformat(period) if period else None
+
+        def sample(name, key):
+            if key == 'slug':
+                obj = category if 'category' in name else tag if 'tag' in name else article
+                return obj.slug if obj else None
+            if key == 'pk':
+                if 'category' in name:
+                    obj = category
+                elif 'trash' in name or 'force_delete' in name:
+                    obj = deleted
+                else:
+                    obj = article
+                return obj.pk if obj else None
+            if key in ('year', 'month', 'day'):
+                return getattr(day, key) if day else None
+            if key == 'kind':
+                return next(iter(exports.DATASETS))
+            if key == 'fmt':
+                return next(iter(exports.FORMATS))
+            if key == 'name':
+                # A finished background export, if there is one
+                return next((f['name'] for f in exports.files() if f['done']), None)
+            # A converter there's no sample for
+            return None
+
+        # Sample URL kwargs per converter / URL name; None means "no data to run this URL with"
+        def kwargs_for(name, converters):
+            kwargs = {key: sample(name, key) for key in converters}
+            return None if None in kwargs.values() else kwargs
+
+        targets, seen = [], set()
+        for pattern in news_urls.urlpatterns:
+            name = pattern.name
+            if not name or name in UNSAFE or (only and name not in only):
+                continue
+            kwargs = kwargs_for(name, pattern.pattern.converters)
+            if kwargs is None:
+                self.stdout.write(f'Skipping {name} ({", ".join(pattern.pattern.converters)}): no sample data')
+                continue
+            # Several patterns can share a name (date_archive); label them by their arguments
+            label = f'{name} ({"/".join(kwargs)})' if name in seen else name
+            seen.add(name)
+            targets.append((label, reverse(name, kwargs=kwargs)))
+        return targets
+
+    def build_admin_targets(self):
+        tag = Tag.objects.filter(articles__isnull=False).first()
+        targets = [
+            ('admin:news_article_changelist', reverse('admin:news_article_changelist')),
+            ('admin:news_article_changelist (published)', reverse('admin:news_article_changelist') + '?status__exact=published'),
+            ('admin:news_article_changelist (page 50)', reverse('admin:news_article_changelist') + '?p=50'),
+            ('admin:news_comment_changelist', reverse('admin:news_comment_changelist')),
+            ('admin:news_activitylog_changelist', reverse('admin:news_activitylog_changelist')),
+            ('admin:news_activitylog_changelist (7 days)', reverse('admin:news_activitylog_changelist')
+             + '?' + urlencode({'timestamp__gte': (timezone.now() - timedelta(days=7)).isoformat()})),
+        ]
+        if tag:
+            targets.append(('admin:news_article_changelist (tag)', reverse('admin:news_article_changelist') + f'?tag={tag.pk}'))
+        return targets
+
+    def get(self, client, path):
+        response = client.get(path)
+        if response.streaming:
+            # Exports are generated as they're read; time the whole body
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def run_client(self, client, path, requests):
+        self.get(client, path)  # warm up caches and template loaders
+
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = self.get(client, path)
+            durations.append(time.perf_counter() - start)
+        durations.sort()
+
+        # CaptureQueriesContext doesn't work here: request_started resets the query log
+        queries = []
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+        with connection.execute_wrapper(count_query):
+            self.get(client, path)
+
+        tracemalloc.start()
+        self.get(client, path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'path': path,
+            'status': response.status_code,
+            'p50_ms': percentile(durations, 50) * 1000,
+            'p95_ms': percentile(durations, 95) * 1000,
+            'p99_ms': percentile(durations, 99) * 1000,
+            'queries': len(queries),
+            'peak_kb': peak / 1024,
+        }
+
+    def run_http(self, url, requests, concurrency):
+        def fetch(_):
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                ok = True
+            except Exception:
+                ok = False
+            return time.perf_counter() - start, ok
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = list(pool.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - start
+        durations = sorted(d for d, _ in samples)
+
+        return {
+            'url': url,
+            'rps': requests / elapsed,
+            'p50_ms': percentile(durations, 50) * 1000,
+            'p95_ms': percentile(durations, 95) * 1000,
+            'p99_ms': percentile(durations, 99) * 1000,
+            'errors': sum(1 for _, ok in samples if not ok),
+        }
+
+    def compare(self, old, new):
+        self.stdout.write('\nChange vs previous run (negative is faster / fewer)')
+        for section in ('client', 'http'):
+            for name, result in new[section].items():
+                before = old.get(section, {}).get(name)
+                if not before:
+                    continue
+                changes = []
+                for key in ('p50_ms', 'p95_ms', 'queries', 'rps'):
+                    if key in result and before.get(key):
+                        changes.append(f'{key} {(result[key] - before[key]) / before[key] * 100:+.0f}%')
+                self.stdout.write(f'{section:6} {name:44} ' + '  '.join(changes))
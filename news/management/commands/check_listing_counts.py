@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from news import listings
+from news.navigation import invalidate_navigation
+
+
+class Command(BaseCommand):
+    help = 'Compare the stored category / tag article counts with the articles and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted counts')
+
+    def handle(self, *args, **options):
+        found = listings.drift() if options['dry_run'] else listings.repair()
+        for model, pk, stored, actual in found:
+            self.stdout.write(f'{model._meta.verbose_name} {pk}: stored {stored}, actual {actual}')
+        if not found:
+            self.stdout.write(self.style.SUCCESS('All counts are correct.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(found)} counts have drifted.'))
+        else:
+            invalidate_navigation()
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(found)} counts.'))
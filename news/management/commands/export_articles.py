@@ -0,0 +1,71 @@
+import time
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from news.models import Article
+from news.bulk_io import RowWriter, detect_format
+
+class Command(BaseCommand):
+    help = 'Stream articles to a JSONL or CSV file without loading them all into memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File to write (.jsonl or .csv)')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--status', choices=['draft', 'published'])
+        parser.add_argument('--include-deleted', action='store_true', help='Also export trashed articles')
+
+    def handle(self, *args, **options):
+        fmt = detect_format(options['output'], options['format'])
+        chunk_size = options['chunk_size']
+
+        articles = Article.objects.order_by('id')
+        if options['status']:
+            articles = articles.filter(status=options['status'])
+        if not options['include_deleted']:
+            articles = articles.filter(is_deleted=False)
+        tag_links = Article.tags.through.objects
+
+        exported = 0
+        start = time.monotonic()
+        with open(options['output'], 'w', newline='', encoding='utf-8') as fp:
+            writer = RowWriter(fp, fmt)
+            last_id = 0
+            # Keyset pagination: each chunk is an index range scan, no OFFSET
+            while True:
+                chunk = list(articles.filter(id__gt=last_id).values(
+                    'id', 'title', 'slug', 'category__name', 'author__username', 'image', 'excerpt',
+                    'content', 'status', 'is_featured', 'views', 'is_deleted', 'created_at', 'published_at',
+                )[:chunk_size])
+                if not chunk:
+                    break
+                last_id = chunk[-1]['id']
+
+                # One query for the tags of the whole chunk
+                tags = defaultdict(list)
+                for article_id, name in tag_links.filter(
+                    article_id__in=[row['id'] for row in chunk]
+                ).values_list('article_id', 'tag__name'):
+                    tags[article_id].append(name)
+
+                for row in chunk:
+                    writer.write({
+                        'title': row['title'],
+                        'slug': row['slug'],
+                        'category': row['category__name'],
+                        'tags': tags[row['id']],
+                        'author': row['author__username'] or '',
+                        'image': row['image'],
+                        'excerpt': row['excerpt'],
+                        'content': row['content'],
+                        'status': row['status'],
+                        'is_featured': row['is_featured'],
+                        'views': row['views'],
+                        'is_deleted': row['is_deleted'],
+                        'created_at': row['created_at'].isoformat(),
+                        'published_at': row['published_at'].isoformat(),
+                    })
+                exported += len(chunk)
+                elapsed = max(time.monotonic() - start, 1e-6)
+                self.stderr.write(f'{exported} exported ({exported / elapsed:.0f} rows/s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Exported {exported} articles to {options["output"]}.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from news.media_gc import find_orphans, invalidate_usage, remove
+
+
+class Command(BaseCommand):
+    help = 'Delete (or quarantine) media files no longer referenced by any article or site setting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be reclaimed')
+        parser.add_argument('--quarantine', action='store_true',
+                            help='Move orphans to MEDIA_ROOT/.quarantine instead of deleting them')
+        parser.add_argument('--min-age-hours', type=float, default=24,
+                            help='Leave files younger than this alone (uploads still being saved)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--list', action='store_true', help='Print every orphaned path')
+
+    def handle(self, *args, **options):
+        found = reclaimed = 0
+        batch = []
+        for path, size in find_orphans(min_age=options['min_age_hours'] * 3600):
+            found += 1
+            if options['list']:
+                self.stdout.write(f'{filesizeformat(size):>10}  {path}')
+            if options['dry_run']:
+                reclaimed += size
+                continue
+            batch.append(path)
+            if len(batch) >= options['batch_size']:
+                reclaimed += remove(batch, quarantine=options['quarantine'])
+                self.stdout.write(f'{found} files, {filesizeformat(reclaimed)}...')
+                batch = []
+        if batch:
+            reclaimed += remove(batch, quarantine=options['quarantine'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{found} orphaned files, {filesizeformat(reclaimed)} would be reclaimed.')
+            return
+        invalidate_usage()
+        verb = 'Quarantined' if options['quarantine'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {found} orphaned files, {filesizeformat(reclaimed)} reclaimed.'))
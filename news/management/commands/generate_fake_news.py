@@ -0,0 +1,155 @@
+import os
+import random
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from news.models import Article, Category, Tag, Comment, ActivityLog
+from news import article_body, date_archive, listings
+from news.navigation import invalidate_navigation
+
+WORDS = (
+    'government budget parliament minister election police province market river tourism '
+    'festival school hospital road bridge earthquake monsoon cricket football league team '
+    'price rice farmers bank interest loan export import himalaya trekking airport flight '
+    'students exam court verdict protest agreement india china border energy hydropower '
+    'नेपाल सरकार बजेट संसद मन्त्री निर्वाचन प्रहरी प्रदेश बजार नदी पर्यटन चाड विद्यालय अस्पताल सडक'
+).split()
+ACTIONS = ['Login', 'Logout', 'Create Article', 'Edit Article', 'Delete Article', 'GET /dashboard/']
+
+
+class Command(BaseCommand):
+    help = 'Generate realistic fake categories, tags, articles, comments and activity logs for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--tags', type=int, default=500)
+        parser.add_argument('--articles', type=int, default=10000)
+        parser.add_argument('--tags-per-article', type=int, default=3)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--activity-logs', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=365, help='Spread publish dates over this many days')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Suffix keeps slugs unique when the command is run more than once
+        self.run_id = f'{int(time.time()):x}'
+        start = time.monotonic()
+
+        categories = self.create_named(Category, 'Category', options['categories'])
+        categories = categories or list(Category.objects.values_list('id', flat=True))
+        tags = self.create_named(Tag, 'Tag', options['tags'])
+        article_ids = self.create_articles(options, categories, tags)
+        self.create_comments(options['comments'], article_ids)
+        self.create_activity_logs(options['activity_logs'])
+
+        # bulk_create sends no signals
+        listings.repair()
+        invalidate_navigation()
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.monotonic() - start:.1f}s.'))
+
+    def sentence(self, low, high):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(self.rng.randint(low, high))).capitalize()
+
+    def batches(self, total):
+        for offset in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - offset)
+
+    def create_named(self, model, label, count):
+        # bulk_create skips save(), so the slugs are set here
+        objs = model.objects.bulk_create([
+            model(name=f'{label} {i} {self.rng.choice(WORDS)}', slug=f'{label.lower()}-{self.run_id}-{i}')
+            for i in range(count)
+        ])
+        self.stdout.write(f'Created {len(objs)} {model._meta.verbose_name_plural}.')
+        return [obj.id for obj in objs]
+
+    def create_articles(self, options, categories, tags):
+        images_dir = os.path.join(settings.MEDIA_ROOT, 'articles')
+        images = [f'articles/{e.name}' for e in os.scandir(images_dir)] if os.path.isdir(images_dir) else []
+        images = images or ['']
+        author = User.objects.filter(is_staff=True).first()
+        now = timezone.now()
+        Through = Article.tags.through
+
+        ids = []
+        for size in self.batches(options['articles']):
+            objs = []
+            for _ in range(size):
+                n = len(ids) + len(objs)
+                paragraphs = [
+                    '. '.join(self.sentence(6, 14) for _ in range(self.rng.randint(3, 6))) + '.'
+                    for _ in range(self.rng.randint(4, 12))
+                ]
+                objs.append(Article(
+                    title=self.sentence(5, 12),
+                    slug=f'article-{self.run_id}-{n}',
+                    category_id=self.rng.choice(categories),
+                    author=author,
+                    image=self.rng.choice(images),
+                    excerpt=paragraphs[0][:200],
+                    content='\n\n'.join(paragraphs),
+                    status='published' if self.rng.random() < 0.9 else 'draft',
+                    is_featured=self.rng.random() < 0.05,
+                    views=int(self.rng.paretovariate(1.2) * 10),
+                ))
+
+            # bulk_create skips save(), so the derived body fields are filled in here
+            for obj in objs:
+                article_body.apply(obj)
+
+            with transaction.atomic():
+                objs = Article.objects.bulk_create(objs)
+                # auto_now overrides dates on insert; spread them out afterwards
+                for obj in objs:
+                    obj.published_at = obj.created_at = now - timedelta(seconds=self.rng.randint(0, options['days'] * 86400))
+                Article.objects.bulk_update(objs, ['created_at', 'published_at'])
+                date_archive.add(objs)
+                if tags:
+                    k = min(options['tags_per_article'], len(tags))
+                    Through.objects.bulk_create([
+                        Through(article_id=obj.id, tag_id=tag_id)
+                        for obj in objs for tag_id in self.rng.sample(tags, k)
+                    ])
+            ids.extend(obj.id for obj in objs)
+            self.stdout.write(f'{len(ids)} articles...')
+        return ids
+
+    def create_comments(self, count, article_ids):
+        if not article_ids:
+            return
+        for size in self.batches(count):
+            Comment.objects.bulk_create([
+                Comment(
+                    article_id=self.rng.choice(article_ids),
+                    name=self.sentence(1, 2),
+                    email=f'reader{self.rng.randint(1, 10 ** 6)}@example.com',
+                    body=self.sentence(8, 40),
+                    is_approved=self.rng.random() < 0.8,
+                )
+                for _ in range(size)
+            ])
+        self.stdout.write(f'Created {count} comments.')
+
+    def create_activity_logs(self, count):
+        users = list(User.objects.filter(is_staff=True).values_list('id', flat=True))
+        if not users:
+            self.stdout.write('No staff users, skipping activity logs.')
+            return
+        for size in self.batches(count):
+            ActivityLog.objects.bulk_create([
+                ActivityLog(
+                    user_id=self.rng.choice(users),
+                    action=self.rng.choice(ACTIONS),
+                    details='Generated',
+                    ip_address=f'10.0.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}',
+                )
+                for _ in range(size)
+            ])
+        self.stdout.write(f'Created {count} activity logs.')
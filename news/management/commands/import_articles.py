@@ -0,0 +1,155 @@
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+from news.models import Article, Category, Tag
+from news import article_body, date_archive, listings
+from news.bulk_io import detect_format, make_slug, read_rows, to_bool
+from news.navigation import invalidate_navigation
+
+class Command(BaseCommand):
+    help = 'Bulk import articles from a JSONL or CSV file (as written by export_articles)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read (.jsonl or .csv)')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per transaction')
+        parser.add_argument('--images-from', help='Directory to copy the referenced image files from')
+        parser.add_argument('--image-workers', type=int, default=8)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist.')
+        fmt = detect_format(path, options['format'])
+        chunk_size = options['chunk_size']
+
+        # Name -> id caches so rows never trigger a per-row lookup
+        self.categories = dict(Category.objects.values_list('name', 'id'))
+        self.category_slugs = set(Category.objects.values_list('slug', flat=True))
+        self.tags = dict(Tag.objects.values_list('name', 'id'))
+        self.tag_slugs = set(Tag.objects.values_list('slug', flat=True))
+        self.users = dict(User.objects.values_list('username', 'id'))
+
+        self.images_from = options['images_from']
+        self.pool = ThreadPoolExecutor(options['image_workers']) if self.images_from else None
+        self.imported = self.skipped = 0
+        start = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as fp:
+            batch = []
+            for row in read_rows(fp, fmt):
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    self.import_chunk(batch)
+                    batch = []
+                    self.report(start)
+            if batch:
+                self.import_chunk(batch)
+                self.report(start)
+
+        if self.pool:
+            self.pool.shutdown()
+        # bulk_create sends no signals, so refresh the nav counts by hand
+        listings.repair()
+        invalidate_navigation()
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} articles ({self.skipped} skipped as already present). '
+            f'Run merge_duplicates to fingerprint them.'
+        ))
+
+    def report(self, start):
+        elapsed = max(time.monotonic() - start, 1e-6)
+        self.stderr.write(f'{self.imported} imported, {self.skipped} skipped ({self.imported / elapsed:.0f} rows/s)')
+
+    def import_chunk(self, rows):
+        # 1. Drop rows whose slug is already taken (re-runs are idempotent)
+        for row in rows:
+            # Titles that slugify to '' (Nepali) get a hash of the title instead,
+            # the same on every run so re-imports still find them
+            row['slug'] = row.get('slug') or slugify(row['title'])[:50] or make_slug(row['title'], set())
+            row['category'] = row.get('category') or 'General'
+            row['tags'] = row.get('tags') or []
+        existing = set(Article.objects.filter(slug__in=[r['slug'] for r in rows]).values_list('slug', flat=True))
+        new_rows = []
+        for row in rows:
+            if row['slug'] not in existing:
+                existing.add(row['slug'])
+                new_rows.append(row)
+        self.skipped += len(rows) - len(new_rows)
+        if not new_rows:
+            return
+
+        with transaction.atomic():
+            # 2. Create any categories / tags we haven't seen yet
+            self.resolve(Category, self.categories, self.category_slugs, {r['category'] for r in new_rows})
+            self.resolve(Tag, self.tags, self.tag_slugs, {t for r in new_rows for t in r['tags']})
+
+            # 3. Articles (bulk_create skips save(), so the derived body fields are filled in here)
+            articles = Article.objects.bulk_create([
+                article_body.apply(Article(
+                    title=row['title'],
+                    slug=row['slug'],
+                    category_id=self.categories[row['category']],
+                    author_id=self.users.get(row.get('author')),
+                    image=row.get('image') or '',
+                    excerpt=row.get('excerpt') or '',
+                    content=row.get('content') or '',
+                    status=row.get('status') or 'published',
+                    is_featured=to_bool(row.get('is_featured')),
+                    views=int(row.get('views') or 0),
+                    is_deleted=to_bool(row.get('is_deleted')),
+                ))
+                for row in new_rows
+            ])
+
+            # bulk_create applies auto_now/auto_now_add, so put the exported dates back
+            dated = []
+            for article, row in zip(articles, new_rows):
+                created_at = parse_datetime(row.get('created_at') or '')
+                published_at = parse_datetime(row.get('published_at') or '')
+                if created_at or published_at:
+                    article.created_at = created_at or article.created_at
+                    article.published_at = published_at or article.published_at
+                    dated.append(article)
+            if dated:
+                Article.objects.bulk_update(dated, ['created_at', 'published_at'])
+            date_archive.add(articles)
+
+            # 4. Tags, straight into the through table
+            Through = Article.tags.through
+            Through.objects.bulk_create([
+                Through(article_id=article.id, tag_id=self.tags[name])
+                for article, row in zip(articles, new_rows)
+                for name in set(row['tags'])
+            ])
+
+        self.imported += len(articles)
+
+        if self.pool:
+            list(self.pool.map(self.copy_image, [r['image'] for r in new_rows if r.get('image')]))
+
+    def resolve(self, model, cache, taken_slugs, names):
+        missing = [name for name in names if name not in cache]
+        if not missing:
+            return
+        # bulk_create skips save(), so build the slugs here
+        created = model.objects.bulk_create([
+            model(name=name, slug=make_slug(name, taken_slugs)) for name in missing
+        ])
+        for obj in created:
+            cache[obj.name] = obj.id
+
+    def copy_image(self, name):
+        src = os.path.join(self.images_from, name)
+        dst = os.path.join(settings.MEDIA_ROOT, name)
+        if os.path.exists(dst) or not os.path.exists(src):
+            return
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.copyfile(src, dst)
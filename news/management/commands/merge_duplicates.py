@@ -0,0 +1,92 @@
+import heapq
+from itertools import islice
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from news.models import Article, Comment, ArticleFingerprint
+from news import analytics
+from news.dedup import THRESHOLD, MemoryIndex, build_fingerprint, find_near_duplicates, minhash, unpack
+
+class Command(BaseCommand):
+    help = 'Find near-duplicate articles and merge them into the oldest copy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                            help='Min estimated similarity (0-1) to count as a duplicate')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be merged')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        # 1. Fingerprint articles saved before the index existed. A dry run
+        # keeps them in memory so it writes nothing.
+        unsaved = MemoryIndex()
+        indexed = 0
+        missing = Article.objects.filter(fingerprint__isnull=True).only('id', 'title', 'content').order_by('id')
+        last_id = 0
+        while True:
+            batch = list(missing.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            if dry_run:
+                for article in batch:
+                    unsaved.add(article.id, minhash(article.title, article.content))
+            else:
+                ArticleFingerprint.objects.bulk_create([build_fingerprint(a) for a in batch])
+            indexed += len(batch)
+        self.stdout.write(f'{"Would index" if dry_run else "Indexed"} {indexed} articles.')
+
+        # 2. Walk the index in id order, merging each article into the oldest
+        # near-duplicate that is still around.
+        merged = set()
+        fingerprints = heapq.merge(self.stored_fingerprints(batch_size), unsaved.items())
+        while True:
+            batch = list(islice(fingerprints, batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                for article_id, signature in batch:
+                    matches = (
+                        find_near_duplicates(signature=signature, threshold=options['threshold'])
+                        + unsaved.find_near_duplicates(signature, options['threshold'])
+                    )
+                    # A dry run deletes nothing, so skip what it would have merged away
+                    older = [m for m, _ in matches if m < article_id and m not in merged]
+                    if not older:
+                        continue
+                    keep_id = min(older)
+                    self.stdout.write(f'#{article_id} duplicates #{keep_id}')
+                    if not dry_run:
+                        self.merge(keep_id, article_id)
+                    merged.add(article_id)
+
+        verb = 'Would merge' if dry_run else 'Merged'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(merged)} duplicate articles.'))
+
+    def stored_fingerprints(self, batch_size):
+        """(article_id, signature) for every ArticleFingerprint row, in id order (keyset pagination)."""
+        last_id = 0
+        while True:
+            batch = list(
+                ArticleFingerprint.objects.filter(article_id__gt=last_id)
+                .order_by('article_id').values_list('article_id', 'signature')[:batch_size]
+            )
+            if not batch:
+                return
+            last_id = batch[-1][0]
+            for article_id, blob in batch:
+                yield article_id, unpack(blob)
+
+    def merge(self, keep_id, duplicate_id):
+        duplicate = Article.objects.get(pk=duplicate_id)
+        keep = Article.objects.get(pk=keep_id)
+
+        # Move everything readers can see onto the surviving article
+        Comment.objects.filter(article_id=duplicate_id).update(article_id=keep_id)
+        keep.tags.add(*duplicate.tags.all())
+        Article.objects.filter(pk=keep_id).update(views=F('views') + duplicate.views)
+        analytics.move(duplicate_id, keep_id)
+        duplicate.delete()
@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from news.models import PrerenderedPage
+from news import cachebus, prerender
+
+
+def _init_worker():
+    # Forked workers must not share the parent's DB connections
+    import django
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Pre-render public pages to static HTML (+ .gz/.br) under PRERENDER_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stale', action='store_true', help='Only rebuild pages marked stale in the manifest')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--watch', type=int, metavar='SECONDS',
+                            help='Keep running, rebuilding stale pages every SECONDS')
+
+    def handle(self, *args, **options):
+        if options['watch']:
+            while True:
+                self.run(True, options['workers'])
+                time.sleep(options['watch'])
+        self.run(options['stale'], options['workers'])
+
+    def run(self, stale_only, workers):
+        # Read before rendering: a change made meanwhile leaves the page stale
+        if stale_only:
+            pages, site_version = prerender.stale_pages()
+        else:
+            site_version = cachebus.version(prerender.SITE_TOPIC)
+            paths = prerender.all_paths()
+            PrerenderedPage.objects.bulk_create(
+                [PrerenderedPage(path=p) for p in paths], batch_size=prerender.CHUNK_SIZE, ignore_conflicts=True,
+            )
+            pages = dict(PrerenderedPage.objects.values_list('path', 'version').iterator())
+        if not pages:
+            if not stale_only:
+                self.stdout.write('Nothing to render.')
+            return
+
+        start = time.monotonic()
+        rendered = total_bytes = 0
+        connections.close_all()
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            for path, status, size in pool.map(prerender.render_page, pages, chunksize=16):
+                if status == 200:
+                    prerender.record_rendered(path, pages[path], site_version, size)
+                    rendered += 1
+                    total_bytes += size
+                else:
+                    # Gone (deleted / unpublished): drop it from the manifest
+                    PrerenderedPage.objects.filter(path=path).delete()
+                    self.stdout.write(self.style.WARNING(f'{path}: {status}, removed'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} pages ({total_bytes / 1024 / 1024:.1f} MB) '
+            f'in {time.monotonic() - start:.1f}s with {workers} workers.'
+        ))
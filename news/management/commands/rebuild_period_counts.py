@@ -0,0 +1,12 @@
+import time
+from django.core.management.base import BaseCommand
+from news import date_archive
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-category year/month/day article counts behind the date archive'
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        rows = date_archive.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} period counts in {time.monotonic() - start:.1f}s.'))
@@ -0,0 +1,18 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from news import analytics
+
+
+class Command(BaseCommand):
+    help = 'Fold hourly view counts older than ANALYTICS_HOURLY_DAYS into daily totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=analytics.HOURLY_DAYS,
+                            help='Keep this many days at hourly resolution')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now().date() - timedelta(days=options['days'])
+        done = analytics.rollup(before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {done} hourly rows from before {before}.'))
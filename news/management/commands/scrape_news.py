@@ -1,15 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
+import hashlib
 from django.core.management.base import BaseCommand
 from django.core.files.base import ContentFile
 from django.utils.text import slugify
 from news.models import Article, Category, Tag
-from datetime import datetime
+from news.html_parsing import parse_listing, parse_detail
+from news.dedup import minhash, find_near_duplicates, pack
 
 class Command(BaseCommand):
     help = 'Scrape news from OnlineKhabar'
 
     def handle(self, *args, **options):
+        # Imported here so `manage.py help` and friends don't pay for it
+        import requests
+
         self.stdout.write('Starting scraper...')
         
         # 1. Define URL and Categories to look for
@@ -35,41 +38,29 @@ class Command(BaseCommand):
 
         try:
             response = requests.get(base_url, headers={'User-Agent': 'Mozilla/5.0'})
-            soup = BeautifulSoup(response.content, 'html.parser')
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Failed to fetch site: {e}'))
             return
 
         # OnlineKhabar Structure (Approximate)
-        # They use various classes. We will look for common article containers.
-        # Main target: <div class="ok-news-post"> or similar wrapper
-        # We will iterate generally over links that look like news
-        
-        # Logic: Find all 'a' tags, check if they match article pattern
-        # Article pattern often: https://www.onlinekhabar.com/2026/01/123456
-        
-        articles_found = soup.find_all('div', class_='ok-news-post')
-        # If specific class not found, try generic item wrapper or fallback to main content
+        # Main target: <div class="ok-news-post">, falling back to <div class="item">.
+        # Only those wrappers are parsed; title, link and image come out in one pass.
+        articles_found = parse_listing(response.content)
         if not articles_found:
-             self.stdout.write('No "ok-news-post" found. Trying generic search...')
-             articles_found = soup.find_all('div', class_='item')
+             self.stdout.write('No news posts found on the front page.')
 
         count = 0
         for item in articles_found:
             if count > 20: break # Limit to 20 to avoid timeout
             
             try:
-                # 1. Extract Title & Link
-                a_tag = item.find('a', href=True)
-                if not a_tag: continue
-                
-                link = a_tag['href']
-                title_tag = item.find(['h2', 'h3', 'h4'])
-                title = title_tag.get_text(strip=True) if title_tag else a_tag.get_text(strip=True)
+                # 1. Title & Link
+                link = item['link']
+                title = item['title']
                 
                 if not title or len(title) < 5: continue
                 
-                # Check for duplicacy
+                # Check for duplicacy (exact title first, near-duplicates once we have the content)
                 if Article.objects.filter(title=title).exists():
                     continue
 
@@ -80,14 +71,8 @@ class Command(BaseCommand):
                         article_cat = Category.objects.get(name=name)
                         break
 
-                # 3. Extract Image
-                img_url = None
-                img_tag = item.find('img')
-                if img_tag:
-                    if 'data-src' in img_tag.attrs:
-                        img_url = img_tag['data-src']
-                    elif 'src' in img_tag.attrs:
-                        img_url = img_tag['src']
+                # 3. Image
+                img_url = item['image']
                 
                 # 4. Fetch Article Content (Detail Page)
                 # Optimization: For now, just use title as excerpt. 
@@ -99,32 +84,34 @@ class Command(BaseCommand):
                 if count < 5: 
                     try:
                         art_resp = requests.get(link, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-                        art_soup = BeautifulSoup(art_resp.content, 'html.parser')
                         # OK full content usually in <div class="ok18-single-post-content-wrap">
-                        main_content = art_soup.find('div', class_='ok18-single-post-content-wrap')
-                        if main_content:
-                            paragraphs = main_content.find_all('p')
-                            content = "\n\n".join([p.get_text() for p in paragraphs])
-                            if paragraphs:
-                                excerpt = paragraphs[0].get_text()[:200]
+                        paragraphs = parse_detail(art_resp.content)
+                        if paragraphs:
+                            content = "\n\n".join(paragraphs)
+                            excerpt = paragraphs[0][:200]
                     except:
                         pass # Fallback to default content
 
+                # Skip stories we already have under a slightly edited title
+                signature = minhash(title, content)
+                if find_near_duplicates(signature=signature):
+                    self.stdout.write(f'Skipped near-duplicate: {title[:30]}...')
+                    continue
+
                 # 5. Save to DB
+                # Nepali titles slugify to an empty string, so the slug is keyed on the
+                # fingerprint, which is stable across runs for the same story.
+                fingerprint = hashlib.blake2b(pack(signature), digest_size=8).hexdigest()
+                title_slug = slugify(title)[:33].strip('-')
                 article = Article(
                     title=title,
-                    slug=slugify(title[:30] + "-" + str(datetime.now().timestamp())),
-                    # If title is Nepali, slugify might be empty. OK URLs usually satisfy this.
-                    # We will use a fallback slug if necessary
+                    slug=f"{title_slug}-{fingerprint}" if title_slug else f"news-{fingerprint}",
                     category=article_cat,
                     content=content,
                     excerpt=excerpt,
                     status='published',
                     views=0
                 )
-                
-                if not article.slug:
-                    article.slug = f"news-{datetime.now().timestamp()}-{count}"
 
                 if img_url:
                     try:
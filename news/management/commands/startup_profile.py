@@ -0,0 +1,123 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Measure cold start: import time per module (python -X importtime), wall time of '
+            'management commands, and time from server start to first response')
+
+    def add_arguments(self, parser):
+        parser.add_argument('commands', nargs='*', default=['check'],
+                            help='Commands to time, quoted with their arguments, e.g. "seed_categories"')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per command')
+        parser.add_argument('--top', type=int, default=20, help='Modules to list')
+        parser.add_argument('--settings-module', action='append', dest='settings_modules',
+                            help='Settings to compare (repeatable); default: the current ones')
+        parser.add_argument('--server', action='store_true',
+                            help='Also time runserver from start to the first response on /')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        modules = options['settings_modules'] or [os.environ['DJANGO_SETTINGS_MODULE']]
+        for module in modules:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{module}'))
+            env = dict(os.environ, DJANGO_SETTINGS_MODULE=module)
+            for command in options['commands']:
+                self.report_imports(command, env, options['top'])
+                self.report_wall_time(command, env, options['repeat'])
+            if options['server']:
+                self.report_first_response(env, options['port'])
+
+    def manage(self, *args, python_args=()):
+        return [sys.executable, *python_args, str(settings.BASE_DIR / 'manage.py'), *args]
+
+    def report_imports(self, command, env, top):
+        result = subprocess.run(
+            self.manage(*command.split(), python_args=['-X', 'importtime']),
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'{command} failed:\n{result.stderr[-2000:]}')
+        modules = parse_importtime(result.stderr)
+        total = sum(self_us for _, self_us, _ in modules)
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write(f'\n{command}: {len(modules)} modules imported in {total / 1000:.0f} ms')
+        self.stdout.write(f'  {"package":40} {"ms":>8}')
+        for name, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+            self.stdout.write(f'  {name:40} {self_us / 1000:8.1f}')
+        self.stdout.write(f'  {"slowest modules (incl. their imports)":40} {"ms":>8}')
+        for name, _, cumulative in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+            self.stdout.write(f'  {name:40} {cumulative / 1000:8.1f}')
+
+    def report_wall_time(self, command, env, repeat):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(self.manage(*command.split()), env=env, cwd=settings.BASE_DIR,
+                           capture_output=True, check=True)
+            times.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(self.style.SUCCESS(
+            f'{command}: wall time min {min(times):.0f} ms, median {statistics.median(times):.0f} ms ({repeat} runs)'
+        ))
+
+    def report_first_response(self, env, port):
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            self.manage('runserver', '--noreload', f'127.0.0.1:{port}'),
+            env=env, cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if server.poll() is not None:
+                    raise CommandError('runserver exited before listening')
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.perf_counter() - start > 60:
+                        raise CommandError(f'runserver not listening on port {port} after 60s')
+                    time.sleep(0.01)
+            listening = (time.perf_counter() - start) * 1000
+            first, status = self.timed_get(port)
+            second, _ = self.timed_get(port)
+        finally:
+            server.terminate()
+            server.wait()
+        self.stdout.write(self.style.SUCCESS(
+            f'runserver: listening after {listening:.0f} ms, first response {first:.0f} ms (HTTP {status}), '
+            f'next {second:.0f} ms; first response {listening + first:.0f} ms after start'
+        ))
+
+    def timed_get(self, port):
+        # Not rate limited: localhost is allow-listed
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=60) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        return (time.perf_counter() - start) * 1000, status
+
+
+def parse_importtime(stderr):
+    """[(module, self µs, cumulative µs)] from `python -X importtime` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative)))
+    return modules
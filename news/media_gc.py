@@ -0,0 +1,112 @@
+"""
+Finding media files that nothing references any more.
+
+Deleting or archiving an article, replacing its image, or re-running the
+scraper leaves the old file behind in MEDIA_ROOT. Files are never removed
+when a row goes away (an archived copy may still point at the same image),
+so `manage.py gc_media` sweeps them up instead: it compares a walk of the
+media folder with every path the database still references.
+"""
+import os
+import shutil
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import Article, ArchivedArticle, SiteConfiguration
+
+QUARANTINE_DIR = '.quarantine'
+USAGE_CACHE_KEY = 'news:media_usage'
+USAGE_TIMEOUT = 15 * 60
+
+# (model, file field) pairs that point into MEDIA_ROOT
+REFERENCES = [
+    (Article, 'image'),
+    (ArchivedArticle, 'image'),
+    (SiteConfiguration, 'logo'),
+    (SiteConfiguration, 'favicon'),
+]
+
+
+def referenced_paths():
+    """Every media path stored in the database, streamed in chunks."""
+    paths = set()
+    for model, field in REFERENCES:
+        values = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+        paths.update(values.values_list(field, flat=True).iterator(chunk_size=5000))
+    return paths
+
+
+def walk(root=None, include_quarantine=False):
+    """Yields (relative path with '/' separators, size, mtime) for every file under root."""
+    root = root or settings.MEDIA_ROOT
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if include_quarantine or entry.name != QUARANTINE_DIR:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    rel = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                    yield rel, stat.st_size, stat.st_mtime
+
+
+def find_orphans(min_age=24 * 3600):
+    """Yields (path, size) of unreferenced files older than min_age seconds.
+
+    The age check skips uploads whose row isn't committed yet.
+    """
+    referenced = referenced_paths()
+    cutoff = time.time() - min_age
+    for path, size, mtime in walk():
+        if path not in referenced and mtime < cutoff:
+            yield path, size
+
+
+def remove(paths, quarantine=False):
+    """Delete files (or move them under MEDIA_ROOT/.quarantine). Returns bytes freed."""
+    freed = 0
+    for path in paths:
+        source = os.path.join(settings.MEDIA_ROOT, path)
+        try:
+            size = os.path.getsize(source)
+            if quarantine:
+                target = os.path.join(settings.MEDIA_ROOT, QUARANTINE_DIR, path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(source, target)
+            else:
+                os.remove(source)
+        except FileNotFoundError:
+            continue
+        freed += size
+    return freed
+
+
+def usage_by_directory():
+    """[{directory, files, bytes}] for the top-level media folders, biggest first."""
+    usage = {}
+    for path, size, _ in walk(include_quarantine=True):
+        directory = path.split('/', 1)[0] if '/' in path else '.'
+        files, total = usage.get(directory, (0, 0))
+        usage[directory] = (files + 1, total + size)
+    rows = [{'directory': d, 'files': f, 'bytes': b} for d, (f, b) in usage.items()]
+    return sorted(rows, key=lambda r: r['bytes'], reverse=True)
+
+
+def get_usage():
+    # Walking the media folder on every dashboard load would be slow on big sites
+    usage = cache.get(USAGE_CACHE_KEY)
+    if usage is None:
+        usage = usage_by_directory()
+        cache.set(USAGE_CACHE_KEY, usage, USAGE_TIMEOUT)
+    return usage
+
+
+def invalidate_usage():
+    cache.delete(USAGE_CACHE_KEY)
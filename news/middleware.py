@@ -1,4 +1,9 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.urls import resolve, Resolver404
 from .models_activity import ActivityLog
+from . import cachebus, profiling, ratelimit
 
 class ActivityLogMiddleware:
     def __init__(self, get_response):
@@ -33,3 +38,137 @@ class ActivityLogMiddleware:
             )
 
         return response
+
+
+class ProfilingMiddleware:
+    """
+    Records per-view timings, DB queries, template render time, cache hits
+    and response size (see news/profiling.py and the dashboard performance page).
+    """
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        profiling.install_template_timer()
+        profiling.install_query_wrapper()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = profiling.start_request()
+        start = time.perf_counter()
+        try:
+            # A staff member asked for a cProfile capture of this view's next request
+            if profiling.has_armed() and profiling.take_armed(self.resolve_view_name(request)):
+                response = profiling.run_profiled(request.path, self.get_response, request)
+            else:
+                response = self.get_response(request)
+        except Exception:
+            profiling.discard_request(token)
+            raise
+        self.finish(request, response, token, start)
+        return response
+
+    async def __acall__(self, request):
+        token = profiling.start_request()
+        start = time.perf_counter()
+        try:
+            if profiling.has_armed() and profiling.take_armed(self.resolve_view_name(request)):
+                response = await profiling.arun_profiled(request.path, self.get_response, request)
+            else:
+                response = await self.get_response(request)
+        except Exception:
+            profiling.discard_request(token)
+            raise
+        self.finish(request, response, token, start)
+        return response
+
+    def finish(self, request, response, token, start):
+        duration = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        size = 0 if response.streaming else len(response.content)
+        profiling.finish_request(token, view_name, duration, size)
+
+    def resolve_view_name(self, request):
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return None
+
+
+class CacheBusMiddleware:
+    """Drops local cache entries that other processes invalidated (news/cachebus.py)."""
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        cachebus.poll()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # The poll reads the database, at most once per POLL_INTERVAL
+        if cachebus.due():
+            await sync_to_async(cachebus.poll)()
+        return await self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """Token buckets per client IP and route class (see news/ratelimit.py)."""
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # The handler calls process_view in the same mode as the middleware chain
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        # In async mode this returns the coroutine for the handler to await
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = ratelimit.classify(request, request.resolver_match.url_name)
+        if route is None or request.user.is_staff:
+            return None
+        ip = ratelimit.client_ip(request)
+        if ratelimit.is_allowed(ip):
+            ratelimit.count(route, 'bypassed')
+            return None
+        return self.limit(ratelimit.crawler_route(request, route, ip), ip)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        route = ratelimit.classify(request, request.resolver_match.url_name)
+        if route is None or (await request.auser()).is_staff:
+            return None
+        ip = ratelimit.client_ip(request)
+        if ratelimit.is_allowed(ip):
+            ratelimit.count(route, 'bypassed')
+            return None
+        if ratelimit.claims_crawler(request, route):
+            # The DNS lookups block; off the event loop
+            route = await sync_to_async(ratelimit.crawler_route, thread_sensitive=False)(request, route, ip)
+        return self.limit(route, ip)
+
+    def limit(self, route, ip):
+        # Cache reads and writes only
+        wait = ratelimit.take(route, ip)
+        if wait:
+            ratelimit.count(route, 'limited')
+            response = HttpResponse('Too many requests, please slow down.', status=429, content_type='text/plain')
+            response['Retry-After'] = str(ratelimit.retry_after(wait))
+            return response
+        ratelimit.count(route, 'allowed')
+        return None
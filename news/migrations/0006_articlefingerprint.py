@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 17:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_article_is_deleted_delete_activitylog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.BinaryField()),
+                ('band0', models.PositiveIntegerField(db_index=True)),
+                ('band1', models.PositiveIntegerField(db_index=True)),
+                ('band2', models.PositiveIntegerField(db_index=True)),
+                ('band3', models.PositiveIntegerField(db_index=True)),
+                ('band4', models.PositiveIntegerField(db_index=True)),
+                ('band5', models.PositiveIntegerField(db_index=True)),
+                ('band6', models.PositiveIntegerField(db_index=True)),
+                ('band7', models.PositiveIntegerField(db_index=True)),
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint', to='news.article')),
+            ],
+        ),
+    ]
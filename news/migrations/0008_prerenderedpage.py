@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_activitylog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrerenderedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('rendered_version', models.PositiveIntegerField(default=0)),
+                ('rendered_at', models.DateTimeField(blank=True, null=True)),
+                ('size', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
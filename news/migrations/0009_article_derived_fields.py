@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_prerenderedpage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='body_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='first_image',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='summary',
+            field=models.CharField(blank=True, editable=False, help_text='Plain-text start of the body', max_length=300),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_article_published_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveIntegerField(unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('category_slug', models.SlugField()),
+                ('author_name', models.CharField(blank=True, max_length=150)),
+                ('tags', models.JSONField(default=list, help_text='[{name, slug}]')),
+                ('comments', models.JSONField(default=list, help_text='[{name, email, body, is_approved, created_at}]')),
+                ('image', models.ImageField(blank=True, upload_to='articles/')),
+                ('excerpt', models.TextField(blank=True)),
+                ('content', models.TextField()),
+                ('body_html', models.TextField(blank=True)),
+                ('word_count', models.PositiveIntegerField(default=0)),
+                ('reading_time', models.PositiveSmallIntegerField(default=0)),
+                ('summary', models.CharField(blank=True, max_length=300)),
+                ('first_image', models.CharField(blank=True, max_length=500)),
+                ('status', models.CharField(max_length=10)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('published_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
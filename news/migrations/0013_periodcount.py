@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-19 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def count_periods(apps, schema_editor):
+    # Same counts as `manage.py rebuild_period_counts`, written out against the
+    # historical models so later changes to news.date_archive can't break it
+    from collections import Counter
+    from django.db import router
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate
+    YEAR, MONTH, DAY = 1, 2, 3
+    Article = apps.get_model('news', 'Article')
+    ArchivedArticle = apps.get_model('news', 'ArchivedArticle')
+    Category = apps.get_model('news', 'Category')
+    PeriodCount = apps.get_model('news', 'PeriodCount')
+    alias = schema_editor.connection.alias
+    if not router.allow_migrate_model(alias, PeriodCount):
+        return  # `migrate --database archive`
+
+    def days(model, category_field):
+        return (
+            model.objects.filter(status='published', is_deleted=False)
+            .annotate(day=TruncDate('published_at'))
+            .values_list(category_field, 'day')
+            .annotate(n=Count('id'))
+            .order_by()
+            .iterator()
+        )
+
+    rows = list(days(Article, 'category_id'))
+    # Archived articles stay counted. An archive in its own database may not be
+    # migrated yet; rebuild_period_counts counts it later.
+    if router.db_for_read(ArchivedArticle) == alias:
+        categories = dict(Category.objects.values_list('slug', 'id'))
+        rows += [(categories[slug], day, n) for slug, day, n in days(ArchivedArticle, 'category_slug') if slug in categories]
+    found = Counter()
+    for category_id, day, n in rows:
+        found[category_id, YEAR, f'{day.year:04d}'] += n
+        found[category_id, MONTH, f'{day.year:04d}-{day.month:02d}'] += n
+        found[category_id, DAY, day.isoformat()] += n
+    PeriodCount.objects.bulk_create([
+        PeriodCount(category_id=category_id, level=level, period=period, count=n)
+        for (category_id, level, period), n in found.items()
+    ], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_cacheversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('period', models.CharField(max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_counts', to='news.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['level', 'period'], name='periodcount_level_idx')],
+                'constraints': [models.UniqueConstraint(fields=('category', 'period'), name='periodcount_unique')],
+            },
+        ),
+        migrations.RunPython(count_periods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 17:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0013_periodcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveSmallIntegerField(choices=[(1, 'Hourly'), (2, 'Daily')])),
+                ('start', models.DateField(help_text='The day (hourly) or first of the month (daily)')),
+                ('buckets', models.BinaryField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_series', to='news.article')),
+            ],
+            options={
+                'verbose_name_plural': 'View series',
+                'indexes': [models.Index(fields=['resolution', 'start'], name='viewseries_range_idx')],
+                'constraints': [models.UniqueConstraint(fields=('article', 'resolution', 'start'), name='viewseries_unique')],
+            },
+        ),
+    ]
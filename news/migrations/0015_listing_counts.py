@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-19 17:54
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_articles(apps, schema_editor):
+    Article = apps.get_model('news', 'Article')
+    published = Q(status='published', is_deleted=False)
+    for model, lookup in ((apps.get_model('news', 'Category'), 'category'), (apps.get_model('news', 'Tag'), 'tags')):
+        counts = (
+            Article.objects.filter(published, **{lookup: OuterRef('pk')})
+            .order_by().values(lookup).annotate(n=Count('id')).values('n')
+        )
+        model.objects.update(article_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0014_viewseries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='article_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Published articles'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='listing_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='article_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Published articles'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='listing_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_articles, migrations.RunPython.noop),
+    ]
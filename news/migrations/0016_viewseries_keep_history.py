@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0015_listing_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='viewseries',
+            name='article',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='view_series', to='news.article'),
+        ),
+    ]
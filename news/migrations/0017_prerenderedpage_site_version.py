@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0016_viewseries_keep_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prerenderedpage',
+            name='site_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
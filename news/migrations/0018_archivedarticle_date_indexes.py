@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0017_prerenderedpage_site_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedarticle',
+            index=models.Index(fields=['-published_at', '-id'], name='archived_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedarticle',
+            index=models.Index(fields=['category_slug', '-published_at'], name='archived_category_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 15:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0018_archivedarticle_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='published_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
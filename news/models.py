@@ -1,11 +1,23 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
 from .models_config import SiteConfiguration
+from .models_dedup import ArticleFingerprint
+from .models_activity import ActivityLog
+from .models_prerender import PrerenderedPage
+from .models_archive import ArchivedArticle
+from .models_cachebus import CacheVersion
+from .models_periods import PeriodCount
+from .models_analytics import ViewSeries
+from . import article_body
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True, blank=True)
+    # Maintained by news/listings.py; `manage.py check_listing_counts` repairs drift
+    article_count = models.PositiveIntegerField(default=0, editable=False, help_text="Published articles")
+    listing_version = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -21,6 +33,9 @@ class Category(models.Model):
 class Tag(models.Model):
     name = models.CharField(max_length=50)
     slug = models.SlugField(unique=True, blank=True)
+    # Maintained by news/listings.py, like Category's
+    article_count = models.PositiveIntegerField(default=0, editable=False, help_text="Published articles")
+    listing_version = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -50,18 +65,53 @@ class Article(models.Model):
     is_deleted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    published_at = models.DateTimeField(auto_now=True)
+    # Set when the article goes live and left alone by later edits, so its
+    # place in listings and the date archive doesn't move
+    published_at = models.DateTimeField(default=timezone.now)
+
+    # Derived from content on save (news/article_body.py), so pages never
+    # have to process the full body. Backfill with `manage.py backfill_article_body`.
+    body_html = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Minutes")
+    summary = models.CharField(max_length=300, blank=True, editable=False, help_text="Plain-text start of the body")
+    first_image = models.CharField(max_length=500, blank=True, editable=False)
+
+    # Status as last loaded or saved; None when unknown (new or deferred)
+    _saved_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        article = super().from_db(db, field_names, values)
+        article._saved_status = article.__dict__.get('status')
+        return article
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        update_fields = kwargs.get('update_fields')
+        if self.status == 'published' and self._saved_status not in (None, 'published'):
+            # A draft going live is dated now
+            self.published_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields = set(update_fields) | {'published_at'}
+        if update_fields is None:
+            article_body.apply(self)
+        elif {'content', 'image'} & set(update_fields):
+            article_body.apply(self)
+            kwargs['update_fields'] = set(update_fields) | set(article_body.DERIVED_FIELDS)
         super().save(*args, **kwargs)
+        self._saved_status = self.status
 
     def __str__(self):
         return self.title
     
     class Meta:
         ordering = ['-published_at']
+        indexes = [
+            # Listings and the admin changelist order by this
+            models.Index(fields=['-published_at', '-id'], name='article_published_idx'),
+        ]
 
 class Comment(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='comments')
@@ -0,0 +1,30 @@
+from django.db import models
+
+class ViewSeries(models.Model):
+    # Views of one article as packed little-endian uint32 buckets (see
+    # news/analytics.py): an hourly row covers one UTC day in 24 buckets, a
+    # daily row one month in 31. Hourly rows are rolled up into daily ones.
+    # Deleting an article keeps its history: archived articles keep their id
+    # as ArchivedArticle.original_id, and merge_duplicates moves the rows.
+    HOURLY, DAILY = 1, 2
+    RESOLUTION_CHOICES = ((HOURLY, 'Hourly'), (DAILY, 'Daily'))
+
+    article = models.ForeignKey(
+        'news.Article', on_delete=models.DO_NOTHING, db_constraint=False, related_name='view_series',
+    )
+    resolution = models.PositiveSmallIntegerField(choices=RESOLUTION_CHOICES)
+    start = models.DateField(help_text="The day (hourly) or first of the month (daily)")
+    buckets = models.BinaryField()
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "View series"
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'resolution', 'start'], name='viewseries_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['resolution', 'start'], name='viewseries_range_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} {self.get_resolution_display()} {self.start}: {self.total}"
@@ -0,0 +1,57 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils.dateparse import parse_datetime
+
+class ArchivedArticle(models.Model):
+    # Cold copy of an Article moved out of news_article by `archive_articles`.
+    # No foreign keys, so the table can live in a separate database
+    # (see news/routers.py); category, author, tags and comments are copied in.
+    original_id = models.PositiveIntegerField(unique=True)
+    title = models.CharField(max_length=200)
+    # Not unique: a new article may reuse the slug of an archived one
+    slug = models.SlugField()
+    category_name = models.CharField(max_length=100)
+    category_slug = models.SlugField()
+    author_name = models.CharField(max_length=150, blank=True)
+    tags = models.JSONField(default=list, help_text="[{name, slug}]")
+    comments = models.JSONField(default=list, help_text="[{name, email, body, is_approved, created_at}]")
+    image = models.ImageField(upload_to='articles/', blank=True)
+    excerpt = models.TextField(blank=True)
+    content = models.TextField()
+    body_html = models.TextField(blank=True)
+    word_count = models.PositiveIntegerField(default=0)
+    reading_time = models.PositiveSmallIntegerField(default=0)
+    summary = models.CharField(max_length=300, blank=True)
+    first_image = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=10)
+    is_featured = models.BooleanField(default=False)
+    views = models.PositiveIntegerField(default=0)
+    is_deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    published_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Date archive listings (news/date_archive.py), like article_published_idx
+        indexes = [
+            models.Index(fields=['-published_at', '-id'], name='archived_published_idx'),
+            models.Index(fields=['category_slug', '-published_at'], name='archived_category_idx'),
+        ]
+
+    # Stand-ins so article_detail.html renders an archived article unchanged
+    @property
+    def category(self):
+        from .models import Category
+        return Category(name=self.category_name, slug=self.category_slug)
+
+    @property
+    def author(self):
+        return User(username=self.author_name) if self.author_name else None
+
+    def approved_comments(self):
+        comments = [dict(c, created_at=parse_datetime(c['created_at'])) for c in self.comments if c['is_approved']]
+        return sorted(comments, key=lambda c: c['created_at'], reverse=True)
+
+    def __str__(self):
+        return self.title
@@ -0,0 +1,10 @@
+from django.db import models
+
+class CacheVersion(models.Model):
+    # One row per cache topic; bumped by news.cachebus.publish() and polled
+    # by every worker process to find out what to evict.
+    topic = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.topic} v{self.version}"
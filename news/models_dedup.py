@@ -0,0 +1,19 @@
+from django.db import models
+
+class ArticleFingerprint(models.Model):
+    # MinHash signature of title + body (32 x 32-bit ints, packed) plus its
+    # eight LSH bands. Near-duplicates share at least one band with high
+    # probability, so candidate lookups only hit the band indexes.
+    article = models.OneToOneField('news.Article', on_delete=models.CASCADE, related_name='fingerprint')
+    signature = models.BinaryField()
+    band0 = models.PositiveIntegerField(db_index=True)
+    band1 = models.PositiveIntegerField(db_index=True)
+    band2 = models.PositiveIntegerField(db_index=True)
+    band3 = models.PositiveIntegerField(db_index=True)
+    band4 = models.PositiveIntegerField(db_index=True)
+    band5 = models.PositiveIntegerField(db_index=True)
+    band6 = models.PositiveIntegerField(db_index=True)
+    band7 = models.PositiveIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"Fingerprint of article #{self.article_id}"
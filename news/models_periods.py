@@ -0,0 +1,24 @@
+from django.db import models
+
+class PeriodCount(models.Model):
+    # Published articles per category per year ('2025'), month ('2025-03')
+    # and day ('2025-03-14'). Kept up to date by news/date_archive.py so
+    # the date archive never runs COUNT/GROUP BY at request time.
+    YEAR, MONTH, DAY = 1, 2, 3
+
+    category = models.ForeignKey('news.Category', on_delete=models.CASCADE, related_name='period_counts')
+    level = models.PositiveSmallIntegerField()
+    period = models.CharField(max_length=10)
+    # Signed: a decrement racing a rebuild may briefly dip below zero
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'period'], name='periodcount_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['level', 'period'], name='periodcount_level_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.category_id}: {self.count}"
@@ -0,0 +1,15 @@
+from django.db import models
+
+class PrerenderedPage(models.Model):
+    # Manifest of pages written to PRERENDER_ROOT. A page is stale while
+    # version > rendered_version, or while site_version is behind the site-wide
+    # version (news/prerender.py); saves bump those, prerender_site catches up.
+    path = models.CharField(max_length=255, unique=True)
+    version = models.PositiveIntegerField(default=1)
+    rendered_version = models.PositiveIntegerField(default=0)
+    site_version = models.PositiveBigIntegerField(default=0)
+    rendered_at = models.DateTimeField(null=True, blank=True)
+    size = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.path
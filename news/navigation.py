@@ -0,0 +1,57 @@
+"""
+Navigation menu (categories + published article counts) shared by every
+public page through the `navigation` context processor.
+
+The menu is kept in two layers: a per-process copy with a short TTL, and the
+shared Django cache. Signals in news/signals.py call invalidate_navigation()
+when categories or article publish state change, which reaches the other
+worker processes through news/cachebus.py.
+"""
+import time
+from django.core.cache import cache
+from . import cachebus
+from .models import Category
+from .profiling import record_cache
+
+CACHE_KEY = 'news:navigation'
+CACHE_TIMEOUT = 60 * 60
+# Safety net only: other processes normally drop their copy within cachebus.POLL_INTERVAL
+LOCAL_TTL = 5 * 60
+
+_local = {'menu': None, 'expires': 0}
+
+
+def build_navigation():
+    # article_count is kept up to date by news/listings.py
+    categories = Category.objects.order_by('id')
+    return [
+        {'id': cat.id, 'name': cat.name, 'slug': cat.slug, 'article_count': cat.article_count}
+        for cat in categories
+    ]
+
+
+def get_navigation():
+    now = time.monotonic()
+    if _local['menu'] is not None and _local['expires'] > now:
+        record_cache(hit=True)
+        return _local['menu']
+
+    menu = cache.get(CACHE_KEY)
+    record_cache(hit=menu is not None)
+    if menu is None:
+        menu = build_navigation()
+        cache.set(CACHE_KEY, menu, CACHE_TIMEOUT)
+    _local['menu'] = menu
+    _local['expires'] = now + LOCAL_TTL
+    return menu
+
+
+def _evict():
+    _local['menu'] = None
+    cache.delete(CACHE_KEY)
+
+cachebus.register('navigation', _evict)
+
+
+def invalidate_navigation():
+    cachebus.publish('navigation')
@@ -0,0 +1,69 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_rows(model, using='default'):
+    """The database's own row estimate for a table, or None where there isn't one (SQLite)."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s', [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # reltuples is -1 for a table that was never analysed
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists on million-row tables, where COUNT(*) is
+    a full scan. Unfiltered lists use the database's row estimate when it has
+    one; otherwise counting stops after COUNT_LIMIT rows, so only that many
+    rows can be paged through (filter or search to narrow it down).
+    """
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset.model, queryset.db)
+            if estimate and estimate > self.COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:self.COUNT_LIMIT].count()
+
+
+class MergedList:
+    """
+    Querysets of the same kind of rows (say Article and ArchivedArticle),
+    read as one list ordered by -published_at, -pk for a Paginator with a
+    known count. A page fetches only (published_at, pk) for the rows up to
+    its end from each queryset, merges them, and loads the page's rows in full.
+    """
+    ordered = True
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        keys = []
+        for n, queryset in enumerate(self.querysets):
+            rows = queryset.order_by('-published_at', '-pk').values_list('published_at', 'pk')[:stop]
+            keys += [(published_at, n, pk) for published_at, pk in rows]
+        keys = sorted(keys, reverse=True)[start:stop]
+        found = [
+            queryset.in_bulk([pk for _, m, pk in keys if m == n]) if any(m == n for _, m, _ in keys) else {}
+            for n, queryset in enumerate(self.querysets)
+        ]
+        return [found[n][pk] for _, n, pk in keys if pk in found[n]]
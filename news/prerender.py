@@ -0,0 +1,169 @@
+"""
+Static pre-rendering of public pages to PRERENDER_ROOT.
+
+Every page is written as <path>/index.html with .gz (and .br, if the brotli
+package is installed) siblings, so a front web server can serve it
+directly, e.g. nginx with gzip_static and
+`try_files /prerendered$uri/index.html @django` for GET requests without a
+query string.
+
+Only the first page of listings is pre-rendered; ?page=N goes to Django.
+When an article changes, mark_stale() deletes the affected files (so the
+front server falls back to Django straight away) and bumps their version in
+the PrerenderedPage manifest; `prerender_site --stale` rebuilds them.
+Changes to what every page shows (nav categories, header, footer) only bump
+the site-wide version, one row in news.cachebus: the pages keep being served
+as they are until prerender_site has rewritten them.
+"""
+import gzip
+import os
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db.models import F, Q
+from django.http import Http404, HttpResponseNotFound
+from django.urls import resolve, reverse
+from django.utils import timezone
+from .models import Article, Category, Tag, PrerenderedPage
+from . import cachebus
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SITE_TOPIC = 'prerender'
+# Paths / ids per query, well below SQLite's limit on query parameters
+CHUNK_SIZE = 500
+
+
+def _chunks(items):
+    items = list(items)
+    for i in range(0, len(items), CHUNK_SIZE):
+        yield items[i:i + CHUNK_SIZE]
+
+
+def output_dir(path):
+    return os.path.join(settings.PRERENDER_ROOT, path.strip('/'))
+
+
+def home_path():
+    return reverse('home')
+
+
+def article_path(slug):
+    return reverse('article_detail', kwargs={'slug': slug})
+
+
+def category_path(slug):
+    return reverse('category_detail', kwargs={'slug': slug})
+
+
+def tag_path(slug):
+    return reverse('tag_detail', kwargs={'slug': slug})
+
+
+def all_paths():
+    paths = [home_path()]
+    published = Article.objects.filter(status='published', is_deleted=False)
+    paths += [article_path(slug) for slug in published.values_list('slug', flat=True).iterator()]
+    paths += [category_path(slug) for slug in Category.objects.values_list('slug', flat=True)]
+    paths += [tag_path(slug) for slug in Tag.objects.values_list('slug', flat=True).iterator()]
+    return paths
+
+
+def affected_paths(article):
+    """Pages that show this article."""
+    paths = [home_path(), article_path(article.slug), category_path(article.category.slug)]
+    paths += [tag_path(slug) for slug in article.tags.values_list('slug', flat=True)]
+    return paths
+
+
+def tag_paths(ids):
+    return [
+        tag_path(slug) for chunk in _chunks(ids)
+        for slug in Tag.objects.filter(pk__in=chunk).values_list('slug', flat=True)
+    ]
+
+
+def article_paths(ids):
+    return [
+        article_path(slug) for chunk in _chunks(ids)
+        for slug in Article.objects.filter(pk__in=chunk).values_list('slug', flat=True)
+    ]
+
+
+def remove_files(path):
+    directory = output_dir(path)
+    for name in ('index.html', 'index.html.gz', 'index.html.br'):
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def mark_stale(paths=None):
+    """Mark pages stale and remove their files. None means every page: that
+    only bumps the site-wide version, and the files stay until rewritten."""
+    if paths is None:
+        cachebus.publish(SITE_TOPIC)
+        return
+    for chunk in _chunks(paths):
+        PrerenderedPage.objects.bulk_create([PrerenderedPage(path=p) for p in chunk], ignore_conflicts=True)
+        PrerenderedPage.objects.filter(path__in=chunk).update(version=F('version') + 1)
+        for path in chunk:
+            remove_files(path)
+
+
+def stale_pages():
+    """({path: version}, site version) for the pages prerender_site --stale rebuilds."""
+    site_version = cachebus.version(SITE_TOPIC)
+    pages = PrerenderedPage.objects.filter(Q(version__gt=F('rendered_version')) | Q(site_version__lt=site_version))
+    return dict(pages.values_list('path', 'version').iterator()), site_version
+
+
+def write_atomic(filename, data):
+    tmp = f'{filename}.tmp{os.getpid()}'
+    with open(tmp, 'wb') as fp:
+        fp.write(data)
+    os.replace(tmp, filename)
+
+
+def render_page(path):
+    """Render one page through its view and write it. Returns (path, status, bytes written)."""
+    # django.test is slow to import and only prerender_site gets here
+    from django.test import RequestFactory
+    request = RequestFactory().get(path)
+    # Tells views not to count this as a reader visit
+    request.prerender = True
+    match = resolve(path)
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    try:
+        # Drafts open by link, but only published articles get a static copy
+        if match.url_name == 'article_detail' and not Article.objects.filter(
+            slug=match.kwargs['slug'], status='published', is_deleted=False,
+        ).exists():
+            raise Http404
+        response = view(request, *match.args, **match.kwargs)
+    except Http404:
+        response = HttpResponseNotFound()
+
+    if response.status_code != 200:
+        remove_files(path)
+        return path, response.status_code, 0
+
+    directory = output_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    html = os.path.join(directory, 'index.html')
+    write_atomic(html, response.content)
+    write_atomic(html + '.gz', gzip.compress(response.content, compresslevel=9))
+    if brotli is not None:
+        write_atomic(html + '.br', brotli.compress(response.content))
+    return path, 200, len(response.content)
+
+
+def record_rendered(path, version, site_version, size):
+    # If the page was marked stale again while rendering, version is now
+    # ahead of what we rendered and it stays stale for the next run.
+    PrerenderedPage.objects.filter(path=path).update(
+        rendered_version=version, site_version=site_version, rendered_at=timezone.now(), size=size,
+    )
@@ -0,0 +1,255 @@
+"""
+In-memory request profiling used by ProfilingMiddleware and the
+dashboard performance page.
+
+Stats are kept per worker process since it started: a ring buffer of the
+last SAMPLES_PER_VIEW requests for each view (percentiles are computed when
+the dashboard reads them) plus the slowest SQL seen for that view.
+"""
+import cProfile
+import heapq
+import io
+import pstats
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+SAMPLES_PER_VIEW = 500
+WORST_QUERIES_PER_VIEW = 5
+
+_current = ContextVar('request_stats', default=None)
+_lock = threading.Lock()
+_views = {}
+_armed = set()      # view names whose next request gets a cProfile capture
+_profiles = {}      # request path -> (captured at, pstats text)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'template_time', 'cache_hits', 'cache_misses', 'slow_queries')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.slow_queries = []
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        # Only keep this request's slowest few
+        item = (duration, sql)
+        if len(self.slow_queries) < WORST_QUERIES_PER_VIEW:
+            heapq.heappush(self.slow_queries, item)
+        elif item > self.slow_queries[0]:
+            heapq.heapreplace(self.slow_queries, item)
+
+
+class ViewStats:
+    def __init__(self):
+        self.count = 0
+        # (total, db, queries, template, size, cache hits, cache misses)
+        self.samples = deque(maxlen=SAMPLES_PER_VIEW)
+        self.worst_queries = []
+
+    def add(self, duration, stats, size):
+        self.count += 1
+        self.samples.append((
+            duration, stats.db_time, stats.queries, stats.template_time,
+            size, stats.cache_hits, stats.cache_misses,
+        ))
+        for item in stats.slow_queries:
+            if len(self.worst_queries) < WORST_QUERIES_PER_VIEW:
+                heapq.heappush(self.worst_queries, item)
+            elif item > self.worst_queries[0]:
+                heapq.heapreplace(self.worst_queries, item)
+
+    def summary(self, name):
+        samples = list(self.samples)
+        durations = sorted(s[0] for s in samples)
+        n = len(samples)
+        hits = sum(s[5] for s in samples)
+        lookups = hits + sum(s[6] for s in samples)
+        return {
+            'view': name,
+            'count': self.count,
+            'p50': percentile(durations, 50) * 1000,
+            'p95': percentile(durations, 95) * 1000,
+            'p99': percentile(durations, 99) * 1000,
+            'db_ms': sum(s[1] for s in samples) / n * 1000,
+            'queries': sum(s[2] for s in samples) / n,
+            'template_ms': sum(s[3] for s in samples) / n * 1000,
+            'size_kb': sum(s[4] for s in samples) / n / 1024,
+            'cache_hit_rate': hits / lookups * 100 if lookups else None,
+            'worst_queries': [
+                {'ms': d * 1000, 'sql': sql} for d, sql in sorted(self.worst_queries, reverse=True)
+            ],
+        }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# --- Hooks called while a request is running ---
+
+def query_wrapper(execute, sql, params, many, context):
+    """Execute wrapper counting and timing every query of the current request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, time.perf_counter() - start)
+
+
+def record_cache(hit):
+    stats = _current.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def _add_query_wrapper(sender, connection, **kwargs):
+    # First in the list: connection.execute_wrapper() blocks pop the last one
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_wrapper)
+
+
+def install_query_wrapper():
+    """Put query_wrapper on every database connection, in every thread.
+
+    Async views run their queries in sync_to_async and fetch-pool threads, so
+    a wrapper around the middleware's own call wouldn't see them. Outside a
+    request query_wrapper does nothing.
+    """
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    connection_created.connect(_add_query_wrapper, dispatch_uid='news.profiling.query_wrapper')
+    for connection in connections.all(initialized_only=True):
+        _add_query_wrapper(None, connection)
+
+
+_template_timer_installed = False
+
+def install_template_timer():
+    """Wrap the Django template backend's render() to time it per request."""
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return original_render(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+
+    Template.render = render
+    _template_timer_installed = True
+
+
+# --- Request lifecycle (used by ProfilingMiddleware) ---
+
+def start_request():
+    return _current.set(RequestStats())
+
+
+def finish_request(token, view_name, duration, size):
+    stats = _current.get()
+    _current.reset(token)
+    with _lock:
+        view = _views.get(view_name)
+        if view is None:
+            view = _views[view_name] = ViewStats()
+        view.add(duration, stats, size)
+
+
+def discard_request(token):
+    _current.reset(token)
+
+
+def has_armed():
+    return bool(_armed)
+
+
+def take_armed(view_name):
+    """True (once) if a cProfile capture was requested for this view."""
+    if view_name not in _armed:
+        return False
+    with _lock:
+        if view_name in _armed:
+            _armed.discard(view_name)
+            return True
+    return False
+
+
+def _keep_profile(label, profiler):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(40)
+    with _lock:
+        _profiles[label] = (time.time(), out.getvalue())
+
+
+def run_profiled(label, func, *args):
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    _keep_profile(label, profiler)
+    return result
+
+
+async def arun_profiled(label, func, *args):
+    # Profiles the event loop thread only: code in sync_to_async threads is
+    # missing, other requests served meanwhile are in it
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = await func(*args)
+    finally:
+        profiler.disable()
+    _keep_profile(label, profiler)
+    return result
+
+
+# --- Read side (dashboard) ---
+
+def arm_profile(view_name):
+    with _lock:
+        _armed.add(view_name)
+
+
+def armed_views():
+    return sorted(_armed)
+
+
+def view_summaries():
+    with _lock:
+        summaries = [view.summary(name) for name, view in _views.items() if view.samples]
+    return sorted(summaries, key=lambda s: s['p95'], reverse=True)
+
+
+def captured_profiles():
+    with _lock:
+        return sorted(_profiles.items(), key=lambda item: item[1][0], reverse=True)
+
+
+def reset():
+    with _lock:
+        _views.clear()
+        _profiles.clear()
+        _armed.clear()
@@ -0,0 +1,152 @@
+"""
+Token-bucket rate limiting per client IP and route class.
+
+Buckets live in the Django cache, so a check is one cache get and one set
+and never touches the database. With the default LocMemCache the buckets are
+per worker process; point CACHES at a shared backend (memcached, Redis) to
+limit across workers. The get/set pair isn't atomic, so a client racing
+itself on several workers can get a few extra requests through; that is
+fine for throttling crawlers and spam.
+
+Policies, allow-lists and the client IP header are in settings (RATE_LIMITS
+and friends). Allowed / limited counters are kept in the cache as well, for
+the dashboard performance page and dashboard/ratelimit.json.
+"""
+import ipaddress
+import math
+import socket
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+# URL names -> route class. Anything not listed (dashboard, admin, the ticker
+# stream, static files) is not limited.
+PUBLIC_VIEWS = {
+    'home', 'article_detail', 'article_comment', 'comment_token', 'category_detail', 'tag_detail', 'date_archive',
+}
+PAGED_VIEWS = {'category_detail', 'tag_detail', 'date_archive'}
+
+COUNTER_KEY = 'news:ratelimit:count:{}:{}'
+BUCKET_KEY = 'news:ratelimit:bucket:{}:{}'
+CRAWLER_KEY = 'news:ratelimit:crawler:{}'
+CRAWLER_CACHE_SECONDS = 24 * 60 * 60
+
+
+def classify(request, url_name):
+    """Route class for this request, or None if it isn't limited."""
+    if url_name not in PUBLIC_VIEWS:
+        return None
+    if request.method == 'POST':
+        return 'comment' if url_name == 'article_comment' else None
+    if url_name in PAGED_VIEWS and request.GET.get('page', '1') not in ('', '1'):
+        # Deep pagination is what crawlers walk; readers rarely go far
+        return 'paging'
+    return 'page'
+
+
+def client_ip(request):
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', 'REMOTE_ADDR')
+    if header == 'REMOTE_ADDR':
+        return request.META.get('REMOTE_ADDR', '')
+    # X-Forwarded-For style lists: each trusted proxy appends the address it
+    # got the request from. Anything to the left of those came from the
+    # client and can be made up, so count hops from the right.
+    hops = [a.strip() for a in request.META.get(header, '').split(',') if a.strip()]
+    proxies = getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 1)
+    if len(hops) < proxies:
+        return request.META.get('REMOTE_ADDR', '')
+    return hops[-proxies]
+
+
+def _allowed_networks():
+    return [ipaddress.ip_network(n, strict=False) for n in getattr(settings, 'RATE_LIMIT_ALLOWED_IPS', [])]
+
+
+def is_allowed(ip):
+    """Allow-listed networks (RATE_LIMIT_ALLOWED_IPS)."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks())
+
+
+def is_verified_crawler(ip, domains):
+    """Forward-confirmed reverse DNS: ip -> host in one of domains -> back to ip."""
+    try:
+        host = socket.gethostbyaddr(ip)[0].lower().rstrip('.')
+        if not host.endswith(tuple(domains)):
+            return False
+        return ip in {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except (OSError, UnicodeError):
+        return False
+
+
+def claims_crawler(request, route):
+    """The domains of the crawler this read-only request's user agent names, or None."""
+    if route == 'comment' or 'crawler' not in settings.RATE_LIMITS:
+        return None
+    agent = request.headers.get('User-Agent', '').lower()
+    return next((
+        domains for name, domains in getattr(settings, 'RATE_LIMIT_CRAWLERS', {}).items() if name.lower() in agent
+    ), None)
+
+
+def crawler_route(request, route, ip):
+    """'crawler' for read-only requests from a verified search engine crawler, else route.
+
+    Anyone can send a crawler's user agent, so the claim is checked with DNS
+    (cached per IP for CRAWLER_CACHE_SECONDS) and verified crawlers still get
+    a bucket, just a larger one.
+    """
+    domains = claims_crawler(request, route)
+    if not domains:
+        return route
+    key = CRAWLER_KEY.format(ip)
+    verified = cache.get(key)
+    if verified is None:
+        verified = is_verified_crawler(ip, domains)
+        cache.set(key, verified, CRAWLER_CACHE_SECONDS)
+    return 'crawler' if verified else route
+
+
+def take(route, ip, now=None):
+    """Take one token from the client's bucket. Returns seconds to wait, 0 if allowed."""
+    policy = settings.RATE_LIMITS.get(route)
+    if not policy:
+        return 0
+    burst, period = policy['burst'], policy['period']
+    rate = burst / period  # tokens per second
+    now = time.time() if now is None else now
+
+    key = BUCKET_KEY.format(route, ip)
+    tokens, updated = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens < 1:
+        cache.set(key, (tokens, now), period)
+        return (1 - tokens) / rate
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def count(route, outcome):
+    key = COUNTER_KEY.format(route, outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def retry_after(wait):
+    return max(1, math.ceil(wait))
+
+
+def counters():
+    """{route: {'allowed': n, 'limited': n, 'bypassed': n}} across all policies."""
+    stats = {}
+    for route in settings.RATE_LIMITS:
+        keys = {outcome: COUNTER_KEY.format(route, outcome) for outcome in ('allowed', 'limited', 'bypassed')}
+        values = cache.get_many(keys.values())
+        stats[route] = {outcome: values.get(key, 0) for outcome, key in keys.items()}
+    return stats
@@ -0,0 +1,29 @@
+from django.conf import settings
+
+ARCHIVE_DB = 'archive'
+
+
+def archive_db():
+    """Database alias holding ArchivedArticle: 'archive' if configured, else 'default'."""
+    return ARCHIVE_DB if ARCHIVE_DB in settings.DATABASES else 'default'
+
+
+class ArchiveRouter:
+    """Sends ArchivedArticle to the optional 'archive' database (a separate SQLite file, say)."""
+
+    def _is_archive(self, model):
+        return model._meta.app_label == 'news' and model._meta.model_name == 'archivedarticle'
+
+    def db_for_read(self, model, **hints):
+        return archive_db() if self._is_archive(model) else None
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if ARCHIVE_DB not in settings.DATABASES:
+            return None
+        if app_label == 'news' and model_name == 'archivedarticle':
+            return db == ARCHIVE_DB
+        if db == ARCHIVE_DB:
+            return False
+        return None
@@ -0,0 +1,173 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Article, Category, Comment, SiteConfiguration, Tag
+from .dedup import index_article
+from .navigation import invalidate_navigation
+from .ticker import broadcaster
+from . import autocomplete, cachebus, date_archive, listings, prerender
+
+# Fields that feed the near-duplicate fingerprint
+FINGERPRINT_FIELDS = {'title', 'content'}
+
+@receiver(post_save, sender=Article)
+def update_article_fingerprint(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Skip fixture loading and partial saves that don't touch the text (e.g. view counts)
+    if raw or (update_fields and not FINGERPRINT_FIELDS & set(update_fields)):
+        return
+    index_article(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    invalidate_navigation()
+
+
+@receiver(post_save, sender=SiteConfiguration)
+def site_configuration_changed(sender, **kwargs):
+    cachebus.publish('site_config')
+
+@receiver(post_save, sender=SiteConfiguration)
+def push_breaking_news(sender, instance, **kwargs):
+    # Readers connected to this process get the new ticker right away
+    broadcaster.publish(instance.breaking_news_title, instance.breaking_news_content)
+
+
+# --- Pre-rendered pages (news/prerender.py) ---
+
+def _views_only(update_fields):
+    return bool(update_fields) and set(update_fields) <= {'views'}
+
+def _stale(paths):
+    prerender.mark_stale(list(dict.fromkeys(paths)))
+
+@receiver(pre_save, sender=Article)
+def remember_article_pages(sender, instance, update_fields=None, **kwargs):
+    # Pages showing the article as stored: its old slug, category and tags
+    if _views_only(update_fields) or not instance.pk:
+        return
+    saved = Article.objects.select_related('category').filter(pk=instance.pk).first()
+    instance._shown_on = prerender.affected_paths(saved) if saved else []
+
+@receiver(post_save, sender=Article)
+def article_pages_stale(sender, instance, update_fields=None, **kwargs):
+    if _views_only(update_fields):
+        return
+    _stale(instance.__dict__.pop('_shown_on', []) + prerender.affected_paths(instance))
+
+@receiver(pre_delete, sender=Article)
+def remember_deleted_article_pages(sender, instance, **kwargs):
+    # The through rows are gone by post_delete
+    instance._shown_on = prerender.affected_paths(instance)
+
+@receiver(post_delete, sender=Article)
+def deleted_article_pages_stale(sender, instance, **kwargs):
+    _stale(instance.__dict__.pop('_shown_on', []))
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        # Only the ids that are linked now; clear() has no pk_set
+        instance._untagged_ids = listings.linked_ids(instance, reverse, pk_set)
+        return
+    if action == 'post_add':
+        ids = pk_set
+    elif action in ('post_remove', 'post_clear'):
+        ids = instance.__dict__.pop('_untagged_ids', [])
+    else:
+        return
+    if reverse:
+        # tag.articles.add() / remove(): the tag's page and the articles' own pages
+        _stale([prerender.tag_path(instance.slug)] + prerender.article_paths(ids))
+    else:
+        _stale(prerender.affected_paths(instance) + prerender.tag_paths(ids))
+
+@receiver(post_save, sender=Comment)
+def article_comments_changed(sender, instance, **kwargs):
+    if instance.is_approved:
+        prerender.mark_stale([prerender.article_path(instance.article.slug)])
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SiteConfiguration)
+def all_pages_stale(sender, **kwargs):
+    # Nav menu, header and footer are on every page: one version bump, and
+    # prerender_site --stale rewrites them
+    prerender.mark_stale()
+
+
+# --- Dashboard tag / category pickers (news/autocomplete.py) ---
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tags_changed(sender, **kwargs):
+    autocomplete.invalidate('tags')
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def categories_changed(sender, **kwargs):
+    autocomplete.invalidate('categories')
+
+
+# --- Date archive counts (news/date_archive.py) ---
+
+def _tracks(update_fields):
+    return not update_fields or bool(date_archive.TRACKED_FIELDS & set(update_fields))
+
+@receiver(pre_save, sender=Article)
+def remember_saved_state(sender, instance, update_fields=None, raw=False, **kwargs):
+    # The instance may have been edited since it was loaded, so ask the database
+    if raw or not _tracks(update_fields):
+        return
+    row = None
+    if instance.pk:
+        row = Article.objects.filter(pk=instance.pk).values('category_id', 'status', 'is_deleted', 'published_at').first()
+    instance._saved_state = row and Article(**row)
+
+@receiver(post_save, sender=Article)
+def update_period_counts(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not _tracks(update_fields):
+        return
+    before = getattr(instance, '_saved_state', None)
+    date_archive.apply(date_archive.changes(date_archive.state(before), date_archive.state(instance)))
+
+@receiver(post_delete, sender=Article)
+def remove_from_period_counts(sender, instance, **kwargs):
+    date_archive.apply(date_archive.changes(date_archive.state(instance), None))
+
+
+# --- Category / tag article counts and listing caches (news/listings.py) ---
+
+@receiver(post_save, sender=Article)
+def update_listing_counts(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not _tracks(update_fields):
+        return
+    if listings.article_saved(getattr(instance, '_saved_state', None), instance):
+        # The nav menu shows the category counts; evicted after they're updated
+        invalidate_navigation()
+
+@receiver(pre_delete, sender=Article)
+def remember_listed_tags(sender, instance, **kwargs):
+    # The through rows are gone by post_delete
+    instance._listed_tag_ids = listings.tag_ids(instance) if listings.is_listed(instance) else []
+
+@receiver(post_delete, sender=Article)
+def remove_from_listing_counts(sender, instance, **kwargs):
+    if listings.article_deleted(instance, getattr(instance, '_listed_tag_ids', [])):
+        invalidate_navigation()
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def update_tag_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        instance._unlinked_ids = listings.linked_ids(instance, reverse, pk_set)
+        return
+    if action == 'post_add':
+        ids, delta = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        ids, delta = instance.__dict__.pop('_unlinked_ids', []), -1
+    else:
+        return
+    if reverse:
+        listings.articles_changed(instance, ids, delta)
+    else:
+        listings.tags_changed(instance, ids, delta)
@@ -0,0 +1,19 @@
+// Select2 pickers for AutocompleteSelect / AutocompleteSelectMultiple (news/forms.py)
+jQuery(function ($) {
+    $('select[data-autocomplete-url]').each(function () {
+        var $select = $(this);
+        $select.select2({
+            width: '100%',
+            allowClear: !this.multiple,
+            placeholder: '---------',
+            ajax: {
+                url: $select.data('autocomplete-url'),
+                dataType: 'json',
+                delay: 200,
+                data: function (params) {
+                    return {q: params.term || '', page: params.page || 1};
+                }
+            }
+        });
+    });
+});
@@ -1,3 +1,1303 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import zipfile
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template.defaultfilters import linebreaks
+from django.urls import reverse
+from django.utils import timezone
+from . import analytics, archive, article_body, autocomplete, cachebus, concurrent, date_archive, dedup, exports, html_parsing, listings, media_gc, navigation, prerender, profiling, ratelimit, warmup
+from .context_processors import site_configuration
+from .forms import ArticleForm
+from .models import ActivityLog, ArchivedArticle, Article, ArticleFingerprint, Category, Comment, PeriodCount, PrerenderedPage, SiteConfiguration, Tag, ViewSeries
+from .navigation import get_navigation
+from .paginators import EstimatedCountPaginator
+from .ticker import Broadcaster, event_id
 
-# Create your tests here.
+class BreakingNewsStreamTests(TestCase):
+    async def test_many_subscribers_receive_update(self):
+        hub = Broadcaster()
+        hub.publish('BREAKING', 'First headline')
+        streams = [hub.subscribe() for _ in range(2000)]
+
+        # Each reader gets the retry hint, then the current ticker
+        first = await asyncio.gather(*(s.__anext__() for s in streams))
+        self.assertTrue(all(chunk.startswith('retry:') for chunk in first))
+        current = await asyncio.gather(*(s.__anext__() for s in streams))
+        self.assertTrue(all('First headline' in chunk for chunk in current))
+        self.assertEqual(hub.subscribers, 2000)
+
+        # All of them are idle now; one publish wakes every one
+        pending = [asyncio.ensure_future(s.__anext__()) for s in streams]
+        await asyncio.sleep(0)
+        hub.publish('BREAKING', 'Second headline')
+        updates = await asyncio.wait_for(asyncio.gather(*pending), timeout=10)
+        expected = f"id: {event_id('BREAKING', 'Second headline')}"
+        self.assertTrue(all(chunk.startswith(expected) for chunk in updates))
+
+        await asyncio.gather(*(s.aclose() for s in streams))
+        self.assertEqual(hub.subscribers, 0)
+
+    async def test_reconnect_with_last_event_id_skips_seen_event(self):
+        hub = Broadcaster()
+        hub.publish('BREAKING', 'Already seen')
+        stream = hub.subscribe(last_event_id=event_id('BREAKING', 'Already seen'))
+        await stream.__anext__()  # retry hint
+
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.05)
+        self.assertFalse(pending.done())
+
+        hub.publish('BREAKING', 'Fresh news')
+        chunk = await asyncio.wait_for(pending, timeout=5)
+        self.assertIn('Fresh news', chunk)
+        await stream.aclose()
+
+    async def test_stream_view_pushes_saved_ticker(self):
+        await sync_to_async(SiteConfiguration.objects.create)(breaking_news_content='Saved from dashboard')
+        response = await self.async_client.get(reverse('breaking_news_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        self.assertIn(b'Saved from dashboard', await anext(chunks))
+        await chunks.aclose()
+
+    def test_wsgi_fallback_returns_snapshot(self):
+        SiteConfiguration.objects.create(breaking_news_content='Polling readers')
+        response = self.client.get(reverse('breaking_news_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn(b'Polling readers', response.content)
+
+        seen = event_id('BREAKING', 'Polling readers')
+        response = self.client.get(reverse('breaking_news_stream'), headers={'Last-Event-ID': seen})
+        self.assertNotIn(b'Polling readers', response.content)
+
+
+def cache_worker(ready, results, timeout):
+    # A forked "worker process": warm the local caches, then serve polls until
+    # the other process's edits show up.
+    request = RequestFactory().get('/')
+    def seen():
+        return (
+            [c['name'] for c in get_navigation()],
+            site_configuration(request)['site_config'].site_name,
+        )
+    cachebus.poll(force=True)
+    ready.put(seen())
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        cachebus.poll()
+        if seen() == (['After'], 'Edited'):
+            results.put(time.monotonic())
+            return
+        time.sleep(0.02)
+    results.put(None)
+
+@skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+class CacheBusTests(TransactionTestCase):
+    @mock.patch.object(cachebus, 'POLL_INTERVAL', 0.5)
+    def test_other_processes_evict_within_poll_interval(self):
+        category = Category.objects.create(name='Before')
+        config = SiteConfiguration.objects.create(site_name='Original')
+        connections.close_all()  # children must open their own connections
+
+        ctx = multiprocessing.get_context('fork')
+        ready, results = ctx.Queue(), ctx.Queue()
+        workers = [ctx.Process(target=cache_worker, args=(ready, results, 10)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        try:
+            for _ in workers:
+                self.assertEqual(ready.get(timeout=10), (['Before'], 'Original'))
+
+            # Same as dashboard_category_edit / dashboard_settings in another worker
+            category.name = 'After'
+            category.save()
+            config.site_name = 'Edited'
+            config.save()
+            saved = time.monotonic()
+
+            for _ in workers:
+                evicted = results.get(timeout=15)
+                self.assertIsNotNone(evicted, 'a worker kept serving stale data')
+                self.assertLess(evicted - saved, cachebus.POLL_INTERVAL + 1)
+        finally:
+            for worker in workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+
+    def test_publish_is_not_applied_before_rollback(self):
+        evicted = []
+        cachebus.register('test-topic', lambda: evicted.append(True))
+        try:
+            from django.db import transaction
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                cachebus.publish('test-topic')
+                raise RuntimeError
+            self.assertEqual(evicted, [])
+            cachebus.publish('test-topic')
+            self.assertEqual(evicted, [True])
+        finally:
+            cachebus._handlers.pop('test-topic')
+
+
+class NavigationTests(TestCase):
+    def setUp(self):
+        navigation._evict()
+        self.addCleanup(navigation._evict)
+        self.news = Category.objects.create(name='News')
+
+    def names(self):
+        return [c['name'] for c in get_navigation()]
+
+    def test_menu_is_queried_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(), ['News'])
+        with self.assertNumQueries(0):
+            self.names()
+        # Another process: nothing local yet, but the shared cache has it
+        navigation._local['menu'] = None
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['News'])
+
+    def test_changes_refresh_the_menu_once_committed(self):
+        self.names()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Sport')
+        self.assertEqual(self.names(), ['News', 'Sport'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(title='Counted', category=self.news, image='a.jpg', status='published')
+        self.assertEqual(get_navigation()[0]['article_count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            article.status = 'draft'
+            article.save()
+        self.assertEqual(get_navigation()[0]['article_count'], 0)
+
+    def test_pages_take_the_menu_from_the_context_processor(self):
+        Category.objects.create(name='Sport')
+        self.names()
+        response = self.client.get(reverse('home'))
+        self.assertEqual([c['name'] for c in response.context['nav_categories']], ['News', 'Sport'])
+        self.assertContains(response, reverse('category_detail', args=['sport']))
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+        self.news = Category.objects.create(name='News')
+        Article.objects.create(title='Profiled', category=self.news, image='a.jpg', status='published')
+
+    def summary(self, view_name):
+        return next(s for s in profiling.view_summaries() if s['view'] == view_name)
+
+    def test_requests_are_recorded_per_view(self):
+        for _ in range(2):
+            self.client.get(reverse('category_detail', args=['news']))
+        self.client.get(reverse('home'))
+
+        listing = self.summary('category_detail')
+        self.assertEqual(listing['count'], 2)
+        self.assertGreater(listing['queries'], 0)
+        self.assertGreater(listing['size_kb'], 0)
+        self.assertTrue(listing['worst_queries'])
+        self.assertIn('SELECT', listing['worst_queries'][0]['sql'])
+        # The async home page runs its queries in other threads; they still count
+        self.assertGreater(self.summary('home')['queries'], 0)
+
+    def test_only_the_slowest_queries_are_kept(self):
+        stats = profiling.RequestStats()
+        for n in range(20):
+            stats.record_query(f'SELECT {n}', n / 1000)
+        self.assertEqual(stats.queries, 20)
+        self.assertEqual(sorted(sql for _, sql in stats.slow_queries), [f'SELECT {n}' for n in range(15, 20)])
+        self.assertEqual(profiling.percentile([], 95), 0.0)
+        self.assertEqual(profiling.percentile([1, 2, 3, 4], 50), 3)
+
+    def test_dashboard_arms_a_profile_for_the_next_request(self):
+        self.client.force_login(User.objects.create_user('editor', is_staff=True))
+        self.client.post(reverse('dashboard_performance'), {'profile_view': 'category_detail'})
+        self.assertEqual(profiling.armed_views(), ['category_detail'])
+
+        path = reverse('category_detail', args=['news'])
+        self.client.get(path)
+        self.assertEqual(profiling.armed_views(), [])
+        self.assertEqual([label for label, _ in profiling.captured_profiles()], [path])
+
+        response = self.client.get(reverse('dashboard_performance'))
+        self.assertContains(response, 'category_detail')
+        self.client.post(reverse('dashboard_performance'), {'reset': '1'})
+        self.assertEqual(profiling.captured_profiles(), [])
+
+
+class ArticleBodyTests(TestCase):
+    CONTENT = 'First <b>paragraph</b>\nsame one.\n\nSecond, see https://example.com/photo.JPG?w=300 for more.'
+
+    def setUp(self):
+        self.news = Category.objects.create(name='News')
+
+    def test_derived_fields_are_stored_on_save(self):
+        article = Article.objects.create(title='Body', category=self.news, image='', content=self.CONTENT)
+        article.refresh_from_db()
+        self.assertEqual(article.body_html, linebreaks(self.CONTENT, autoescape=True))
+        self.assertIn('&lt;b&gt;', article.body_html)
+        self.assertEqual(article.word_count, 9)
+        self.assertEqual(article.reading_time, 1)
+        self.assertEqual(article.summary, ' '.join(self.CONTENT.split()))
+        self.assertEqual(article.first_image, 'https://example.com/photo.JPG?w=300')
+
+    def test_partial_saves_refresh_them_only_when_the_body_changes(self):
+        article = Article.objects.create(title='Body', category=self.news, image='articles/a.jpg', content='Short')
+        self.assertEqual(article.first_image, 'articles/a.jpg')
+        article.content = ' '.join(['word'] * 450)
+        article.save(update_fields=['content'])
+        article.refresh_from_db()
+        self.assertEqual((article.word_count, article.reading_time), (450, 2))
+        self.assertEqual(len(article.summary), article_body.SUMMARY_LENGTH)
+
+        Article.objects.filter(pk=article.pk).update(word_count=0)
+        article.views = 3
+        article.save(update_fields=['views'])
+        article.refresh_from_db()
+        self.assertEqual(article.word_count, 0)
+
+    def test_backfill_fills_in_articles_saved_without_them(self):
+        article = Article.objects.create(title='Body', category=self.news, image='', content=self.CONTENT)
+        empty = Article.objects.create(title='Empty', category=self.news, image='', content='')
+        Article.objects.filter(pk__in=[article.pk, empty.pk]).update(body_html='', word_count=0, summary='')
+        call_command('backfill_article_body', '--batch-size', '1', stdout=io.StringIO())
+        article.refresh_from_db()
+        self.assertEqual(article.word_count, 9)
+        self.assertTrue(article.body_html.startswith('<p>'))
+        self.assertEqual(Article.objects.get(pk=empty.pk).body_html, '')
+
+    def test_article_page_shows_the_stored_html(self):
+        article = Article.objects.create(title='Body', category=self.news, image='', content='Plain', status='published')
+        Article.objects.filter(pk=article.pk).update(body_html='<p>Stored copy</p>')
+        self.assertContains(self.client.get(reverse('article_detail', args=[article.slug])), '<p>Stored copy</p>')
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        for kind in autocomplete.MODELS:
+            autocomplete._evict(kind)
+            self.addCleanup(autocomplete._evict, kind)
+        self.news = Category.objects.create(name='News')
+        names = ['Election', 'election results', 'Electric cars', 'Economy', 'निर्वाचन', 'Sport']
+        self.tags = {name: Tag.objects.create(name=name) for name in names}
+        popular = Article.objects.create(title='Popular', category=self.news, image='a.jpg')
+        popular.tags.add(self.tags['Electric cars'])
+        self.client.force_login(User.objects.create_user('editor', is_staff=True))
+
+    def get(self, kind='tags', **params):
+        return self.client.get(reverse(f'dashboard_autocomplete_{kind}'), params).json()
+
+    @mock.patch.object(autocomplete, 'HOT_SIZE', 1)
+    def test_prefix_matches_rank_popular_names_first(self):
+        data = self.get(q='  ELEC')
+        self.assertEqual([r['text'] for r in data['results']], ['Electric cars', 'Election', 'election results'])
+        self.assertEqual(data['pagination'], {'more': False})
+        self.assertEqual([r['text'] for r in self.get(q='निर्')['results']], ['निर्वाचन'])
+        self.assertEqual(self.get(kind='categories', q='n')['results'], [{'id': self.news.pk, 'text': 'News'}])
+
+    def test_empty_term_lists_the_hot_set(self):
+        self.assertEqual(self.get()['results'][0]['text'], 'Electric cars')
+
+    @mock.patch.object(autocomplete, 'LIMIT', 2)
+    def test_results_are_paged(self):
+        first, second = self.get(q='e'), self.get(q='e', page=2)
+        self.assertTrue(first['pagination']['more'])
+        self.assertFalse(second['pagination']['more'])
+        texts = [r['text'] for r in first['results'] + second['results']]
+        self.assertEqual(sorted(texts), ['Economy', 'Election', 'Electric cars', 'election results'])
+        self.assertEqual(self.get(q='e', page='x')['results'], first['results'])
+
+    def test_keystrokes_run_no_queries_until_tags_change(self):
+        autocomplete.search('tags', 'e')
+        with self.assertNumQueries(0):
+            autocomplete.search('tags', 'el')
+            autocomplete.search('tags', 'ele', page=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Elephants')
+        self.assertIn('Elephants', [name for _, name in autocomplete.search('tags', 'ele')[0]])
+
+    def test_staff_only(self):
+        self.client.logout()
+        response = self.client.get(reverse('dashboard_autocomplete_tags'), {'q': 'e'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_article_form_renders_only_the_selected_options(self):
+        article = Article.objects.create(title='Tagged', category=self.news, image='a.jpg')
+        article.tags.add(self.tags['Economy'])
+        html = str(ArticleForm(instance=article)['tags']) + str(ArticleForm(instance=article)['category'])
+        self.assertIn('Economy', html)
+        self.assertNotIn('Sport', html)
+        self.assertIn(reverse('dashboard_autocomplete_tags'), html)
+        self.assertIn(f'value="{self.news.pk}" selected', html)
+
+
+class LargeTableAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        self.news = Category.objects.create(name='News')
+        self.tag = Tag.objects.create(name='Rare')
+
+    def add_articles(self, n):
+        for i in range(n):
+            article = Article.objects.create(title=f'Listed {i}', slug=f'listed-{i}-{Article.objects.count()}',
+                                             category=self.news, image='a.jpg', content='x ' * 1000)
+            article.tags.add(self.tag)
+            Comment.objects.create(article=article, name='Reader', email='r@example.com', body='Hi')
+
+    def test_counting_stops_at_the_limit(self):
+        self.add_articles(5)
+        with mock.patch.object(EstimatedCountPaginator, 'COUNT_LIMIT', 3):
+            self.assertEqual(EstimatedCountPaginator(Comment.objects.order_by('id'), 2).count, 3)
+            self.assertEqual(EstimatedCountPaginator(Comment.objects.filter(name='Nobody').order_by('id'), 2).count, 0)
+        self.assertEqual(EstimatedCountPaginator(Comment.objects.order_by('id'), 2).count, 5)
+
+    # Its once-every-POLL_INTERVAL query would land in whichever request is due
+    @mock.patch.object(cachebus, 'poll')
+    def test_changelist_queries_dont_grow_with_the_table(self, poll):
+        urls = [
+            reverse('admin:news_article_changelist'),
+            reverse('admin:news_article_changelist') + f'?tag={self.tag.pk}&status__exact=draft',
+            reverse('admin:news_comment_changelist'),
+            reverse('admin:news_activitylog_changelist'),
+        ]
+        self.add_articles(2)
+        ActivityLog.objects.create(user=User.objects.get(), action='GET /', ip_address='127.0.0.1')
+
+        def queries(url):
+            with CaptureQueriesContext(connections['default']) as captured:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return captured
+
+        for url in urls:
+            queries(url)  # site configuration, hot tags and the like get cached
+        before = {url: len(queries(url)) for url in urls}
+        self.add_articles(8)
+        for url in urls:
+            with self.subTest(url=url):
+                captured = queries(url)
+                self.assertEqual(len(captured), before[url])
+                self.assertFalse(any('"content"' in q['sql'] for q in captured if 'news_article' in q['sql']))
+
+    def test_tag_filter_offers_a_selected_tag_outside_the_hot_set(self):
+        self.add_articles(1)
+        with mock.patch.object(autocomplete, 'HOT_SIZE', 0):
+            autocomplete._evict('tags')
+            self.addCleanup(autocomplete._evict, 'tags')
+            response = self.client.get(reverse('admin:news_article_changelist') + f'?tag={self.tag.pk}')
+        self.assertContains(response, 'Rare')
+        self.assertContains(response, 'Listed 0')
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.news = Category.objects.create(name='News')
+        self.reporter = User.objects.create_user('reporter')
+        self.tag = Tag.objects.create(name='Flood')
+        self.old = self.article('Old flood', days=400, views=12)
+        self.old.tags.add(self.tag)
+        Comment.objects.create(article=self.old, name='Reader', email='r@example.com', body='Stay safe', is_approved=True)
+        self.recent = self.article('Recent', days=10)
+
+    def article(self, title, days, **fields):
+        article = Article.objects.create(title=title, category=self.news, author=self.reporter, image='a.jpg',
+                                         content='Body text', status='published', **fields)
+        Article.objects.filter(pk=article.pk).update(published_at=timezone.now() - timedelta(days=days))
+        return article
+
+    def archive(self, *args):
+        out = io.StringIO()
+        call_command('archive_articles', '--pause', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_old_articles_move_and_keep_their_url(self):
+        self.assertIn('1 articles would be archived.', self.archive('--dry-run'))
+        self.assertTrue(Article.objects.filter(pk=self.old.pk).exists())
+
+        self.assertIn('Archived 1 articles', self.archive())
+        self.assertEqual(list(Article.objects.values_list('pk', flat=True)), [self.recent.pk])
+        archived = ArchivedArticle.objects.get(original_id=self.old.pk)
+        self.assertEqual((archived.category_slug, archived.author_name, archived.views), ('news', 'reporter', 12))
+        self.assertEqual(archived.tags, [{'name': 'Flood', 'slug': 'flood'}])
+        self.assertEqual([c['body'] for c in archived.comments], ['Stay safe'])
+
+        response = self.client.get(reverse('article_detail', args=[self.old.slug]))
+        self.assertContains(response, 'Old flood')
+        self.assertContains(response, 'Stay safe')
+
+    def test_restore_brings_everything_back(self):
+        published_at = Article.objects.get(pk=self.old.pk).published_at
+        self.archive()
+        self.assertIn('Restored old-flood', self.archive('--restore', 'old-flood'))
+        self.assertFalse(ArchivedArticle.objects.exists())
+
+        article = Article.objects.get(slug='old-flood')
+        self.assertEqual((article.published_at, article.views, article.author), (published_at, 12, self.reporter))
+        self.assertEqual(list(article.tags.all()), [self.tag])
+        self.assertEqual(list(article.comments.values_list('body', flat=True)), ['Stay safe'])
+
+        with self.assertRaises(CommandError):
+            self.archive('--restore', 'old-flood')
+
+    def test_trashed_articles_go_after_the_trash_delay(self):
+        trashed = self.article('Trashed', days=5, is_deleted=True)
+        Article.objects.filter(pk=trashed.pk).update(updated_at=timezone.now() - timedelta(days=40))
+        self.archive()
+        self.assertEqual(set(ArchivedArticle.objects.values_list('original_id', flat=True)), {self.old.pk, trashed.pk})
+        # Trashed articles aren't served from the archive
+        self.assertEqual(self.client.get(reverse('article_detail', args=[trashed.slug])).status_code, 404)
+
+    def test_separate_archive_database_keeps_articles_edited_during_the_copy(self):
+        other = self.article('Also old', days=500)
+        copy = archive._copy
+
+        # Another writer gets in between the copy and the delete
+        def copy_then_edit(rows):
+            with mock.patch.object(archive, 'archive_db', return_value='default'):
+                copy(rows)
+            Article.objects.filter(pk=other.pk).update(title='Edited', updated_at=timezone.now())
+            Comment.objects.create(article=self.old, name='Late', email='l@example.com', body='Late comment')
+
+        with mock.patch.object(archive, 'archive_db', return_value='archive'), \
+                mock.patch.object(archive, '_copy', side_effect=copy_then_edit):
+            self.assertEqual(archive.archive_batch([self.old.pk, other.pk]), 1)
+
+        self.assertEqual(Article.objects.get(pk=other.pk).title, 'Edited')
+        archived = ArchivedArticle.objects.get()
+        self.assertEqual(archived.original_id, self.old.pk)
+        self.assertEqual([c['body'] for c in archived.comments], ['Stay safe', 'Late comment'])
+
+
+class MediaGcTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        override = self.settings(MEDIA_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        day_old = time.time() - 2 * 24 * 3600
+        for path in ['articles/live.jpg', 'articles/cold.jpg', 'site/logo.png', 'articles/orphan.jpg',
+                     'scraped/2020/orphan.jpg', '.quarantine/articles/earlier.jpg']:
+            self.write(path, mtime=day_old)
+        self.write('articles/uploading.jpg')
+
+        news = Category.objects.create(name='News')
+        Article.objects.create(title='Live', category=news, image='articles/live.jpg')
+        SiteConfiguration.objects.create(logo='site/logo.png')
+        ArchivedArticle.objects.create(original_id=999, title='Cold', slug='cold', category_name='News',
+                                       category_slug='news', image='articles/cold.jpg', published_at=timezone.now(),
+                                       created_at=timezone.now(), updated_at=timezone.now())
+
+    def write(self, path, mtime=None):
+        full = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'wb') as fp:
+            fp.write(b'x' * 100)
+        if mtime:
+            os.utime(full, (mtime, mtime))
+
+    def files(self):
+        return sorted(path for path, _, _ in media_gc.walk(include_quarantine=True))
+
+    def gc(self, *args):
+        out = io.StringIO()
+        call_command('gc_media', *args, stdout=out)
+        return out.getvalue()
+
+    def test_only_old_orphans_are_deleted(self):
+        before = self.files()
+        self.assertIn('2 orphaned files, 200\xa0bytes would be reclaimed.', self.gc('--dry-run'))
+        self.assertEqual(self.files(), before)
+
+        self.assertIn('Deleted 2 orphaned files', self.gc('--batch-size', '1'))
+        self.assertEqual(self.files(), [
+            '.quarantine/articles/earlier.jpg', 'articles/cold.jpg', 'articles/live.jpg',
+            'articles/uploading.jpg', 'site/logo.png',
+        ])
+
+    def test_quarantine_moves_orphans_aside(self):
+        self.gc('--quarantine')
+        self.assertEqual(self.files(), [
+            '.quarantine/articles/earlier.jpg', '.quarantine/articles/orphan.jpg', '.quarantine/scraped/2020/orphan.jpg',
+            'articles/cold.jpg', 'articles/live.jpg', 'articles/uploading.jpg', 'site/logo.png',
+        ])
+        # Quarantined files are not collected again
+        self.assertIn('Quarantined 0 orphaned files', self.gc('--quarantine'))
+
+    def test_usage_is_totalled_per_top_level_folder(self):
+        self.assertEqual(media_gc.usage_by_directory()[0], {'directory': 'articles', 'files': 4, 'bytes': 400})
+        self.assertEqual({row['directory'] for row in media_gc.usage_by_directory()},
+                         {'articles', 'site', 'scraped', '.quarantine'})
+
+
+class ColdStartTests(TestCase):
+    def run_manage(self, *argv, environ=None):
+        import manage
+        environ = dict(environ or {})
+        with mock.patch.dict(os.environ, environ, clear=False), \
+                mock.patch('sys.argv', ['manage.py', *argv]), \
+                mock.patch('django.core.management.execute_from_command_line') as execute:
+            if 'DJANGO_SETTINGS_MODULE' not in environ:
+                os.environ.pop('DJANGO_SETTINGS_MODULE', None)
+            manage.main()
+            return os.environ['DJANGO_SETTINGS_MODULE'], execute.call_args.args[0][1:]
+
+    def test_lean_commands_get_lean_settings_and_skip_checks(self):
+        self.assertEqual(self.run_manage('gc_media', '--dry-run'),
+                         ('myproject.settings_lean', ['gc_media', '--dry-run', '--skip-checks']))
+        self.assertEqual(self.run_manage('runserver'), ('myproject.settings', ['runserver']))
+        self.assertEqual(self.run_manage('gc_media', '--settings=other')[0], 'myproject.settings')
+        self.assertEqual(self.run_manage('gc_media', environ={'DJANGO_SETTINGS_MODULE': 'other'})[0], 'other')
+
+    def test_lean_commands_load_under_the_lean_settings(self):
+        import manage
+        script = (
+            'import django; django.setup()\n'
+            'from django.core.management import load_command_class\n'
+            f'for name in {sorted(manage.LEAN_COMMANDS)!r}:\n'
+            '    load_command_class("news", name)\n'
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='myproject.settings_lean')
+        result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_warm_up_fills_the_caches(self):
+        Category.objects.create(name='News')
+        navigation._evict()
+        self.addCleanup(navigation._evict)
+        warmup.warm()
+        with self.assertNumQueries(0):
+            get_navigation()
+            site_configuration(None)
+
+    @override_settings(WARM_UP_ON_START=False)
+    def test_warm_up_can_be_turned_off(self):
+        with mock.patch('threading.Thread') as thread:
+            warmup.start()
+        thread.assert_not_called()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('editor', is_staff=True))
+        article = Article.objects.create(title='Exported', category=Category.objects.create(name='News'), image='a.jpg')
+        Comment.objects.create(article=article, name='Reader', email='r@example.com', body='=HYPERLINK("x")', is_approved=True)
+        Comment.objects.create(article=article, name='Spam', email='s@example.com', body='Buy now')
+        self.url = reverse('dashboard_export', args=['comments', 'csv']) + '?columns=name,body&approved=1'
+
+    def test_csv_streams_selected_columns_and_filtered_rows(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        # Cells that would run as formulas are quoted
+        self.assertEqual(lines, ['name,body', 'Reader,"\'=HYPERLINK(""x"")"'])
+
+    def test_unchanged_export_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        Comment.objects.filter(name='Spam').update(is_approved=True)
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+    @mock.patch.object(exports, 'SHEET_ROWS', 2)
+    def test_xlsx_starts_a_new_sheet_at_the_row_limit(self):
+        data = b''.join(exports.xlsx_chunks(['n'], iter([(1,), (2,), (3,)])))
+        book = zipfile.ZipFile(io.BytesIO(data))
+        self.assertIsNone(book.testzip())
+        self.assertIn('xl/worksheets/sheet3.xml', book.namelist())
+        self.assertIn(b'r:id="rId3"', book.read('xl/workbook.xml'))
+
+    def test_bad_parameters_are_rejected(self):
+        response = self.client.get(reverse('dashboard_export', args=['comments', 'csv']) + '?columns=password')
+        self.assertEqual(response.status_code, 400)
+
+
+class ListingCountTests(TestCase):
+    def setUp(self):
+        self.news = Category.objects.create(name='News')
+        self.sport = Category.objects.create(name='Sport')
+        self.red, self.blue = Tag.objects.create(name='Red'), Tag.objects.create(name='Blue')
+        self.article = Article.objects.create(title='Counted', category=self.news, image='a.jpg', status='published')
+        self.article.tags.add(self.red, self.blue)
+
+    def assertCounts(self, news, sport, red, blue):
+        # The signals kept up: check_listing_counts finds nothing to repair
+        out = io.StringIO()
+        call_command('check_listing_counts', '--dry-run', stdout=out)
+        self.assertIn('All counts are correct.', out.getvalue())
+        counted = (self.news, self.sport, self.red, self.blue)
+        for obj in counted:
+            obj.refresh_from_db()
+        self.assertEqual([obj.article_count for obj in counted], [news, sport, red, blue])
+
+    def test_tags_changed_from_either_side(self):
+        self.assertCounts(1, 0, 1, 1)
+        self.article.tags.remove(self.red)
+        self.assertCounts(1, 0, 0, 1)
+        self.blue.articles.remove(self.article)
+        self.assertCounts(1, 0, 0, 0)
+        self.red.articles.add(self.article)
+        self.red.articles.add(self.article)  # already linked
+        self.assertCounts(1, 0, 1, 0)
+        self.red.articles.clear()
+        self.assertCounts(1, 0, 0, 0)
+        self.article.tags.set([self.red, self.blue])
+        self.assertCounts(1, 0, 1, 1)
+        self.article.tags.clear()
+        self.assertCounts(1, 0, 0, 0)
+
+    def test_unpublish_move_and_trash(self):
+        self.article.status = 'draft'
+        self.article.save()
+        self.assertCounts(0, 0, 0, 0)
+        # Tags on a draft don't count
+        self.article.tags.remove(self.blue)
+        self.assertCounts(0, 0, 0, 0)
+
+        self.article.status = 'published'
+        self.article.category = self.sport
+        self.article.save()
+        self.assertCounts(0, 1, 1, 0)
+
+        self.article.is_deleted = True
+        self.article.save()
+        self.assertCounts(0, 0, 0, 0)
+        self.article.is_deleted = False
+        self.article.save()
+        self.assertCounts(0, 1, 1, 0)
+
+    def test_hard_delete(self):
+        self.article.delete()
+        self.assertCounts(0, 0, 0, 0)
+
+    def test_repair_fixes_drift(self):
+        Category.objects.filter(pk=self.news.pk).update(article_count=5)
+        self.assertEqual(listings.repair(), [(Category, self.news.pk, 5, 1)])
+        self.assertCounts(1, 0, 1, 1)
+
+
+@override_settings(
+    RATE_LIMITS={'page': {'burst': 3, 'period': 60}, 'crawler': {'burst': 30, 'period': 60}},
+    RATE_LIMIT_CRAWLERS={'Googlebot': ['.googlebot.com']},
+)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_at_the_policy_rate(self):
+        for _ in range(3):
+            self.assertEqual(ratelimit.take('page', '203.0.113.5', now=1000), 0)
+        # One token every 20 seconds
+        self.assertAlmostEqual(ratelimit.take('page', '203.0.113.5', now=1000), 20)
+        self.assertAlmostEqual(ratelimit.take('page', '203.0.113.5', now=1010), 10)
+        self.assertEqual(ratelimit.take('page', '203.0.113.5', now=1020), 0)
+        self.assertGreater(ratelimit.take('page', '203.0.113.5', now=1020), 0)
+        # Other clients have their own bucket
+        self.assertEqual(ratelimit.take('page', '203.0.113.6', now=1020), 0)
+
+    def test_refill_stops_at_burst(self):
+        ratelimit.take('page', '203.0.113.5', now=1000)
+        for _ in range(3):
+            self.assertEqual(ratelimit.take('page', '203.0.113.5', now=1050), 0)
+        self.assertGreater(ratelimit.take('page', '203.0.113.5', now=1050), 0)
+
+    def test_idle_bucket_expires_full(self):
+        key = ratelimit.BUCKET_KEY.format('page', '203.0.113.5')
+        with mock.patch.object(time, 'time', return_value=1000.0):
+            for _ in range(3):
+                ratelimit.take('page', '203.0.113.5')
+            self.assertGreater(ratelimit.take('page', '203.0.113.5'), 0)
+        # After one period the bucket would be full anyway, so the cache drops it
+        with mock.patch.object(time, 'time', return_value=1060.0):
+            self.assertIsNone(cache.get(key))
+            self.assertEqual(ratelimit.take('page', '203.0.113.5'), 0)
+
+    def test_middleware_returns_429_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('home'), REMOTE_ADDR='203.0.113.5').status_code, 200)
+        response = self.client.get(reverse('home'), REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        # Allow-listed addresses are never limited
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+    @override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR', RATE_LIMIT_TRUSTED_PROXIES=1)
+    def test_client_ip_ignores_spoofed_forwarded_for_entries(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='127.0.0.1, 203.0.113.5')
+        self.assertEqual(ratelimit.client_ip(request), '203.0.113.5')
+
+    def test_crawler_user_agent_is_verified_by_dns(self):
+        request = RequestFactory().get('/', HTTP_USER_AGENT='Mozilla/5.0 (compatible; Googlebot/2.1)')
+        with mock.patch('socket.gethostbyaddr', return_value=('crawl-1.googlebot.com', [], [])), \
+                mock.patch('socket.getaddrinfo', return_value=[(2, 1, 6, '', ('66.249.66.1', 0))]) as lookup:
+            self.assertEqual(ratelimit.crawler_route(request, 'page', '66.249.66.1'), 'crawler')
+            # The forward lookup doesn't match this address
+            self.assertEqual(ratelimit.crawler_route(request, 'page', '203.0.113.5'), 'page')
+            # Cached per IP
+            self.assertEqual(ratelimit.crawler_route(request, 'page', '66.249.66.1'), 'crawler')
+            self.assertEqual(lookup.call_count, 2)
+
+
+class DateArchiveTests(TestCase):
+    def nonzero(self, deltas):
+        return {key: n for key, n in deltas.items() if n}
+
+    def test_publish_and_unpublish(self):
+        published = (1, date(2024, 3, 5))
+        expected = {(1, '2024'): 1, (1, '2024-03'): 1, (1, '2024-03-05'): 1}
+        self.assertEqual(self.nonzero(date_archive.changes(None, published)), expected)
+        self.assertEqual(self.nonzero(date_archive.changes(published, None)), {k: -n for k, n in expected.items()})
+        self.assertEqual(self.nonzero(date_archive.changes(published, published)), {})
+
+    def test_category_move(self):
+        self.assertEqual(self.nonzero(date_archive.changes((1, date(2024, 3, 5)), (2, date(2024, 3, 5)))), {
+            (1, '2024'): -1, (1, '2024-03'): -1, (1, '2024-03-05'): -1,
+            (2, '2024'): 1, (2, '2024-03'): 1, (2, '2024-03-05'): 1,
+        })
+
+    def test_date_moves_only_touch_the_periods_that_differ(self):
+        within_month = date_archive.changes((1, date(2024, 3, 5)), (1, date(2024, 3, 9)))
+        self.assertEqual(self.nonzero(within_month), {(1, '2024-03-05'): -1, (1, '2024-03-09'): 1})
+        across_years = date_archive.changes((1, date(2023, 12, 31)), (1, date(2024, 1, 1)))
+        self.assertEqual(self.nonzero(across_years), {
+            (1, '2023'): -1, (1, '2023-12'): -1, (1, '2023-12-31'): -1,
+            (1, '2024'): 1, (1, '2024-01'): 1, (1, '2024-01-01'): 1,
+        })
+
+    def assertStoredMatchesArticles(self):
+        stored = {(row.category_id, row.period): row.count for row in PeriodCount.objects.all()}
+        self.assertEqual(stored, dict(date_archive.totals(Article.objects.all())))
+
+    def test_editing_an_old_article_keeps_its_period(self):
+        news = Category.objects.create(name='News')
+        article = Article.objects.create(title='Old', category=news, image='a.jpg', status='published')
+        old = datetime(2020, 2, 10, 12, tzinfo=dt_timezone.utc)
+        Article.objects.filter(pk=article.pk).update(published_at=old)
+        date_archive.rebuild()
+
+        article = Article.objects.get(pk=article.pk)
+        article.title = 'Old, corrected'
+        article.save()
+        article.refresh_from_db()
+        self.assertEqual(article.published_at, old)
+        self.assertEqual(date_archive.total('2020-02-10'), 1)
+        self.assertEqual(date_archive.total(str(timezone.localdate().year)), 0)
+        self.assertStoredMatchesArticles()
+
+    def test_publishing_a_draft_dates_it_now(self):
+        news = Category.objects.create(name='News')
+        draft = Article.objects.create(title='Draft', category=news, image='a.jpg')
+        Article.objects.filter(pk=draft.pk).update(published_at=datetime(2020, 2, 10, tzinfo=dt_timezone.utc))
+        draft = Article.objects.get(pk=draft.pk)
+        draft.status = 'published'
+        draft.save(update_fields=['status'])
+        draft.refresh_from_db()
+        self.assertEqual(timezone.localdate(draft.published_at), timezone.localdate())
+        self.assertStoredMatchesArticles()
+
+    def test_archived_articles_stay_counted_and_listed(self):
+        news = Category.objects.create(name='News')
+        articles = {}
+        for title, day in (('Oldest', 10), ('Middle', 20), ('Newest', 28)):
+            article = Article.objects.create(title=title, category=news, image='a.jpg', status='published')
+            Article.objects.filter(pk=article.pk).update(published_at=datetime(2020, 2, day, 12, tzinfo=dt_timezone.utc))
+            articles[title] = article.pk
+        date_archive.rebuild()
+        stored = set(PeriodCount.objects.values_list('category_id', 'period', 'count'))
+
+        archive.archive_batch([articles['Oldest'], articles['Newest']])
+        self.assertEqual(set(PeriodCount.objects.values_list('category_id', 'period', 'count')), stored)
+        self.assertEqual(date_archive.total('2020-02'), 3)
+        date_archive.rebuild()
+        self.assertEqual(set(PeriodCount.objects.values_list('category_id', 'period', 'count')), stored)
+
+        response = self.client.get(reverse('date_archive', args=[2020, 2]))
+        self.assertEqual([a.title for a in response.context['articles']], ['Newest', 'Middle', 'Oldest'])
+        response = self.client.get(reverse('date_archive', args=[2020, 2]) + '?category=news')
+        self.assertEqual(len(response.context['articles']), 3)
+
+        archive.restore(ArchivedArticle.objects.get(original_id=articles['Newest']))
+        self.assertEqual(set(PeriodCount.objects.values_list('category_id', 'period', 'count')), stored)
+
+    def test_signals_keep_stored_counts_in_step(self):
+        news, sport = Category.objects.create(name='News'), Category.objects.create(name='Sport')
+        article = Article.objects.create(title='Dated', category=news, image='a.jpg', status='published')
+        other = Article.objects.create(title='Other', category=news, image='b.jpg', status='draft')
+        self.assertStoredMatchesArticles()
+        self.assertEqual(PeriodCount.objects.filter(category=news).count(), 3)
+
+        article.category = sport
+        article.save()
+        self.assertStoredMatchesArticles()
+        other.status = 'published'
+        other.save()
+        self.assertStoredMatchesArticles()
+
+        # published_at is auto_now, so date moves go through update() + apply(), as restore() does
+        counted = date_archive.state(article)
+        article.published_at = datetime(2020, 2, 29, 12, tzinfo=dt_timezone.utc)
+        Article.objects.filter(pk=article.pk).update(published_at=article.published_at)
+        date_archive.apply(date_archive.changes(counted, date_archive.state(article)))
+        self.assertStoredMatchesArticles()
+
+        article.is_deleted = True
+        article.save()
+        self.assertStoredMatchesArticles()
+        other.delete()
+        self.assertStoredMatchesArticles()
+        self.assertFalse(PeriodCount.objects.exists())
+
+
+@mock.patch.object(analytics, 'FLUSH_INTERVAL', 0)
+class ViewSeriesTests(TestCase):
+    def setUp(self):
+        # Views counted by earlier tests' page requests
+        analytics._pending.clear()
+        self.addCleanup(analytics._pending.clear)
+        category = Category.objects.create(name='News')
+        self.article = Article.objects.create(title='Viewed', category=category, image='a.jpg', status='published')
+        self.other = Article.objects.create(title='Also viewed', category=category, image='b.jpg', status='published')
+
+    def at(self, day, hour):
+        return datetime.combine(day, datetime.min.time(), tzinfo=dt_timezone.utc).replace(hour=hour)
+
+    def test_pack_round_trips_and_short_blobs_pad_with_zeros(self):
+        values = [0, 1, 2 ** 32 - 1] + [7] * 21
+        self.assertEqual(len(analytics.pack(values)), 96)
+        self.assertEqual(analytics.unpack(analytics.pack(values), 24), values)
+        self.assertEqual(analytics.unpack(analytics.pack([5, 6]), 31), [5, 6] + [0] * 29)
+        self.assertEqual(analytics.unpack(None, 24), [0] * 24)
+
+    def test_flush_adds_to_the_hourly_buckets(self):
+        day = date(2024, 3, 5)
+        for hour in (0, 0, 23):
+            analytics.record(self.article.id, self.at(day, hour))
+        self.assertEqual(analytics.flush(), 3)
+        analytics.record(self.article.id, self.at(day, 23))
+        analytics.flush()
+
+        row = ViewSeries.objects.get(article=self.article)
+        self.assertEqual((row.resolution, row.start, row.total), (ViewSeries.HOURLY, day, 4))
+        self.assertEqual(analytics.unpack(row.buckets, 24), [2] + [0] * 22 + [2])
+
+    def test_flush_drops_views_of_deleted_articles(self):
+        analytics.record(self.other.id)
+        self.other.delete()
+        analytics.flush()
+        self.assertFalse(ViewSeries.objects.exists())
+
+    def test_rollup_folds_old_days_into_monthly_rows(self):
+        for day, n in ((date(2024, 3, 5), 3), (date(2024, 3, 31), 2), (date(2024, 4, 1), 1)):
+            for _ in range(n):
+                analytics.record(self.article.id, self.at(day, 12))
+        analytics.flush()
+        self.assertEqual(analytics.rollup(before=date(2024, 4, 1)), 2)
+
+        rows = ViewSeries.objects.filter(article=self.article).order_by('resolution', 'start')
+        self.assertEqual(
+            [(row.resolution, row.start, row.total) for row in rows],
+            [(ViewSeries.HOURLY, date(2024, 4, 1), 1), (ViewSeries.DAILY, date(2024, 3, 1), 5)],
+        )
+        march = analytics.unpack(rows[1].buckets, 31)
+        self.assertEqual((march[4], march[30], sum(march)), (3, 2, 5))
+
+        # Daily totals read the same from either resolution; hours are gone once rolled up
+        self.assertEqual(analytics.daily(date(2024, 3, 5), date(2024, 4, 1), self.article)[0], (date(2024, 3, 5), 3))
+        self.assertEqual(analytics.daily(date(2024, 3, 31), date(2024, 4, 1), self.article),
+                         [(date(2024, 3, 31), 2), (date(2024, 4, 1), 1)])
+        self.assertEqual(sum(n for _, n in analytics.hourly(self.at(date(2024, 3, 5), 0), self.at(date(2024, 3, 6), 0))), 0)
+
+        # Rolling up more days adds to the existing monthly row
+        analytics.record(self.article.id, self.at(date(2024, 3, 6), 1))
+        analytics.flush()
+        analytics.rollup(before=date(2024, 4, 1))
+        self.assertEqual(ViewSeries.objects.get(article=self.article, resolution=ViewSeries.DAILY).total, 6)
+
+    def test_history_survives_delete_and_moves_on_merge(self):
+        day = date(2024, 3, 5)
+        analytics.record(self.article.id, self.at(day, 1))
+        analytics.record(self.other.id, self.at(day, 1))
+        analytics.record(self.other.id, self.at(day, 2))
+        analytics.flush()
+
+        analytics.move(self.other.id, self.article.id)
+        row = ViewSeries.objects.get()
+        self.assertEqual((row.article_id, row.total), (self.article.id, 3))
+        self.assertEqual(analytics.unpack(row.buckets, 24)[1:3], [2, 1])
+
+        self.article.delete()
+        self.assertEqual(ViewSeries.objects.get().total, 3)
+
+
+@mock.patch.object(analytics, 'FLUSH_INTERVAL', 0)
+class AsyncPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(
+            title='Streamed', category=Category.objects.create(name='News'), image='a.jpg', status='published',
+        )
+
+    def setUp(self):
+        # Page views are counted in memory; don't leave them to other tests
+        self.addCleanup(analytics._pending.clear)
+
+    async def page(self, client, path):
+        response = await client.get(path)
+        if response.streaming:
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+        return response, response.content
+
+    @override_settings(STREAM_PAGE_SHELL=True)
+    async def test_comment_posts_from_a_streamed_page(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        response, body = await self.page(client, reverse('article_detail', args=[self.article.slug]))
+        self.assertTrue(response.streaming)
+        self.assertIn(b'csrfmiddlewaretoken', body)
+        token = client.cookies['csrftoken'].value
+
+        url = reverse('article_comment', args=[self.article.slug])
+        data = {'name': 'Reader', 'email': 'r@example.com', 'body': 'First!'}
+        self.assertEqual((await client.post(url, data)).status_code, 403)
+        response = await client.post(url, dict(data, csrfmiddlewaretoken=token))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await Comment.objects.filter(article=self.article, body='First!').aexists())
+
+    async def test_streamed_page_matches_the_rendered_one(self):
+        for name, args in (('home', []), ('article_detail', [self.article.slug])):
+            with self.settings(STREAM_PAGE_SHELL=True):
+                streamed, body = await self.page(self.async_client, reverse(name, args=args))
+            with self.settings(STREAM_PAGE_SHELL=False):
+                rendered, html = await self.page(self.async_client, reverse(name, args=args))
+            self.assertTrue(streamed.streaming)
+            self.assertFalse(rendered.streaming)
+            # CSRF tokens are masked differently on every render, and each GET counts a view
+            strip = lambda page: re.sub(rb'value="[^"]{64}"|\d+ Views', b'', page)
+            self.assertEqual(strip(body), strip(html))
+            self.assertEqual(body.count(b'<html'), 1)
+
+    def test_home_sections(self):
+        news, sport = self.article.category, Category.objects.create(name='Sport')
+        for i in range(6):
+            Article.objects.create(title=f'Sport {i}', category=sport, image='a.jpg', status='published', is_featured=i == 0)
+        Article.objects.create(title='Draft', category=sport, image='a.jpg', is_featured=True)
+        navigation._evict()
+        self.addCleanup(navigation._evict)
+
+        context = self.client.get(reverse('home')).context
+        self.assertEqual([a.title for a in context['featured_news']], ['Sport 0'])
+        self.assertEqual(len(context['latest_news']), 7)
+        self.assertNotIn('Draft', [a.title for a in context['latest_news']])
+        sections = {s['category']['name']: [a.title for a in s['articles']] for s in context['category_sections']}
+        self.assertEqual(sections, {'News': ['Streamed'], 'Sport': ['Sport 5', 'Sport 4', 'Sport 3', 'Sport 2']})
+
+    def test_article_page_counts_views_and_shows_approved_comments(self):
+        Comment.objects.create(article=self.article, name='A', email='a@example.com', body='Approved', is_approved=True)
+        Comment.objects.create(article=self.article, name='B', email='b@example.com', body='Pending')
+        url = reverse('article_detail', args=[self.article.slug])
+        response = self.client.get(url)
+        self.assertContains(response, 'Approved')
+        self.assertNotContains(response, 'Pending')
+        self.assertEqual(Article.objects.get(pk=self.article.pk).views, 1)
+
+        # A comment with errors shows the page again without counting a view
+        response = self.client.post(reverse('article_comment', args=[self.article.slug]), {'name': 'C'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertEqual(Article.objects.get(pk=self.article.pk).views, 1)
+        self.assertEqual(self.client.get(reverse('article_detail', args=['missing'])).status_code, 404)
+
+    async def test_fetch_inline_when_not_concurrent(self):
+        def fail():
+            raise ValueError('block failed')
+        with mock.patch.object(concurrent, 'concurrent', return_value=False):
+            self.assertEqual(await concurrent.fetch(a=lambda: 1, b=lambda: 2), {'a': 1, 'b': 2})
+            with self.assertRaisesMessage(ValueError, 'block failed'):
+                await concurrent.fetch(a=lambda: 1, b=fail)
+        with mock.patch.object(concurrent, 'concurrent', return_value=True):
+            with self.assertRaisesMessage(ValueError, 'block failed'):
+                await concurrent.fetch(b=fail)
+
+    async def test_fetch_runs_blocks_on_the_pool(self):
+        names = {}
+        def block(name):
+            names[name] = threading.current_thread().name
+            return name.upper()
+        with mock.patch.object(concurrent, 'concurrent', return_value=True):
+            results = await concurrent.fetch(a=lambda: block('a'), b=lambda: block('b'))
+        self.assertEqual(results, {'a': 'A', 'b': 'B'})
+        self.assertTrue(all(name.startswith('news-fetch') for name in names.values()))
+
+
+class PrerenderTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        override = self.settings(PRERENDER_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        SiteConfiguration.objects.create()
+        self.news, self.sport = Category.objects.create(name='News'), Category.objects.create(name='Sport')
+        self.tag = Tag.objects.create(name='Red')
+        self.article = Article.objects.create(title='Rendered', category=self.news, image='a.jpg', status='published')
+        self.article.tags.add(self.tag)
+        self.render(prerender.home_path(), prerender.article_path('rendered'), prerender.tag_path('red'),
+                    prerender.category_path('news'), prerender.category_path('sport'))
+        self.assertEqual(prerender.stale_pages()[0], {})
+
+    def render(self, *paths):
+        pages, site_version = prerender.stale_pages()
+        for path in paths:
+            PrerenderedPage.objects.get_or_create(path=path)
+            _, status, size = prerender.render_page(path)
+            self.assertEqual(status, 200)
+            version = PrerenderedPage.objects.get(path=path).version
+            prerender.record_rendered(path, version, site_version, size)
+
+    def written(self, path):
+        return os.path.exists(os.path.join(prerender.output_dir(path), 'index.html'))
+
+    def test_edit_marks_the_pages_showing_the_old_and_new_article_stale(self):
+        old_page = prerender.article_path(self.article.slug)
+        listings_shown = [prerender.category_path('news'), prerender.category_path('sport'), prerender.tag_path('red')]
+        self.article.slug = 'renamed'
+        self.article.category = self.sport
+        self.article.save()
+        stale = prerender.stale_pages()[0]
+        self.assertLessEqual({old_page, prerender.article_path('renamed'), *listings_shown}, set(stale))
+        self.assertFalse(self.written(old_page))
+
+    def test_pages_are_written_with_a_gzip_copy(self):
+        html = os.path.join(prerender.output_dir(prerender.article_path('rendered')), 'index.html')
+        with open(html, 'rb') as fp, gzip.open(html + '.gz') as gz:
+            content = fp.read()
+            self.assertEqual(gz.read(), content)
+        self.assertIn(b'Rendered', content)
+        self.assertEqual(PrerenderedPage.objects.get(path=prerender.article_path('rendered')).size, len(content))
+
+    def test_unpublished_article_page_is_removed(self):
+        page = prerender.article_path(self.article.slug)
+        self.article.status = 'draft'
+        self.article.save()
+        self.assertFalse(self.written(page))
+        self.assertIn(page, prerender.stale_pages()[0])
+        self.assertEqual(prerender.render_page(page)[1], 404)
+        self.assertNotIn(page, prerender.all_paths())
+
+    def test_untagging_from_the_tag_side_marks_the_article_stale(self):
+        page = prerender.article_path(self.article.slug)
+        self.tag.articles.remove(self.article)
+        self.assertIn(page, prerender.stale_pages()[0])
+
+    def test_site_wide_change_bumps_one_version_and_keeps_the_files(self):
+        page = prerender.article_path(self.article.slug)
+        rendered = PrerenderedPage.objects.get(path=page).version
+
+        # The insert and one version bump each for the nav, these pages and the pickers
+        with self.assertNumQueries(4):
+            Category.objects.create(name='Weather')
+        self.assertTrue(self.written(page))
+        self.assertEqual(PrerenderedPage.objects.get(path=page).version, rendered)
+        self.assertEqual(len(prerender.stale_pages()[0]), PrerenderedPage.objects.count())
+
+        self.render(page)
+        self.assertNotIn(page, prerender.stale_pages()[0])
+
+    @mock.patch.object(prerender, 'CHUNK_SIZE', 3)
+    def test_long_path_lists_are_chunked(self):
+        paths = [f'/page-{i}/' for i in range(10)]
+        with self.assertNumQueries(8):  # 4 chunks x (insert + update)
+            prerender.mark_stale(paths)
+        prerender.mark_stale(paths)
+        self.assertEqual(set(PrerenderedPage.objects.filter(path__in=paths).values_list('version', flat=True)), {3})
+
+        articles = [Article(title=f'Chunked {i}', slug=f'chunked-{i}', category=self.news, image='a.jpg') for i in range(7)]
+        ids = [a.id for a in Article.objects.bulk_create(articles)]
+        with self.assertNumQueries(3):
+            self.assertEqual(len(prerender.article_paths(ids)), 7)
+
+
+class MergeDuplicatesTests(TestCase):
+    BODY = ' '.join(f'word{i}' for i in range(60))
+
+    def setUp(self):
+        self.news = Category.objects.create(name='News')
+
+    def article(self, title, content=BODY, **fields):
+        return Article.objects.create(title=title, category=self.news, image='a.jpg', content=content, **fields)
+
+    def run_command(self, *args):
+        out = io.StringIO()
+        call_command('merge_duplicates', *args, stdout=out)
+        return out.getvalue()
+
+    def test_near_duplicates_are_found_through_the_band_index(self):
+        original = self.article('Flood warning for the valley')
+        edited_body = self.BODY.replace('word30', 'changed')
+        signature = dedup.minhash('Flood warning for the valley.', edited_body)
+        self.assertGreaterEqual(dedup.similarity(signature, dedup.minhash(original.title, self.BODY)), dedup.THRESHOLD)
+
+        self.assertEqual([m for m, _ in dedup.find_near_duplicates('Flood warning for the valley.', edited_body)], [original.pk])
+        self.assertEqual(dedup.find_near_duplicates('Election results', 'Counting continues in the capital'), [])
+        self.assertEqual(dedup.find_near_duplicates(original.title, self.BODY, exclude_id=original.pk), [])
+
+    def test_duplicates_merge_into_the_oldest_copy(self):
+        first = self.article('Flood warning for the valley', views=5)
+        second = self.article('Flood warning for the valley.', slug='flood-warning-2', views=3)
+        third = self.article('Flood warning for the valley!', slug='flood-warning-3', views=1)
+        other = self.article('Election results', content='Counting continues in the capital')
+        tag = Tag.objects.create(name='Weather')
+        second.tags.add(tag)
+        comment = Comment.objects.create(article=third, name='Reader', email='r@example.com', body='Stay safe')
+
+        out = self.run_command()
+        self.assertIn(f'#{second.pk} duplicates #{first.pk}', out)
+        self.assertIn(f'#{third.pk} duplicates #{first.pk}', out)
+        self.assertEqual(set(Article.objects.values_list('pk', flat=True)), {first.pk, other.pk})
+        first.refresh_from_db()
+        self.assertEqual(first.views, 9)
+        self.assertEqual(list(first.tags.all()), [tag])
+        self.assertEqual(Comment.objects.get(pk=comment.pk).article_id, first.pk)
+        self.assertEqual(ArticleFingerprint.objects.count(), 2)
+
+        self.assertIn('Merged 0 duplicate articles.', self.run_command())
+
+    def test_dry_run_fingerprints_in_memory(self):
+        first = self.article('Flood warning for the valley')
+        copy = self.article('Flood warning for the valley!', slug='flood-warning-2')
+        ArticleFingerprint.objects.all().delete()
+
+        out = self.run_command('--dry-run')
+        self.assertIn('Would index 2 articles.', out)
+        self.assertIn(f'#{copy.pk} duplicates #{first.pk}', out)
+        self.assertIn('Would merge 1 duplicate articles.', out)
+        self.assertFalse(ArticleFingerprint.objects.exists())
+        self.assertEqual(Article.objects.count(), 2)
+
+
+class HtmlParsingTests(SimpleTestCase):
+    LISTING = '''
+        <html><body>
+        <div class="sidebar"><a href="/ad">Advert</a></div>
+        <div class="ok-news-post col-4">
+            <a href="/2024/01/one"><img data-src="/lazy.jpg" src="/placeholder.gif"></a>
+            <h2>पहिलो समाचार</h2>
+        </div>
+        <div class="ok-news-post"><a href="/2024/01/two">Second story</a><img src="/two.jpg"></div>
+        <div class="ok-news-post"><span>No link here</span></div>
+        <div class="item"><a href="/ignored">Only used without news posts</a></div>
+        </body></html>
+    '''
+    DETAIL = '''
+        <html><body><p>Outside</p>
+        <div class="ok18-single-post-content-wrap wide"><p>One.</p><div><p>Two.</p></div></div>
+        </body></html>
+    '''
+
+    def test_backends_agree_on_listings(self):
+        expected = [
+            {'title': 'पहिलो समाचार', 'link': '/2024/01/one', 'image': '/lazy.jpg'},
+            {'title': 'Second story', 'link': '/2024/01/two', 'image': '/two.jpg'},
+        ]
+        for backend in html_parsing.available_backends():
+            with self.subTest(backend=backend):
+                self.assertEqual(html_parsing.parse_listing(self.LISTING, backend), expected)
+
+    def test_generic_items_when_there_are_no_news_posts(self):
+        html = '<div class="item"><a href="/a"><h3>A</h3></a></div><div class="other"><a href="/b">B</a></div>'
+        for backend in html_parsing.available_backends():
+            with self.subTest(backend=backend):
+                self.assertEqual(html_parsing.parse_listing(html, backend), [{'title': 'A', 'link': '/a', 'image': None}])
+
+    def test_detail_paragraphs_come_from_the_content_wrapper_only(self):
+        for backend in html_parsing.available_backends():
+            with self.subTest(backend=backend):
+                self.assertEqual(html_parsing.parse_detail(self.DETAIL, backend), ['One.', 'Two.'])
+                self.assertEqual(html_parsing.parse_detail('<p>No wrapper</p>', backend), [])
+
+
+class BulkImportExportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        author = User.objects.create_user('reporter')
+        news, sport = Category.objects.create(name='News'), Category.objects.create(name='Sport')
+        weather = Tag.objects.create(name='Weather')
+        self.articles = [
+            Article.objects.create(title='Flood warning', category=news, author=author, image='articles/flood.jpg',
+                                   content='Rain, rain and more rain.', status='published', views=7),
+            Article.objects.create(title='नेपाली समाचार', slug='nepali', category=sport, image='articles/n.jpg',
+                                   content='Body with "quotes",\nnewlines and | pipes', excerpt='Short'),
+            Article.objects.create(title='Trashed', category=news, image='', is_deleted=True, is_featured=True),
+        ]
+        self.articles[0].tags.add(weather, Tag.objects.create(name='Valley'))
+        Article.objects.filter(pk=self.articles[0].pk).update(published_at=datetime(2021, 6, 1, 8, 30, tzinfo=dt_timezone.utc))
+
+    def snapshot(self):
+        return sorted(
+            (a.slug, a.title, a.category.name, a.author.username if a.author else None, a.image.name, a.excerpt,
+             a.content, a.status, a.is_featured, a.views, a.is_deleted, a.created_at, a.published_at,
+             sorted(t.name for t in a.tags.all()), a.word_count)
+            for a in Article.objects.all()
+        )
+
+    def round_trip(self, filename):
+        path = os.path.join(self.tmp, filename)
+        before = self.snapshot()
+        call_command('export_articles', path, '--include-deleted', '--chunk-size', '2', stdout=io.StringIO(), stderr=io.StringIO())
+        Article.objects.all().delete()
+
+        out = io.StringIO()
+        call_command('import_articles', path, '--chunk-size', '2', stdout=out, stderr=io.StringIO())
+        self.assertIn('Imported 3 articles (0 skipped', out.getvalue())
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(Category.objects.get(name='News').article_count, 1)
+        self.assertEqual(date_archive.total('2021-06-01'), 1)
+
+        out = io.StringIO()
+        call_command('import_articles', path, stdout=out, stderr=io.StringIO())
+        self.assertIn('Imported 0 articles (3 skipped', out.getvalue())
+
+    def test_jsonl_round_trip(self):
+        self.round_trip('articles.jsonl')
+
+    def test_csv_round_trip(self):
+        self.round_trip('articles.csv')
+
+    def test_unknown_categories_and_tags_are_created(self):
+        path = os.path.join(self.tmp, 'new.jsonl')
+        with open(path, 'w', encoding='utf-8') as fp:
+            fp.write('{"title": "काठमाडौं", "category": "प्रदेश", "tags": ["मौसम", "Weather"]}\n\n')
+        call_command('import_articles', path, stdout=io.StringIO(), stderr=io.StringIO())
+        article = Article.objects.get(title='काठमाडौं')
+        self.assertTrue(article.slug)
+        self.assertEqual(article.category.name, 'प्रदेश')
+        self.assertTrue(article.category.slug)
+        self.assertEqual(sorted(t.name for t in article.tags.all()), ['Weather', 'मौसम'])
+        self.assertEqual(article.status, 'published')
@@ -0,0 +1,108 @@
+"""
+Server-Sent Events broadcaster for the breaking-news ticker.
+
+One Broadcaster per process holds the current ticker and wakes every
+connected reader through a single shared asyncio.Event, so an idle
+connection is just a coroutine waiting on that event. Event ids are a hash
+of the ticker text, which lets reconnecting clients (Last-Event-ID) skip
+what they already have, even if they land on another worker.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from asgiref.sync import sync_to_async
+
+KEEPALIVE = 20          # seconds between comment lines on idle connections
+POLL_INTERVAL = 15      # DB check for edits saved by other worker processes
+RETRY_MS = 5000
+WSGI_RETRY_MS = 30000   # WSGI can't hold connections, so clients poll slowly instead
+
+
+def event_id(title, content):
+    return hashlib.blake2b(f'{title}\x00{content}'.encode(), digest_size=8).hexdigest()
+
+
+def format_event(eid, data):
+    return f'id: {eid}\nevent: ticker\ndata: {data}\n\n'
+
+
+class Broadcaster:
+    def __init__(self):
+        self.current = None     # (event id, JSON data)
+        self.subscribers = 0
+        self._lock = threading.Lock()
+        self._loop = None
+        self._changed = None    # replaced with a fresh Event on every publish
+
+    def publish(self, title, content):
+        """Set the ticker and wake subscribers. Safe to call from sync code and other threads."""
+        eid = event_id(title, content)
+        with self._lock:
+            if self.current and self.current[0] == eid:
+                return
+            self.current = (eid, json.dumps({'title': title, 'content': content}))
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _attach(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._changed = asyncio.Event()
+            loop.create_task(self._poll())
+
+    async def _poll(self):
+        # One query per process every POLL_INTERVAL, and only while someone listens
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            if self.subscribers:
+                try:
+                    await self.refresh()
+                except Exception:
+                    pass
+
+    async def refresh(self):
+        from .models_config import SiteConfiguration
+        config = await sync_to_async(SiteConfiguration.objects.first)()
+        if config:
+            self.publish(config.breaking_news_title, config.breaking_news_content)
+
+    async def snapshot(self, last_event_id=None, retry=WSGI_RETRY_MS):
+        """A single response body: the current ticker if the client doesn't have it yet."""
+        if self.current is None:
+            await self.refresh()
+        body = f'retry: {retry}\n\n'
+        if self.current and self.current[0] != last_event_id:
+            body += format_event(*self.current)
+        return body
+
+    async def subscribe(self, last_event_id=None):
+        """Async generator of SSE chunks for one connected reader."""
+        self._attach()
+        if self.current is None:
+            await self.refresh()
+        self.subscribers += 1
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            sent = last_event_id
+            while True:
+                changed = self._changed
+                if self.current and self.current[0] != sent:
+                    sent = self.current[0]
+                    yield format_event(*self.current)
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+        finally:
+            self.subscribers -= 1
+
+
+broadcaster = Broadcaster()
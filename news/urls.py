@@ -6,6 +6,13 @@ urlpatterns = [
     path('category/<slug:slug>/', views.category_detail, name='category_detail'),
     path('tag/<slug:slug>/', views.tag_detail, name='tag_detail'),
     path('article/<slug:slug>/', views.article_detail, name='article_detail'),
+    path('article/<slug:slug>/comment/', views.article_comment, name='article_comment'),
+    path('comment-token/', views.comment_token, name='comment_token'),
+    path('archive/', views.archive_by_date, name='date_archive'),
+    path('archive/<int:year>/', views.archive_by_date, name='date_archive'),
+    path('archive/<int:year>/<int:month>/', views.archive_by_date, name='date_archive'),
+    path('archive/<int:year>/<int:month>/<int:day>/', views.archive_by_date, name='date_archive'),
+    path('breaking-news/stream/', views.breaking_news_stream, name='breaking_news_stream'),
     
     # Dashboard URLs
     path('dashboard/', views.dashboard_home, name='dashboard_home'),
@@ -13,6 +20,8 @@ urlpatterns = [
     path('dashboard/articles/new/', views.dashboard_article_create, name='dashboard_article_create'),
     path('dashboard/articles/<int:pk>/edit/', views.dashboard_article_edit, name='dashboard_article_edit'),
     path('dashboard/articles/<int:pk>/delete/', views.dashboard_article_delete, name='dashboard_article_delete'),
+    path('dashboard/autocomplete/tags/', views.dashboard_autocomplete, {'kind': 'tags'}, name='dashboard_autocomplete_tags'),
+    path('dashboard/autocomplete/categories/', views.dashboard_autocomplete, {'kind': 'categories'}, name='dashboard_autocomplete_categories'),
     
     # Trash / Backup
     path('dashboard/trash/', views.dashboard_trash, name='dashboard_trash'),
@@ -27,4 +36,10 @@ urlpatterns = [
     path('dashboard/settings/', views.dashboard_settings, name='dashboard_settings'),
     path('dashboard/breaking-news/', views.dashboard_breaking_news, name='dashboard_breaking_news'),
     path('dashboard/activity/', views.dashboard_activity_log, name='dashboard_activity_log'),
+    path('dashboard/exports/', views.dashboard_exports, name='dashboard_exports'),
+    path('dashboard/exports/files/<str:name>', views.dashboard_export_file, name='dashboard_export_file'),
+    path('dashboard/exports/<slug:kind>.<slug:fmt>', views.dashboard_export, name='dashboard_export'),
+    path('dashboard/performance/', views.dashboard_performance, name='dashboard_performance'),
+    path('dashboard/analytics.json', views.dashboard_analytics, name='dashboard_analytics'),
+    path('dashboard/ratelimit.json', views.dashboard_ratelimit_stats, name='dashboard_ratelimit_stats'),
 ]
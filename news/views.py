@@ -1,107 +1,249 @@
+import calendar
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
+from django.http import Http404
+from django.urls import reverse
+from django.utils import timezone
 from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import Article, Category, Tag
+from django.db.models import Q, Window
+from django.db.models.functions import RowNumber
+from django.views.decorators.cache import never_cache
+from .models import Article, ArchivedArticle, Category, Tag
 from .forms import CommentForm
+from .navigation import get_navigation
+from .article_body import DERIVED_FIELDS
+from .concurrent import fetch, respond
+from .paginators import MergedList
+from . import analytics, date_archive, listings
 
 
-def home(request):
-    # 1. Featured News (High priority)
-    featured_news = Article.objects.filter(status='published', is_featured=True).order_by('-published_at')[:5]
-    
-    # 2. Latest News (Chronological) - Exclude featured to avoid duplicates if needed, or just show all
-    latest_news = Article.objects.filter(status='published').order_by('-published_at')[:8]
-    
-    # 3. Trending / Popular (Based on views)
-    trending_news = Article.objects.filter(status='published').order_by('-views')[:5]
-    
-    # 4. Category Blocks (3-4 recent articles per category)
-    # Fetch major categories, or all. 
-    categories = Category.objects.all()
-    category_sections = []
-    for cat in categories:
-        articles = cat.articles.filter(status='published').order_by('-published_at')[:4]
-        if articles:
-            category_sections.append({
-                'category': cat,
-                'articles': articles
-            })
-            
-    context = {
-        'featured_news': featured_news,
-        'latest_news': latest_news,
-        'trending_news': trending_news,
-        'category_sections': category_sections,
-        'categories': categories, # For nav
+def listing(queryset):
+    # Listings show title/excerpt/image only; never load the full body
+    return queryset.defer('content', *DERIVED_FIELDS)
+
+
+async def home(request):
+    # The cached nav menu has the published counts, so empty categories cost no query
+    navigation = await sync_to_async(get_navigation)()
+    published = listing(Article.objects.filter(status='published', is_deleted=False).select_related('category'))
+
+    # Independent blocks, fetched concurrently (news/concurrent.py)
+    blocks = {
+        # 1. Featured News (High priority)
+        'featured_news': lambda: list(published.filter(is_featured=True).order_by('-published_at')[:5]),
+        # 2. Latest News (Chronological)
+        'latest_news': lambda: list(published.order_by('-published_at')[:8]),
+        # 3. Trending / Popular (Based on views)
+        'trending_news': lambda: list(published.order_by('-views')[:5]),
     }
-    return render(request, 'news/home.html', context)
+    # 4. Category Blocks (4 recent articles per category), in one windowed query
+    blocks['category_articles'] = lambda: list(published.annotate(
+        rank=Window(RowNumber(), partition_by='category_id', order_by='-published_at'),
+    ).filter(rank__lte=4, category_id__in=[cat['id'] for cat in navigation if cat['article_count']]))
+
+    async def context():
+        data = await fetch(**blocks)
+        by_category = {}
+        for article in data['category_articles']:
+            by_category.setdefault(article.category_id, []).append(article)
+        return {
+            'featured_news': data['featured_news'],
+            'latest_news': data['latest_news'],
+            'trending_news': data['trending_news'],
+            'category_sections': [
+                {'category': cat, 'articles': sorted(by_category[cat['id']], key=lambda a: a.rank)}
+                for cat in navigation if cat['id'] in by_category
+            ],
+        }
+    return await respond(request, 'news/home.html', context())
+
+def listing_page(owner, queryset, number):
+    """A page of a category or tag listing (see news/listings.py).
+
+    The count comes from owner.article_count and the first pages from the
+    cached id list, so they cost one id__in fetch; deeper pages are queried.
+    """
+    paginator = Paginator(listing(queryset).order_by('-published_at', '-id'), listings.PAGE_SIZE)
+    paginator.count = owner.article_count
+    page = paginator.get_page(number)
+    if page.number <= listings.CACHED_PAGES:
+        start = (page.number - 1) * listings.PAGE_SIZE
+        ids = listings.first_ids(owner, queryset)[start:start + listings.PAGE_SIZE]
+        found = listing(queryset.model.objects.filter(listings.PUBLISHED)).select_related('category').in_bulk(ids)
+        page.object_list = [found[pk] for pk in ids if pk in found]
+    return page
 
 def category_detail(request, slug):
     category = get_object_or_404(Category, slug=slug)
-    article_list = category.articles.filter(status='published').order_by('-published_at')
-    
-    # Pagination
-    paginator = Paginator(article_list, 10) # 10 articles per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    published = category.articles.filter(status='published', is_deleted=False)
     context = {
         'category': category,
-        'articles': page_obj, # Use page_obj instead of raw queryset
-        'categories': Category.objects.all(),
+        'articles': listing_page(category, published, request.GET.get('page')),
     }
     return render(request, 'news/category_detail.html', context)
 
 def tag_detail(request, slug):
     tag = get_object_or_404(Tag, slug=slug)
-    article_list = tag.articles.filter(status='published').order_by('-published_at')
-    
-    paginator = Paginator(article_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
+    published = tag.articles.filter(status='published', is_deleted=False)
     context = {
         'tag': tag,
-        'articles': page_obj,
-        'categories': Category.objects.all(),
+        'articles': listing_page(tag, published, request.GET.get('page')),
     }
     return render(request, 'news/tag_detail.html', context)
 
 
-def article_detail(request, slug):
-    article = get_object_or_404(Article, slug=slug)
-    # Increment view count
-    article.views += 1
-    article.save()
-    
-    # Handle Comment Submission
-    if request.method == 'POST':
-        form = CommentForm(request.POST)
-        if form.is_valid():
-            comment = form.save(commit=False)
-            comment.article = article
-            comment.save()
-            return redirect('article_detail', slug=slug)
+def archive_by_date(request, year=None, month=None, day=None):
+    """Year / month / day archive. Counts come from PeriodCount (news/date_archive.py)."""
+    category = None
+    if request.GET.get('category'):
+        category = get_object_or_404(Category, slug=request.GET['category'])
+
+    query = f'?category={category.slug}' if category else ''
+
+    def links(parent, rows, label=str):
+        return [
+            {'label': label(value), 'url': reverse('date_archive', args=[*parent, value]) + query, 'count': n}
+            for value, n in rows
+        ]
+
+    context = {'category': category, 'query': query, 'year': year, 'month': month, 'day': day}
+    if year is None:
+        context['periods'] = links([], date_archive.years(category))
+        return render(request, 'news/date_archive.html', context)
+
+    try:
+        start, end = date_archive.date_range(year, month, day)
+    except (ValueError, OverflowError):
+        raise Http404('No such date')
+    period = date_archive.periods(start.date())[2 if day else 1 if month else 0]
+    if day:
+        context['periods'] = []
+    elif month:
+        context['periods'] = links([year, month], date_archive.days(year, month, category))
     else:
-        form = CommentForm()
+        context['periods'] = links([year], date_archive.months(year, category), lambda m: calendar.month_name[m])
 
-    # Get approved comments
-    comments = article.comments.filter(is_approved=True).order_by('-created_at')
+    # Range scans on article_published_idx and archived_published_idx: old
+    # periods are mostly in the cold archive (news/archive.py)
+    in_range = dict(status='published', is_deleted=False, published_at__gte=start, published_at__lt=end)
+    hot = Article.objects.filter(**in_range).select_related('category')
+    cold = ArchivedArticle.objects.filter(**in_range)
+    if category is not None:
+        hot = hot.filter(category=category)
+        cold = cold.filter(category_slug=category.slug)
+
+    paginator = Paginator(MergedList(listing(hot), listing(cold)), 10)
+    # The stored count saves the paginator its COUNT(*)
+    paginator.count = date_archive.total(period, category)
+    context.update(start=start.date(), total=paginator.count, articles=paginator.get_page(request.GET.get('page')))
+    return render(request, 'news/date_archive.html', context)
+
+
+async def article_detail(request, slug, form=None):
+    article = await Article.objects.select_related('category', 'author').filter(slug=slug, is_deleted=False).afirst()
+    if article is None:
+        # Old articles live in the cold archive (news/archive.py)
+        return await sync_to_async(archived_article_detail)(request, slug)
+    # Comments are posted to article_comment, which renders the page again if the form has errors
+    form = form or CommentForm()
+    prerendered = getattr(request, 'prerender', False)
+
+    def count_view():
+        # Not when prerender_site is rendering the page, or for a comment with errors
+        if not prerendered and request.method == 'GET':
+            article.views += 1
+            article.save(update_fields=['views'])
+            analytics.record(article.id)
+
+    # Independent blocks, fetched concurrently (news/concurrent.py)
+    blocks = {
+        'views': count_view,
+        'tags': lambda: list(article.tags.all()),
+        # Get approved comments
+        'comments': lambda: list(article.comments.filter(is_approved=True).order_by('-created_at')),
+        # Related Articles
+        'related_articles': lambda: list(listing(Article.objects.filter(
+            Q(category_id=article.category_id) | Q(tags__in=article.tags.all())
+        ).filter(status='published', is_deleted=False)).exclude(id=article.id).distinct().order_by('-published_at')[:5]),
+    }
+
+    async def context():
+        data = await fetch(**blocks)
+        return {
+            'article': article,
+            'tags': data['tags'],
+            'comments': data['comments'],
+            'form': form,
+            'prerendered': prerendered,
+            'related_articles': data['related_articles'],
+        }
+    return await respond(request, 'news/article_detail.html', context(), csrf=True)
+
+async def article_comment(request, slug):
+    # Never pre-rendered, so the form always comes with a CSRF token
+    if request.method != 'POST':
+        return redirect('article_detail', slug=slug)
+    article = await Article.objects.filter(slug=slug, is_deleted=False).afirst()
+    if article is None:
+        raise Http404('No article found')
+    form = CommentForm(request.POST)
+    if await sync_to_async(form.is_valid)():
+        comment = form.save(commit=False)
+        comment.article = article
+        await comment.asave()
+        return redirect('article_detail', slug=slug)
+    return await article_detail(request, slug, form=form)
+
+@never_cache
+def comment_token(request):
+    # Pre-rendered article pages are the same for everyone and can't carry a
+    # CSRF token; their comment form fetches one from here before posting.
+    from django.http import JsonResponse
+    from django.middleware.csrf import get_token
+    return JsonResponse({'token': get_token(request)})
+
+def archived_article_detail(request, slug):
+    from django.db.models import F
+    from .archive import find_archived
+    from .models import ArchivedArticle
+
+    archived = find_archived(slug)
+    if archived is None:
+        raise Http404('No article found')
+    if not getattr(request, 'prerender', False):
+        ArchivedArticle.objects.filter(pk=archived.pk).update(views=F('views') + 1)
+
+    related_articles = listing(Article.objects.filter(
+        category__slug=archived.category_slug, status='published', is_deleted=False,
+    )).order_by('-published_at')[:5]
 
-    # Related Articles
-    related_articles = Article.objects.filter(
-        Q(category=article.category) | Q(tags__in=article.tags.all())
-    ).filter(status='published').exclude(id=article.id).distinct().order_by('-published_at')[:5]
-    
     context = {
-        'article': article,
-        'comments': comments,
-        'form': form,
+        'article': archived,
+        'tags': archived.tags,
+        'comments': archived.approved_comments(),
+        'form': None,  # archived articles are closed for comments
         'related_articles': related_articles,
-        'categories': Category.objects.all(),
     }
     return render(request, 'news/article_detail.html', context)
 
+async def breaking_news_stream(request):
+    # Server-Sent Events feed for the ticker in base.html
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import HttpResponse, StreamingHttpResponse
+    from .ticker import broadcaster
+
+    last_event_id = request.headers.get('Last-Event-ID')
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(broadcaster.subscribe(last_event_id), content_type='text/event-stream')
+        response['X-Accel-Buffering'] = 'no'  # don't let a proxy buffer the stream
+    else:
+        # Under WSGI an open stream would pin a worker thread, so send the current
+        # state and let EventSource reconnect after the retry delay.
+        response = HttpResponse(await broadcaster.snapshot(last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
 # ==========================================
 # DASHBOARD VIEWS
 # ==========================================
@@ -114,18 +256,36 @@ def dashboard_home(request):
     total_articles = Article.objects.count()
     total_views = sum([a.views for a in Article.objects.all()])
     recent_articles = Article.objects.order_by('-created_at')[:5]
+    from .media_gc import get_usage
+    media_usage = get_usage()
     
+    now = timezone.now()
+    analytics.flush()  # this process's unwritten views
+    hourly_views = analytics.hourly(now - timedelta(hours=47), now)
+
     context = {
         'total_articles': total_articles,
         'total_views': total_views,
         'recent_articles': recent_articles,
+        'media_usage': media_usage,
+        'media_total': sum(row['bytes'] for row in media_usage),
+        'views_chart': analytics.bars([(hour.strftime('%b %d %H:00'), n) for hour, n in hourly_views]),
+        'views_48h': sum(n for _, n in hourly_views),
+        'category_growth': analytics.category_growth(now),
+        'top_articles': analytics.top_articles(),
     }
     return render(request, 'news/dashboard/home.html', context)
 
 # --- Article CRUD ---
 @staff_member_required
 def dashboard_article_list(request):
-    articles = Article.objects.filter(is_deleted=False).order_by('-created_at')
+    articles = list(listing(Article.objects.filter(is_deleted=False)).order_by('-created_at'))
+    # Views per day over the last week, for the sparklines
+    today = timezone.now().date()
+    analytics.flush()
+    trends = analytics.per_article_daily(today - timedelta(days=6), today)
+    for article in articles:
+        article.trend = analytics.sparkline(trends.get(article.id, [0] * 7))
     return render(request, 'news/dashboard/article_list.html', {'articles': articles})
 
 @staff_member_required
@@ -163,6 +323,21 @@ def dashboard_article_delete(request, pk):
         return redirect('dashboard_article_list')
     return render(request, 'news/dashboard/confirm_delete.html', {'object': article})
 
+@staff_member_required
+def dashboard_autocomplete(request, kind):
+    # JSON for the Select2 pickers on ArticleForm, in Select2's response format
+    from django.http import JsonResponse
+    from .autocomplete import search
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    results, more = search(kind, request.GET.get('q', ''), page)
+    return JsonResponse({
+        'results': [{'id': pk, 'text': name} for pk, name in results],
+        'pagination': {'more': more},
+    })
+
 # TRASH / BACKUP VIEWS
 @staff_member_required
 def dashboard_trash(request):
@@ -258,3 +433,131 @@ def dashboard_activity_log(request):
         logs = ActivityLog.objects.all().order_by('-timestamp')
         
     return render(request, 'news/dashboard/activity_log.html', {'logs': logs})
+
+# --- Exports ---
+@staff_member_required
+def dashboard_export(request, kind, fmt):
+    # Streams ?columns=a,b plus filters (news/exports.DATASETS) as CSV or XLSX
+    from django.http import HttpResponse, StreamingHttpResponse
+    from django.utils.cache import get_conditional_response, patch_cache_control
+    from django.utils.http import quote_etag
+    from . import exports
+    try:
+        export = exports.Export(kind, fmt, request.GET)
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type='text/plain')
+
+    etag = quote_etag(export.etag())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = StreamingHttpResponse(
+            exports.streaming_content(request, export.chunks()), content_type=exports.FORMATS[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export.filename()}"'
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@staff_member_required
+def dashboard_exports(request):
+    # The export forms; "Run in background" writes the file to EXPORT_ROOT instead
+    from urllib.parse import urlencode
+    from . import exports
+    error = None
+    if request.method == 'POST':
+        params = request.POST.copy()
+        kind, fmt, action = params.pop('kind', [''])[-1], params.pop('fmt', [''])[-1], params.pop('action', [''])[-1]
+        params.pop('csrfmiddlewaretoken', None)
+        try:
+            export = exports.Export(kind, fmt, params)
+        except ValueError as e:
+            error = str(e)
+        else:
+            if action == 'background':
+                exports.start_job(export)
+                return redirect('dashboard_exports')
+            query = urlencode([('columns', ','.join(export.columns)), *export.params.items()])
+            return redirect(reverse('dashboard_export', args=[kind, fmt]) + '?' + query)
+
+    context = {
+        'datasets': [
+            {
+                'kind': kind,
+                'columns': [(name, name in dataset.default) for name in dataset.columns],
+                'filters': list(dataset.filters),
+            }
+            for kind, dataset in exports.DATASETS.items()
+        ],
+        'formats': list(exports.FORMATS),
+        'files': exports.files(),
+        'error': error,
+    }
+    return render(request, 'news/dashboard/exports.html', context, status=400 if error else 200)
+
+@staff_member_required
+def dashboard_export_file(request, name):
+    from django.http import FileResponse
+    from . import exports
+    path = exports.file_path(name)
+    if path is None:
+        raise Http404('No such export')
+    return FileResponse(open(path, 'rb'), as_attachment=True)
+
+@staff_member_required
+def dashboard_performance(request):
+    from . import profiling, ratelimit
+
+    if request.method == 'POST':
+        if 'reset' in request.POST:
+            profiling.reset()
+        elif request.POST.get('profile_view'):
+            # The next request to this view is run under cProfile
+            profiling.arm_profile(request.POST['profile_view'])
+        return redirect('dashboard_performance')
+
+    context = {
+        'views': profiling.view_summaries(),
+        'armed_views': profiling.armed_views(),
+        'profiles': profiling.captured_profiles(),
+        'rate_limits': ratelimit.counters(),
+    }
+    return render(request, 'news/dashboard/performance.html', context)
+
+@staff_member_required
+def dashboard_analytics(request):
+    # Views over time: ?start=&end= (ISO dates, inclusive), ?resolution=hour|day,
+    # optionally ?article=<id> or ?category=<slug>
+    from django.http import JsonResponse
+    today = timezone.now().date()
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else today
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=6)
+    except ValueError:
+        return JsonResponse({'error': 'start and end must be YYYY-MM-DD'}, status=400)
+    resolution = request.GET.get('resolution', 'day')
+    limit = {'hour': 31, 'day': 3660}.get(resolution)
+    if limit is None:
+        return JsonResponse({'error': 'resolution must be hour or day'}, status=400)
+    if not 0 <= (end - start).days < limit:
+        return JsonResponse({'error': f'the range must be 1 to {limit} days for {resolution}ly data'}, status=400)
+
+    article = get_object_or_404(Article, pk=request.GET['article']) if request.GET.get('article') else None
+    category = get_object_or_404(Category, slug=request.GET['category']) if request.GET.get('category') else None
+    analytics.flush()
+    if resolution == 'hour':
+        first = datetime.combine(start, datetime.min.time(), tzinfo=dt_timezone.utc)
+        series = analytics.hourly(first, first + timedelta(days=(end - start).days + 1), article, category)
+    else:
+        series = analytics.daily(start, end, article, category)
+    return JsonResponse({
+        'resolution': resolution,
+        'series': [[point.isoformat(), n] for point, n in series],
+        'total': sum(n for _, n in series),
+    })
+
+@staff_member_required
+def dashboard_ratelimit_stats(request):
+    # For monitoring: allowed / limited / bypassed counts per route class
+    from django.http import JsonResponse
+    from .ratelimit import counters
+    return JsonResponse(counters())
@@ -0,0 +1,69 @@
+"""
+Background warm-up for a freshly started web process.
+
+myproject/wsgi.py and asgi.py call start() once the application is loaded.
+A daemon thread then does the work the first visitors would otherwise wait
+for: importing every view through the URLconf, compiling the public
+templates, filling the site configuration and navigation caches, and opening
+the database connections of the news/concurrent.py fetch pool. Requests are
+served meanwhile; anything not warmed yet is simply built on demand.
+"""
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES = [
+    'news/base.html',
+    'news/home.html',
+    'news/article_detail.html',
+    'news/category_detail.html',
+    'news/tag_detail.html',
+    'news/date_archive.html',
+]
+
+
+def warm():
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+    from .context_processors import site_configuration
+    from .navigation import get_navigation
+    from . import concurrent
+
+    get_resolver().url_patterns
+    for name in TEMPLATES:
+        get_template(name)
+    site_configuration(None)
+    get_navigation()
+    if concurrent.concurrent():
+        # One task per pool thread, so each opens its connection now
+        barrier = threading.Barrier(concurrent.POOL_SIZE)
+        tasks = [concurrent._pool.submit(_connect, barrier) for _ in range(concurrent.POOL_SIZE)]
+        for task in tasks:
+            task.result()
+
+
+def _connect(barrier):
+    connection.ensure_connection()
+    # Hold this thread until every pool thread has one
+    barrier.wait(timeout=10)
+
+
+def _run():
+    start = time.monotonic()
+    try:
+        warm()
+    except Exception:
+        logger.warning('Warm-up failed; the first requests will build what is missing', exc_info=True)
+    else:
+        logger.info('Warm-up done in %.2fs', time.monotonic() - start)
+    finally:
+        connection.close()
+
+
+def start():
+    if getattr(settings, 'WARM_UP_ON_START', True):
+        threading.Thread(target=_run, name='news-warmup', daemon=True).start()